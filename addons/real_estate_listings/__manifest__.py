@@ -1,6 +1,6 @@
 {
     'name': 'Adomi - Listing Lab',
-    'version': '1.0',
+    'version': '1.1',
     'summary': 'Track and manage real estate property listings',
     'description': """
                                       A simple, friendly place to keep track of homes you’re looking at. 
@@ -0,0 +1,16 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Turn off the daily full refresh on existing databases, the hourly refresh replaces it
+
+    The cron records are noupdate, so upgrading the module does not apply the
+    data file's active flag to the cron that already exists.
+    """
+    if not version:
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cron = env.ref('real_estate_listings.cron_scrape_active_properties', raise_if_not_found=False)
+    if cron and cron.active:
+        cron.active = False
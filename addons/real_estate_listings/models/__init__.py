@@ -7,3 +7,4 @@ from . import tax_history
 from . import features
 from . import estimate
 from . import school
+from . import change_history
@@ -0,0 +1,47 @@
+import logging
+
+from odoo import models, fields
+
+_logger = logging.getLogger(__name__)
+
+
+class PropertyChangeHistory(models.Model):
+    _name = 'real_estate.change_history'
+    _description = 'Property Change History'
+    _order = 'date desc, id desc'
+
+    property_id = fields.Many2one(
+        'real_estate.listing',
+        string='Property',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        help='Related property'
+    )
+
+    date = fields.Datetime(
+        string='Date',
+        required=True,
+        default=fields.Datetime.now,
+        help='When the change was written'
+    )
+
+    field_name = fields.Selection(
+        [
+            ('price', 'List Price'),
+            ('market_status', 'Market Status'),
+        ],
+        string='Field',
+        required=True,
+        help='Listing field that changed'
+    )
+
+    old_value = fields.Char(
+        string='Old Value',
+        help='Value before the change'
+    )
+
+    new_value = fields.Char(
+        string='New Value',
+        help='Value after the change'
+    )
@@ -1,13 +1,14 @@
-import json
 import logging
 import os
+from datetime import timedelta
 from urllib.parse import urlparse
 
-import pika
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 from openai import OpenAI
 
+from .scrape_publisher import get_scrape_publisher
+
 _logger = logging.getLogger(__name__)
 
 
@@ -361,6 +362,29 @@ class RealEstate(models.Model):
         help='History of property taxes'
     )
 
+    # Refresh schedule
+    change_history_ids = fields.One2many(
+        'real_estate.change_history',
+        'property_id',
+        string='Change History',
+        help='Price and status changes, which make the listing refresh more often'
+    )
+
+    last_scraped_at = fields.Datetime(
+        string='Last Scraped',
+        readonly=True,
+        copy=False,
+        help='When the scraper last scraped the listing successfully, whether or not it had changed'
+    )
+
+    next_scrape_at = fields.Datetime(
+        string='Next Scrape',
+        readonly=True,
+        copy=False,
+        index=True,
+        help='When the hourly refresh will next send the listing to the scraper'
+    )
+
     # Tax Record Fields
     tax_record_apn = fields.Char(
         string='APN',
@@ -789,9 +813,24 @@ class RealEstate(models.Model):
         help='Number of saves in the last 28 days'
     )
 
+    # Fields whose changes are kept in the change history
+    _VOLATILE_FIELDS = ('price', 'market_status')
+
     def write(self, vals):
+        # Refresh bookkeeping (mark_scraped, _schedule_next_scrape) changes neither price nor
+        # status, and open forms need no update for it
+        if self.env.context.get('scrape_bookkeeping'):
+            return super().write(vals)
+
+        changed_fields = [field_name for field_name in self._VOLATILE_FIELDS if field_name in vals]
+        previous = {record.id: {field_name: record[field_name] for field_name in changed_fields}
+                    for record in self} if changed_fields else {}
+
         res = super().write(vals)
 
+        if previous:
+            self._record_changes(previous)
+
         try:
             bus = self.env["bus.bus"]
             payload_fields = list(vals.keys())
@@ -819,6 +858,28 @@ class RealEstate(models.Model):
             _logger.warning("Failed to send bus notification for RealEstate.write: %s", e)
         return res
 
+    def _record_changes(self, previous):
+        """
+        Add the changed volatile fields to the change history
+
+        Args:
+            previous: Record id -> values of the written volatile fields before the write
+        """
+        history = []
+        for record in self:
+            for field_name, old_value in previous.get(record.id, {}).items():
+                new_value = record[field_name]
+                if new_value != old_value:
+                    history.append({
+                        'property_id': record.id,
+                        'field_name': field_name,
+                        'old_value': str(old_value or ''),
+                        'new_value': str(new_value or ''),
+                    })
+
+        if history:
+            self.env['real_estate.change_history'].sudo().create(history)
+
     @api.depends('listing_date')
     def _compute_days_on_market(self):
         today = fields.Date.today()
@@ -976,9 +1037,52 @@ class RealEstate(models.Model):
 
         return False
 
-    def action_scrape_property(self):
+    @api.model
+    def _publish_scrape_messages(self, messages):
+        """
+        Publish scrape requests to RabbitMQ with the worker's shared publisher
+
+        Args:
+            messages: List of message payloads for the scraper
+        """
+        get_scrape_publisher().publish(messages)
+
+    def _scrape_message(self, force_refresh=True):
+        """
+        Build the message asking the scraper to refresh this listing from its address
+
+        Args:
+            force_refresh: Ask the scraper to write the listing even if its content
+                           fingerprint is unchanged (scheduled refreshes pass False)
+        """
+        self.ensure_one()
+
+        # Prepare message payload
+        message = {
+            'location': self.address,
+            'listing_type': 'for_sale',
+            'record_id': self.id,
+            'limit': 1,
+            'force_refresh': force_refresh,
+        }
+
+        # If URL is provided, try to extract more information
+        if self.url:
+            try:
+                parsed_url = urlparse(self.url)
+                message['source_url'] = self.url
+            except Exception as e:
+                _logger.warning(f"Could not parse URL: {e}")
+
+        return message
+
+    def action_scrape_property(self, force_refresh=True):
         """
         Publish a message to RabbitMQ to trigger property scraping
+
+        Args:
+            force_refresh: Ask the scraper to write the listing even if its content
+                           fingerprint is unchanged (scheduled refreshes pass False)
         """
         self.ensure_one()
 
@@ -989,67 +1093,8 @@ class RealEstate(models.Model):
         _logger.info(f'Publishing scrape request for property: {self.address}')
 
         try:
-            # Get RabbitMQ connection parameters from environment variables
-            rabbitmq_host = os.environ.get('RABBITMQ_HOST', 'rabbitmq')
-            rabbitmq_port = int(os.environ.get('RABBITMQ_PORT', 5672))
-            rabbitmq_user = os.environ.get('RABBITMQ_USER', 'guest')
-            rabbitmq_pass = os.environ.get('RABBITMQ_PASS', 'guest')
-            rabbitmq_exchange = os.environ.get('RABBITMQ_EXCHANGE', 'property_exchange')
-            rabbitmq_routing_key = os.environ.get('RABBITMQ_ROUTING_KEY', 'property.scrape')
-
-            # Prepare message payload
-            message = {
-                'location': self.address,
-                'listing_type': 'for_sale',
-                'record_id': self.id,
-                'limit': 1
-            }
-
-            # If URL is provided, try to extract more information
-            if self.url:
-                try:
-                    parsed_url = urlparse(self.url)
-                    message['source_url'] = self.url
-                except Exception as e:
-                    _logger.warning(f"Could not parse URL: {e}")
-
-            # Connect to RabbitMQ
-            credentials = pika.PlainCredentials(
-                rabbitmq_user,
-                rabbitmq_pass
-            )
-
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_host,
-                port=rabbitmq_port,
-                credentials=credentials
-            )
-
-            connection = pika.BlockingConnection(parameters)
-            channel = connection.channel()
-
-            # Declare exchange
-            channel.exchange_declare(
-                exchange=rabbitmq_exchange,
-                exchange_type='topic',
-                durable=True
-            )
-
-            # Publish message
-            channel.basic_publish(
-                exchange=rabbitmq_exchange,
-                routing_key=rabbitmq_routing_key,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # make message persistent
-                    content_type='application/json'
-                )
-            )
-
-            _logger.info(f"Published message to RabbitMQ: {message}")
-
-            # Close connection
-            connection.close()
+            self._publish_scrape_messages([self._scrape_message(force_refresh)])
+            self._schedule_next_scrape()
 
             # Show success message to user
             return {
@@ -1067,11 +1112,433 @@ class RealEstate(models.Model):
             _logger.error(f"Error publishing to RabbitMQ: {str(e)}")
             raise UserError(f"Failed to send scrape request: {str(e)}")
 
+    # How scraped listings are matched; the scraper reads both through scraper_sync_spec.
+    # Identity fields recognizing an existing listing, alone or together, in order of precedence
+    # ('mls' names the MLS, which many listings share, so it only counts together with mls_id)
+    _SCRAPER_IDENTITY_KEYS = (('property_id',), ('mls', 'mls_id'), ('url',), ('address',))
+
+    # Child collections synced by the scraper: payload key -> (model, one2many field, fields identifying a row)
+    _SCRAPER_CHILD_COLLECTIONS = {
+        'photos': ('real_estate.photo', 'photo_ids', ('preview_href',)),
+        'popularity': ('real_estate.popularity', 'popularity_ids', ('last_n_days',)),
+        'features': ('real_estate.feature', 'feature_ids', ('parent_category', 'category')),
+        'estimates': ('real_estate.estimate', 'estimate_ids', ('date', 'source_name', 'source_type')),
+        'tax_history': ('real_estate.tax_history', 'tax_history_ids', ('year',)),
+    }
+
+    @api.model
+    def scraper_sync_spec(self):
+        """
+        Describe how scraped listings are identified and their child rows matched
+
+        upsert_scraped_listing follows these rules itself; the scraper loads them at
+        startup to resolve identities in bulk and to sync listings on its own when the
+        upsert is turned off, so both sides never disagree.
+
+        Returns:
+            Dictionary with 'identity_keys' (groups of fields, in order of precedence) and
+            'child_collections' (payload key -> 'model', 'field' and 'key_fields')
+        """
+        return {
+            'identity_keys': [list(field_names) for field_names in self._SCRAPER_IDENTITY_KEYS],
+            'child_collections': {
+                section: {'model': model_name, 'field': field_name, 'key_fields': list(key_fields)}
+                for section, (model_name, field_name, key_fields) in self._SCRAPER_CHILD_COLLECTIONS.items()
+            },
+        }
+
+    @api.model
+    def upsert_scraped_listing(self, payload):
+        """
+        Create or update a listing and all of its child collections from one scraper payload
+
+        Identity resolution, the listing write and every child collection are handled
+        in a single call (and therefore a single transaction), so the form never shows
+        a listing with half-synced photos, estimates or tax history.
+
+        Args:
+            payload: Dictionary with the mapped 'listing' values, an optional 'record_id',
+                     'tags' (api names), 'schools' (names) and the child collections
+                     'photos', 'popularity', 'features', 'estimates' and 'tax_history'
+
+        Returns:
+            ID of the created or updated listing
+        """
+        vals = dict(payload.get('listing') or {})
+
+        listing = self.browse()
+        if payload.get('record_id'):
+            listing = self.browse(payload['record_id']).exists()
+        if not listing:
+            listing = self._find_scraped_listing(vals)
+
+        if payload.get('tags'):
+            vals['listing_tag_ids'] = [(6, 0, self._resolve_scraped_tags(payload['tags']))]
+
+        if payload.get('schools'):
+            vals['nearby_school_ids'] = [(6, 0, self._resolve_scraped_schools(payload['schools']))]
+
+        if listing:
+            # Unchanged listings are not written at all (no recomputes, tracking or bus message)
+            changes = self._scraped_changes(listing, vals)
+            if changes:
+                listing.write(changes)
+        else:
+            listing = self.create(vals)
+
+        for section, (model_name, _field_name, key_fields) in self._SCRAPER_CHILD_COLLECTIONS.items():
+            rows = payload.get(section)
+            if not rows:
+                continue
+
+            if section == 'photos':
+                listing._sync_scraped_photos(rows)
+            else:
+                listing._sync_scraped_children(model_name, key_fields, rows)
+
+        return listing.id
+
+    @api.model
+    def _scraped_changes(self, record, vals):
+        """
+        Return the subset of scraped values that would actually change a record
+
+        Values are compared after the field's own conversion, so '' and False,
+        rounded monetary amounts or datetime strings and objects compare equal.
+        Relations set with (6, 0, ids) only count as changed when membership differs.
+
+        Args:
+            record: Record about to be written
+            vals: Values to write
+
+        Returns:
+            Dictionary with the changed values
+        """
+        changes = {}
+
+        for name, value in vals.items():
+            field = record._fields.get(name)
+            if field is None:
+                changes[name] = value
+                continue
+
+            if field.type in ('one2many', 'many2many'):
+                replaces = value and all(
+                    isinstance(command, (list, tuple)) and len(command) == 3 and command[0] == 6
+                    for command in value
+                )
+                if not replaces or set(value[-1][2]) != set(record[name].ids):
+                    changes[name] = value
+                continue
+
+            try:
+                old = field.convert_to_write(record[name], record)
+                new = field.convert_to_write(value, record)
+            except Exception:
+                changes[name] = value
+                continue
+
+            if old != new and (old or new):
+                changes[name] = value
+
+        return changes
+
+    @api.model
+    def _find_scraped_listing(self, vals):
+        """Find an existing listing by property_id, then MLS and MLS number, then URL, then address
+
+        See _SCRAPER_IDENTITY_KEYS.
+        """
+        for field_names in self._SCRAPER_IDENTITY_KEYS:
+            if not all(vals.get(field_name) for field_name in field_names):
+                continue
+
+            listing = self.search([(field_name, '=', vals[field_name]) for field_name in field_names], limit=1)
+            if listing:
+                return listing
+
+        return self.browse()
+
+    @api.model
+    def _resolve_scraped_tags(self, api_names):
+        """Return real_estate.tag ids for the given api names, creating missing tags"""
+        api_names = list(dict.fromkeys(name for name in api_names if name and isinstance(name, str)))
+        Tag = self.env['real_estate.tag']
+
+        tag_by_api_name = {tag.api_name: tag.id for tag in Tag.search([('api_name', 'in', api_names)])}
+
+        missing = [name for name in api_names if name not in tag_by_api_name]
+        if missing:
+            created = Tag.create([{
+                # Convert api_name to display name (e.g., 'community_gym' -> 'Community Gym')
+                'name': ' '.join(word.capitalize() for word in name.split('_')),
+                'api_name': name,
+                'tag_type': 'listing',
+            } for name in missing])
+            tag_by_api_name.update(zip(missing, created.ids))
+
+        return [tag_by_api_name[name] for name in api_names]
+
+    @api.model
+    def _resolve_scraped_schools(self, names):
+        """Return real_estate.school ids for the given names, creating missing schools"""
+        names = list(dict.fromkeys(name for name in names if name))
+        School = self.env['real_estate.school']
+
+        school_by_name = {school.name: school.id for school in School.search([('name', 'in', names)])}
+
+        missing = [name for name in names if name not in school_by_name]
+        if missing:
+            created = School.create([{'name': name} for name in missing])
+            school_by_name.update(zip(missing, created.ids))
+
+        return [school_by_name[name] for name in names]
+
+    @api.model
+    def _prepare_scraped_photos(self, rows):
+        """Swap the tag labels of scraped photo rows for real_estate.photo.tag links"""
+        labels = list(dict.fromkeys(label for row in rows for label in (row.get('tags') or []) if label))
+        PhotoTag = self.env['real_estate.photo.tag']
+
+        tag_by_label = {tag.name: tag.id for tag in PhotoTag.search([('name', 'in', labels)])}
+
+        missing = [label for label in labels if label not in tag_by_label]
+        if missing:
+            created = PhotoTag.create([{'name': label} for label in missing])
+            tag_by_label.update(zip(missing, created.ids))
+
+        prepared = []
+        for row in rows:
+            row = dict(row)
+            row_labels = row.pop('tags', None) or []
+            # Always set the tags, so photos that lost theirs are cleared too
+            row['tag_ids'] = [(6, 0, list(dict.fromkeys(tag_by_label[label] for label in row_labels if label)))]
+            prepared.append(row)
+
+        return prepared
+
+    def _sync_scraped_photos(self, rows):
+        """
+        Make the photos of this listing match the scraped photo rows
+
+        Photos are matched by preview_href. New photos are created in one batch, photos
+        the listing no longer shows (and duplicates) are unlinked in one batch, and the
+        others are only written when their sequence, primary flag or tags changed.
+
+        Args:
+            rows: Scraped photo rows, with tag labels under 'tags'
+        """
+        self.ensure_one()
+        Photo = self.env['real_estate.photo']
+
+        # Rows repeating a preview_href collapse to the last one
+        wanted = {row['preview_href']: row for row in self._prepare_scraped_photos(rows) if row.get('preview_href')}
+
+        photo_by_href = {}
+        stale = Photo
+        for photo in Photo.search([('property_id', '=', self.id)], order='sequence, id'):
+            if photo.preview_href in wanted and photo.preview_href not in photo_by_href:
+                photo_by_href[photo.preview_href] = photo
+            else:
+                stale |= photo
+
+        if stale:
+            stale.unlink()
+
+        to_create = []
+        for href, row in wanted.items():
+            photo = photo_by_href.get(href)
+            if photo:
+                changes = self._scraped_changes(photo, row)
+                if changes:
+                    photo.write(changes)
+            else:
+                to_create.append(dict(row, property_id=self.id))
+
+        if to_create:
+            Photo.create(to_create)
+
+    def _sync_scraped_children(self, model_name, key_fields, rows):
+        """
+        Make one child collection of this listing match the scraped rows
+
+        Rows are matched on key_fields. New rows are created in one batch, children
+        the listing no longer shows (and duplicates) are unlinked in one batch, and
+        the others are only written when a value changed.
+
+        Args:
+            model_name: Child model name
+            key_fields: Fields that identify a row within the listing
+            rows: List of field value dictionaries
+        """
+        self.ensure_one()
+        Child = self.env[model_name]
+
+        def row_key(values):
+            return tuple(str(values[f] or '') for f in key_fields)
+
+        # Rows repeating a key collapse to the last one
+        wanted = {tuple(str(row.get(f) or '') for f in key_fields): row for row in rows}
+
+        record_by_key = {}
+        stale = Child
+        for record in Child.search([('property_id', '=', self.id)], order='id'):
+            key = row_key(record)
+            if key in wanted and key not in record_by_key:
+                record_by_key[key] = record
+            else:
+                stale |= record
+
+        if stale:
+            stale.unlink()
+
+        to_create = []
+        for key, row in wanted.items():
+            record = record_by_key.get(key)
+            if record:
+                changes = self._scraped_changes(record, row)
+                if changes:
+                    record.write(changes)
+            else:
+                to_create.append(dict(row, property_id=self.id))
+
+        if to_create:
+            Child.create(to_create)
+
+    def _scrape_area(self):
+        """Area a listing is refreshed with in bulk: its ZIP code, else its city and state"""
+        self.ensure_one()
+
+        if self.zip_code and self.zip_code.strip():
+            return self.zip_code.strip()
+        if self.city and self.state:
+            return f'{self.city.strip()}, {self.state.strip()}'
+        return False
+
+    def _scrape_refresh_targets(self):
+        """Identity of each listing, for the scraper to find it among the results of an area search"""
+        return [{
+            'record_id': record.id,
+            'property_id': record.property_id or '',
+            'mls': record.mls or '',
+            'mls_id': record.mls_id or '',
+            'address': record.address,
+        } for record in self]
+
+    def _queue_scrape_refresh(self):
+        """
+        Publish refresh requests for the listings in self and schedule their next refresh
+
+        Unless SCRAPE_BULK_REFRESH is disabled, active listings sharing an area (see
+        _scrape_area) are refreshed with one area search per group, and the scraper
+        falls back to an address search for the listings it does not find. Other
+        listings, and groups smaller than SCRAPE_BULK_MIN_GROUP, get one message each.
+
+        Returns:
+            Number of area refresh messages published
+        """
+        bulk_refresh = os.environ.get('SCRAPE_BULK_REFRESH', 'true').lower() in ('1', 'true', 'yes')
+        min_group_size = int(os.environ.get('SCRAPE_BULK_MIN_GROUP', 3))
+
+        bulk_messages = []
+        single_properties = self
+
+        if bulk_refresh:
+            # Area searches only return listings for sale, pending and sold ones are scraped by address
+            for_sale = self.filtered(lambda p: p.market_status in (False, 'active'))
+
+            for area, group in for_sale.grouped(lambda p: p._scrape_area()).items():
+                if not area or len(group) < min_group_size:
+                    continue
+
+                bulk_messages.append({
+                    'location': area,
+                    'listing_type': 'for_sale',
+                    'force_refresh': False,
+                    'refresh': group._scrape_refresh_targets(),
+                })
+                single_properties -= group
+
+        # Unchanged listings are skipped by the scraper unless forced
+        messages = bulk_messages + [record._scrape_message(force_refresh=False) for record in single_properties]
+        self._publish_scrape_messages(messages)
+
+        _logger.info(
+            f'Queued {len(bulk_messages)} area refreshes and {len(single_properties)} single listing scrapes')
+
+        self._schedule_next_scrape()
+        return len(bulk_messages)
+
+    def _scrape_interval(self, change_count):
+        """
+        Time until the listing should be refreshed again
+
+        A listing whose price or status changed once over SCRAPE_VOLATILITY_DAYS is
+        refreshed every SCRAPE_REFRESH_HOURS; more changes shorten the interval,
+        none doubles it. Favorite, pending and contingent listings are refreshed
+        twice as often. The interval never drops below SCRAPE_MIN_REFRESH_HOURS.
+
+        Args:
+            change_count: Changes in the listing's history over the volatility window
+
+        Returns:
+            timedelta
+        """
+        self.ensure_one()
+
+        refresh_hours = float(os.environ.get('SCRAPE_REFRESH_HOURS', 24))
+        min_refresh_hours = float(os.environ.get('SCRAPE_MIN_REFRESH_HOURS', 4))
+
+        hours = refresh_hours * 2 / (1 + change_count)
+        if self.is_favorite or self.market_status in ('pending', 'contingent'):
+            hours /= 2
+
+        return timedelta(hours=max(hours, min_refresh_hours))
+
+    def _schedule_next_scrape(self):
+        """
+        Compute when each listing is refreshed next, once it was queued for the scraper
+
+        last_scraped_at is left alone: the scraper stamps it through mark_scraped
+        once the scrape succeeded.
+        """
+        if not self:
+            return
+
+        now = fields.Datetime.now()
+        volatility_days = int(os.environ.get('SCRAPE_VOLATILITY_DAYS', 30))
+
+        change_counts = dict(self.env['real_estate.change_history']._read_group(
+            [('property_id', 'in', self.ids), ('date', '>=', now - timedelta(days=volatility_days))],
+            ['property_id'],
+            ['__count'],
+        ))
+
+        # One write per distinct schedule instead of one per listing
+        schedules = self.grouped(lambda record: record._scrape_interval(change_counts.get(record, 0)))
+        for interval, records in schedules.items():
+            records.with_context(scrape_bookkeeping=True).write({'next_scrape_at': now + interval})
+
+    def mark_scraped(self):
+        """
+        Record that the scraper scraped these listings successfully
+
+        Called by the scraper once per message, for every listing it wrote or found
+        unchanged (unchanged listings never reach upsert_scraped_listing).
+
+        Returns:
+            True
+        """
+        self.exists().with_context(scrape_bookkeeping=True).write({'last_scraped_at': fields.Datetime.now()})
+        return True
+
     @api.model
     def cron_scrape_active_properties(self):
         """
         Cronjob method to scrape all properties that are not 'off_market'
-        This method is called daily by the scheduled action
+
+        Refreshes everything at once regardless of the schedule; the hourly
+        cron_refresh_due_properties spreads the same work over the day.
         """
         _logger.info('Starting daily scrape of active properties')
 
@@ -1084,24 +1551,58 @@ class RealEstate(models.Model):
 
         _logger.info(f'Found {len(active_properties)} active properties to scrape')
 
-        success_count = 0
-        error_count = 0
-
-        for property_record in active_properties:
-            try:
-                property_record.action_scrape_property()
-                success_count += 1
-                _logger.info(f'Successfully queued scrape for property: {property_record.address}')
-            except Exception as e:
-                error_count += 1
-                _logger.error(f'Failed to queue scrape for property {property_record.address}: {str(e)}')
+        area_refreshes = 0
+        try:
+            area_refreshes = active_properties._queue_scrape_refresh()
+            success_count = len(active_properties)
+            error_count = 0
+        except Exception as e:
+            success_count = 0
+            error_count = len(active_properties)
+            _logger.error(f'Failed to queue the scrape of {len(active_properties)} properties: {str(e)}')
 
         _logger.info(f'Daily scrape completed. Success: {success_count}, Errors: {error_count}')
 
         return {
             'success_count': success_count,
             'error_count': error_count,
-            'total_properties': len(active_properties)
+            'total_properties': len(active_properties),
+            'area_refreshes': area_refreshes,
+        }
+
+    @api.model
+    def cron_refresh_due_properties(self):
+        """
+        Hourly cronjob refreshing the listings whose next refresh is due
+
+        At most SCRAPE_HOURLY_BUDGET listings are queued per run, the most overdue
+        first (listings never scraped before all others), so refreshes are spread
+        over the day instead of all being published at once.
+        """
+        budget = int(os.environ.get('SCRAPE_HOURLY_BUDGET', 250))
+        due_domain = [
+            ('market_status', '!=', 'off_market'),
+            ('address', '!=', False),
+            ('address', '!=', ''),
+            '|', ('next_scrape_at', '=', False), ('next_scrape_at', '<=', fields.Datetime.now()),
+        ]
+
+        due_properties = self.search(
+            due_domain, order='next_scrape_at asc nulls first, is_favorite desc, id', limit=budget)
+        if not due_properties:
+            return {'queued': 0, 'backlog': 0}
+
+        backlog = self.search_count(due_domain) - len(due_properties)
+        if backlog:
+            _logger.warning(f'{backlog} due properties exceed the hourly budget of {budget} and wait for later runs')
+
+        area_refreshes = due_properties._queue_scrape_refresh()
+        _logger.info(f'Queued the refresh of {len(due_properties)} due properties ({area_refreshes} area refreshes)')
+
+        return {
+            'queued': len(due_properties),
+            'area_refreshes': area_refreshes,
+            'backlog': backlog,
         }
 
     def action_ask_chatgpt(self):
@@ -1,11 +1,10 @@
-import json
 import logging
-import os
 
-import pika
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 
+from .scrape_publisher import get_scrape_publisher
+
 _logger = logging.getLogger(__name__)
 
 
@@ -147,14 +146,6 @@ class RealEstateSavedSearch(models.Model):
         _logger.info(f'Publishing search request for: {self.name}')
 
         try:
-            # Get RabbitMQ connection parameters from environment variables
-            rabbitmq_host = os.environ.get('RABBITMQ_HOST', 'rabbitmq')
-            rabbitmq_port = int(os.environ.get('RABBITMQ_PORT', 5672))
-            rabbitmq_user = os.environ.get('RABBITMQ_USER', 'guest')
-            rabbitmq_pass = os.environ.get('RABBITMQ_PASS', 'guest')
-            rabbitmq_exchange = os.environ.get('RABBITMQ_EXCHANGE', 'property_exchange')
-            rabbitmq_routing_key = os.environ.get('RABBITMQ_ROUTING_KEY', 'property.scrape')
-
             # Prepare message payload
             message = {
                 'location': self.location,
@@ -228,40 +219,7 @@ class RealEstateSavedSearch(models.Model):
             if self.limit:
                 message['limit'] = self.limit
 
-            # Connect to RabbitMQ
-            credentials = pika.PlainCredentials(rabbitmq_user, rabbitmq_pass)
-
-            parameters = pika.ConnectionParameters(
-                host=rabbitmq_host,
-                port=rabbitmq_port,
-                credentials=credentials
-            )
-
-            connection = pika.BlockingConnection(parameters)
-            channel = connection.channel()
-
-            # Declare exchange
-            channel.exchange_declare(
-                exchange=rabbitmq_exchange,
-                exchange_type='topic',
-                durable=True
-            )
-
-            # Publish message
-            channel.basic_publish(
-                exchange=rabbitmq_exchange,
-                routing_key=rabbitmq_routing_key,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # make message persistent
-                    content_type='application/json'
-                )
-            )
-
-            _logger.info(f"Published message to RabbitMQ: {message}")
-
-            # Close connection
-            connection.close()
+            get_scrape_publisher().publish([message])
 
             # Show success message to user
             return {
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pika
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+_logger = logging.getLogger(__name__)
+
+
+class ScrapePublisher:
+    """
+    Long-lived RabbitMQ publisher for scrape requests
+
+    Each Odoo worker process keeps one connection and one transactional channel,
+    shared by its threads behind a lock, instead of connecting for every message.
+    Messages are published in AMQP transactions of BATCH_SIZE: tx_commit returns once
+    the broker has taken the whole batch, one round trip per batch. Publisher confirms
+    would guarantee the same, but a BlockingConnection waits for the confirm of every
+    message before publishing the next. A transaction blocks the channel until it is
+    committed, which is why each process has a channel of its own. A dropped
+    connection is reopened and publishing resumes after the last committed batch.
+    """
+
+    # Times a publish is retried on a fresh connection before giving up
+    RETRIES = 2
+
+    # Messages published per transaction
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        # Get RabbitMQ connection parameters from environment variables
+        self.host = os.environ.get('RABBITMQ_HOST', 'rabbitmq')
+        self.port = int(os.environ.get('RABBITMQ_PORT', 5672))
+        self.user = os.environ.get('RABBITMQ_USER', 'guest')
+        self.password = os.environ.get('RABBITMQ_PASS', 'guest')
+        self.exchange = os.environ.get('RABBITMQ_EXCHANGE', 'property_exchange')
+        self.routing_key = os.environ.get('RABBITMQ_ROUTING_KEY', 'property.scrape')
+
+        self._lock = threading.Lock()
+        self._connection = None
+        self._channel = None
+
+    def _open_channel(self):
+        """Return the transactional channel, connecting and declaring the exchange if needed"""
+        if self._channel is not None and self._channel.is_open and self._connection.is_open:
+            # Serve heartbeats and notice a connection the broker closed while idle
+            self._connection.process_data_events(time_limit=0)
+            if self._channel.is_open:
+                return self._channel
+
+        self.close()
+
+        credentials = pika.PlainCredentials(self.user, self.password)
+        parameters = pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            credentials=credentials
+        )
+
+        self._connection = pika.BlockingConnection(parameters)
+        self._channel = self._connection.channel()
+
+        # Declare exchange
+        self._channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type='topic',
+            durable=True
+        )
+
+        # tx_commit returns once the broker has taken responsibility for the published messages
+        self._channel.tx_select()
+
+        _logger.info(f'Connected scrape publisher to RabbitMQ at {self.host}:{self.port}')
+        return self._channel
+
+    def publish(self, messages):
+        """
+        Publish scrape requests in transactions of BATCH_SIZE messages, each committed by the broker
+
+        Args:
+            messages: List of message payloads for the scraper
+
+        Raises:
+            pika.exceptions.AMQPError: If the broker cannot be reached or rejects a message
+        """
+        with self._lock:
+            published = 0
+            attempt = 0
+
+            while published < len(messages):
+                try:
+                    channel = self._open_channel()
+                    batch = messages[published:published + self.BATCH_SIZE]
+                    for message in batch:
+                        channel.basic_publish(
+                            exchange=self.exchange,
+                            routing_key=self.routing_key,
+                            body=json.dumps(message),
+                            properties=pika.BasicProperties(
+                                delivery_mode=2,  # make message persistent
+                                content_type='application/json',
+                                timestamp=int(time.time())  # lets the scraper measure queue lag
+                            )
+                        )
+                        _logger.debug(f'Published message to RabbitMQ: {message}')
+
+                    # Uncommitted messages are discarded by the broker if the connection drops
+                    channel.tx_commit()
+                    published += len(batch)
+                except (AMQPConnectionError, AMQPChannelError) as e:
+                    self.close()
+                    attempt += 1
+                    if attempt > self.RETRIES:
+                        raise
+                    _logger.warning(
+                        f'RabbitMQ connection lost after {published} of {len(messages)} messages, '
+                        f'reconnecting: {e!r}')
+
+            _logger.info(f'Published {len(messages)} scrape requests to RabbitMQ')
+
+    def close(self):
+        """Close the connection, ignoring errors of one that is already gone"""
+        connection, self._connection, self._channel = self._connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except Exception as e:
+                _logger.debug(f'Error closing RabbitMQ connection: {e!r}')
+
+
+_publisher = None
+_publisher_pid = None
+_publisher_lock = threading.Lock()
+
+
+def get_scrape_publisher():
+    """
+    Return the scrape publisher of the current process
+
+    Odoo's prefork server forks workers after loading the addon, so a worker never
+    reuses a connection opened by its parent.
+    """
+    global _publisher, _publisher_pid
+
+    with _publisher_lock:
+        if _publisher is None or _publisher_pid != os.getpid():
+            _publisher = ScrapePublisher()
+            _publisher_pid = os.getpid()
+        return _publisher
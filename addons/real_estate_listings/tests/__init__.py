@@ -1,2 +1,5 @@
 from . import test_api
 from . import test_json2_api
+from . import test_listing_upsert
+from . import test_scrape_refresh
+from . import test_scrape_publisher
@@ -0,0 +1,178 @@
+from unittest.mock import patch
+
+from odoo.tests.common import TransactionCase
+
+
+class TestRealEstateListingUpsert(TransactionCase):
+    """Test the single-call listing upsert used by the scraper"""
+
+    def setUp(self):
+        super(TestRealEstateListingUpsert, self).setUp()
+
+        self.Listing = self.env['real_estate.listing']
+
+        self.payload = {
+            'listing': {
+                'property_id': 'UPSERT123',
+                'address': '123 Upsert St, Test City, TS 12345',
+                'price': 250000,
+                'bedrooms': 3,
+            },
+            'tags': ['community_gym', 'garage_1_or_more'],
+            'schools': ['Test Elementary'],
+            'photos': [
+                {'preview_href': 'https://example.com/1.jpg', 'href': '', 'title': '', 'sequence': 1,
+                 'is_primary': True, 'tags': ['kitchen', 'interior']},
+                {'preview_href': 'https://example.com/2.jpg', 'href': '', 'title': '', 'sequence': 2,
+                 'is_primary': False, 'tags': ['kitchen']},
+            ],
+            'popularity': [{'last_n_days': 7, 'views_total': 100}],
+            'features': [{'parent_category': 'Interior', 'category': 'Bedrooms', 'text_items': '["3 beds"]'}],
+            'estimates': [{'date': '2025-01-01', 'estimate': 240000, 'source_name': 'Test', 'source_type': 'test'}],
+            'tax_history': [{'year': 2024, 'tax': 3000}],
+        }
+
+    def test_upsert_creates_listing_tree(self):
+        """A new listing is created together with its children, tags and schools"""
+        listing = self.Listing.browse(self.Listing.upsert_scraped_listing(self.payload))
+
+        self.assertEqual(listing.property_id, 'UPSERT123')
+        self.assertEqual(len(listing.photo_ids), 2)
+        self.assertEqual(len(listing.popularity_ids), 1)
+        self.assertEqual(len(listing.feature_ids), 1)
+        self.assertEqual(len(listing.estimate_ids), 1)
+        self.assertEqual(len(listing.tax_history_ids), 1)
+        self.assertEqual(sorted(listing.listing_tag_ids.mapped('api_name')), ['community_gym', 'garage_1_or_more'])
+        self.assertEqual(listing.listing_tag_ids.mapped('tag_type'), ['listing', 'listing'])
+        self.assertEqual(listing.nearby_school_ids.mapped('name'), ['Test Elementary'])
+
+        # Photo tags are shared between photos instead of duplicated
+        self.assertEqual(len(listing.photo_ids.tag_ids), 2)
+
+    def test_upsert_updates_existing_listing(self):
+        """A second upsert resolves the same listing and refreshes children in place"""
+        listing_id = self.Listing.upsert_scraped_listing(self.payload)
+
+        self.payload['listing']['price'] = 275000
+        self.payload['popularity'] = [{'last_n_days': 7, 'views_total': 150}, {'last_n_days': 30, 'views_total': 400}]
+        self.payload['tax_history'] = [{'year': 2024, 'tax': 3100}]
+
+        self.assertEqual(self.Listing.upsert_scraped_listing(self.payload), listing_id)
+
+        listing = self.Listing.browse(listing_id)
+        self.assertEqual(listing.price, 275000)
+        self.assertEqual(len(listing.photo_ids), 2)
+        self.assertEqual(sorted(listing.popularity_ids.mapped('views_total')), [150, 400])
+        self.assertEqual(listing.tax_history_ids.tax, 3100)
+        self.assertEqual(len(listing.estimate_ids), 1)
+
+    def test_upsert_with_record_id(self):
+        """An explicit record_id wins over identity resolution"""
+        listing = self.Listing.create({'address': '1 Other St', 'property_id': 'OTHER'})
+
+        self.payload['record_id'] = listing.id
+        self.assertEqual(self.Listing.upsert_scraped_listing(self.payload), listing.id)
+        self.assertEqual(listing.property_id, 'UPSERT123')
+
+    def test_upsert_finds_listing_by_address(self):
+        """Listings without a property_id are matched by address"""
+        listing = self.Listing.create({'address': self.payload['listing']['address']})
+
+        self.assertEqual(self.Listing.upsert_scraped_listing(self.payload), listing.id)
+
+    def test_upsert_matches_mls_with_mls_number(self):
+        """Listings of the same MLS are only matched together with their MLS number"""
+        listing = self.Listing.create({'address': '1 Other St', 'mls': 'CRMLS', 'mls_id': 'A100'})
+
+        self.payload['listing'].update(mls='CRMLS', mls_id='A200')
+        new_id = self.Listing.upsert_scraped_listing(self.payload)
+        self.assertNotEqual(new_id, listing.id)
+        self.assertEqual(listing.address, '1 Other St')
+
+        del self.payload['listing']['property_id']
+        self.payload['listing'].update(mls_id='A100', address='2 Other St')
+        self.assertEqual(self.Listing.upsert_scraped_listing(self.payload), listing.id)
+
+    def test_upsert_keeps_mls_numbers_of_other_mls_apart(self):
+        """Listings sharing an MLS number under different MLS are different listings"""
+        listing = self.Listing.create({'address': '1 Other St', 'mls': 'CRMLS', 'mls_id': 'A100'})
+
+        del self.payload['listing']['property_id']
+        self.payload['listing'].update(mls='TXAUS', mls_id='A100')
+        new_id = self.Listing.upsert_scraped_listing(self.payload)
+
+        self.assertNotEqual(new_id, listing.id)
+        self.assertEqual((listing.mls, listing.address), ('CRMLS', '1 Other St'))
+        self.assertEqual(self.Listing.browse(new_id).mls, 'TXAUS')
+        self.assertEqual(self.Listing.upsert_scraped_listing(self.payload), new_id)
+
+    def test_sync_spec_describes_the_upsert(self):
+        """The spec served to the scraper is the one the upsert follows"""
+        spec = self.Listing.scraper_sync_spec()
+
+        self.assertEqual(spec['identity_keys'], [['property_id'], ['mls', 'mls_id'], ['url'], ['address']])
+        self.assertEqual(spec['child_collections']['features'], {
+            'model': 'real_estate.feature', 'field': 'feature_ids', 'key_fields': ['parent_category', 'category'],
+        })
+        for collection in spec['child_collections'].values():
+            self.assertEqual(self.Listing._fields[collection['field']].comodel_name, collection['model'])
+
+    def test_upsert_skips_unchanged_values(self):
+        """Re-sending the same payload writes nothing; a change writes only the changed field"""
+        listing_id = self.Listing.upsert_scraped_listing(self.payload)
+        Listing = type(self.Listing)
+        Popularity = type(self.env['real_estate.popularity'])
+
+        with patch.object(Listing, 'write', autospec=True, side_effect=Listing.write) as listing_write, \
+                patch.object(Popularity, 'write', autospec=True, side_effect=Popularity.write) as popularity_write:
+            self.Listing.upsert_scraped_listing(self.payload)
+
+            listing_write.assert_not_called()
+            popularity_write.assert_not_called()
+
+            self.payload['listing']['price'] = 260000
+            self.payload['tags'] = list(reversed(self.payload['tags']))
+            self.Listing.upsert_scraped_listing(self.payload)
+
+            listing_write.assert_called_once()
+            self.assertEqual(listing_write.call_args.args[1], {'price': 260000})
+
+        self.assertEqual(self.Listing.browse(listing_id).price, 260000)
+
+    def test_upsert_reconciles_photos(self):
+        """Photos follow the scraped set: removed ones are unlinked, kept ones resequenced and retagged"""
+        listing = self.Listing.browse(self.Listing.upsert_scraped_listing(self.payload))
+        kept_photo = listing.photo_ids.filtered(lambda p: p.preview_href == 'https://example.com/2.jpg')
+
+        self.payload['photos'] = [
+            {'preview_href': 'https://example.com/2.jpg', 'href': '', 'title': '', 'sequence': 1,
+             'is_primary': True, 'tags': ['exterior']},
+            {'preview_href': 'https://example.com/3.jpg', 'href': '', 'title': '', 'sequence': 2,
+             'is_primary': False, 'tags': []},
+        ]
+        self.Listing.upsert_scraped_listing(self.payload)
+
+        photos = listing.photo_ids.sorted('sequence')
+        self.assertEqual(photos.mapped('preview_href'), ['https://example.com/2.jpg', 'https://example.com/3.jpg'])
+        self.assertEqual(photos[0], kept_photo)
+        self.assertEqual(photos.mapped('is_primary'), [True, False])
+        self.assertEqual(kept_photo.tag_ids.mapped('name'), ['exterior'])
+        self.assertEqual(listing.primary_image_id, kept_photo)
+
+    def test_upsert_reconciles_children(self):
+        """Child rows the listing no longer shows are removed; matching rows are updated in place"""
+        listing = self.Listing.browse(self.Listing.upsert_scraped_listing(self.payload))
+        tax_2024 = listing.tax_history_ids
+
+        self.payload['tax_history'] = [{'year': 2024, 'tax': 3100}, {'year': 2025, 'tax': 3200}]
+        self.payload['features'] = [{'parent_category': 'Exterior', 'category': 'Garage', 'text_items': '["2 cars"]'}]
+        self.payload['popularity'] = []
+        self.Listing.upsert_scraped_listing(self.payload)
+
+        self.assertEqual(sorted(listing.tax_history_ids.mapped('year')), [2024, 2025])
+        self.assertIn(tax_2024, listing.tax_history_ids)
+        self.assertEqual(tax_2024.tax, 3100)
+        self.assertEqual(listing.feature_ids.mapped('category'), ['Garage'])
+
+        # An empty section is missing data, not an empty collection
+        self.assertEqual(len(listing.popularity_ids), 1)
@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock, patch
+
+from pika.exceptions import StreamLostError
+
+from odoo.tests.common import TransactionCase
+
+from ..models import scrape_publisher
+from ..models.scrape_publisher import ScrapePublisher
+
+
+class TestScrapePublisher(TransactionCase):
+    """Test the shared RabbitMQ publisher used for scrape requests"""
+
+    def setUp(self):
+        super(TestScrapePublisher, self).setUp()
+
+        self.connections = []
+        self.published = []
+        self.failures = []
+
+        def connect(parameters):
+            connection = MagicMock(is_open=True)
+            channel = connection.channel.return_value
+            channel.is_open = True
+            pending = []
+
+            def basic_publish(**kwargs):
+                if self.failures and self.failures[0] == len(self.published) + len(pending):
+                    self.failures.pop(0)
+                    connection.is_open = False
+                    channel.is_open = False
+                    raise StreamLostError('connection reset')
+                pending.append((len(self.connections), kwargs['body']))
+
+            def tx_commit():
+                # Only committed messages reach the queue
+                self.published.extend(pending)
+                pending.clear()
+
+            channel.basic_publish.side_effect = basic_publish
+            channel.tx_commit.side_effect = tx_commit
+            self.connections.append(connection)
+            return connection
+
+        patcher = patch.object(scrape_publisher.pika, 'BlockingConnection', side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.publisher = ScrapePublisher()
+
+    def test_publish_reuses_connection(self):
+        """Messages published one after another share one transactional connection"""
+        self.publisher.publish([{'location': 'a'}])
+        self.publisher.publish([{'location': 'b'}, {'location': 'c'}])
+
+        self.assertEqual(len(self.connections), 1)
+        self.assertEqual(len(self.published), 3)
+        channel = self.connections[0].channel.return_value
+        channel.tx_select.assert_called_once()
+        self.assertEqual(channel.tx_commit.call_count, 2)
+
+    def test_publish_commits_batches(self):
+        """A batch is committed once per BATCH_SIZE messages, not once per message"""
+        with patch.object(ScrapePublisher, 'BATCH_SIZE', 2):
+            self.publisher.publish([{'location': str(n)} for n in range(5)])
+
+        self.assertEqual(len(self.published), 5)
+        self.assertEqual(self.connections[0].channel.return_value.tx_commit.call_count, 3)
+
+    def test_publish_resumes_after_reconnect(self):
+        """A lost connection is reopened and the uncommitted batch is sent again"""
+        with patch.object(ScrapePublisher, 'BATCH_SIZE', 2):
+            self.failures = [3]
+            self.publisher.publish([{'location': 'a'}, {'location': 'b'}, {'location': 'c'}, {'location': 'd'}])
+
+        self.assertEqual(len(self.connections), 2)
+        self.assertEqual(self.published, [
+            (1, '{"location": "a"}'), (1, '{"location": "b"}'), (2, '{"location": "c"}'), (2, '{"location": "d"}'),
+        ])
+
+    def test_publish_gives_up(self):
+        """Publishing fails once the broker stays unreachable after the retries"""
+        self.failures = [0] * (ScrapePublisher.RETRIES + 1)
+
+        with self.assertRaises(StreamLostError):
+            self.publisher.publish([{'location': 'a'}])
@@ -0,0 +1,172 @@
+import importlib.util
+import os
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestScrapeRefresh(TransactionCase):
+    """Test the messages the daily refresh cron publishes for the scraper"""
+
+    def setUp(self):
+        super(TestScrapeRefresh, self).setUp()
+
+        self.Listing = self.env['real_estate.listing']
+
+        def listing(number, zip_code, market_status='active'):
+            return self.Listing.create({
+                'property_id': f'REFRESH{number}',
+                'address': f'{number} Refresh St, Test City, TS {zip_code}',
+                'zip_code': zip_code,
+                'city': 'Test City',
+                'state': 'TS',
+                'market_status': market_status,
+            })
+
+        self.grouped = listing(1, '99901') | listing(2, '99901') | listing(3, '99901')
+        self.pending = listing(4, '99901', 'pending')
+        self.alone = listing(5, '99902')
+        self.off_market = listing(6, '99901', 'off_market')
+
+    def run_cron(self, cron='cron_scrape_active_properties', **environ):
+        """Run a cron and return the messages it published"""
+        published = []
+        Listing = type(self.Listing)
+
+        with patch.dict(os.environ, environ), \
+                patch.object(Listing, '_publish_scrape_messages', autospec=True,
+                             side_effect=lambda model, messages: published.extend(messages)):
+            getattr(self.Listing, cron)()
+
+        return published
+
+    def test_cron_refreshes_areas_in_bulk(self):
+        """Active listings sharing a ZIP code are refreshed by one area search; the rest by address"""
+        published = self.run_cron(SCRAPE_BULK_REFRESH='true', SCRAPE_BULK_MIN_GROUP='3')
+
+        area_messages = [message for message in published if message['location'] == '99901']
+        self.assertEqual(len(area_messages), 1)
+        self.assertFalse(area_messages[0]['force_refresh'])
+        self.assertEqual(
+            sorted(target['record_id'] for target in area_messages[0]['refresh']), sorted(self.grouped.ids))
+        self.assertEqual(
+            sorted(target['property_id'] for target in area_messages[0]['refresh']),
+            ['REFRESH1', 'REFRESH2', 'REFRESH3'])
+
+        single_ids = [message['record_id'] for message in published if message.get('record_id')]
+        self.assertIn(self.pending.id, single_ids)
+        self.assertIn(self.alone.id, single_ids)
+        self.assertNotIn(self.off_market.id, single_ids)
+        for record in self.grouped:
+            self.assertNotIn(record.id, single_ids)
+
+    def test_cron_without_bulk_refresh(self):
+        """With bulk refresh disabled every listing gets its own message"""
+        published = self.run_cron(SCRAPE_BULK_REFRESH='false')
+
+        self.assertFalse([message for message in published if 'refresh' in message])
+        single_ids = [message['record_id'] for message in published if message.get('record_id')]
+        for record in self.grouped | self.pending | self.alone:
+            self.assertIn(record.id, single_ids)
+
+    def test_price_and_status_changes_are_recorded(self):
+        """Writing a new price or status adds to the change history; rewriting the same value does not"""
+        listing = self.alone
+
+        listing.write({'price': 300000})
+        listing.write({'price': 300000, 'bedrooms': 3})
+        listing.write({'market_status': 'pending'})
+
+        self.assertEqual(
+            listing.change_history_ids.sorted('id').mapped('field_name'), ['price', 'market_status'])
+        self.assertEqual(listing.change_history_ids.filtered(lambda c: c.field_name == 'market_status').new_value,
+                         'pending')
+
+    def test_schedule_follows_volatility(self):
+        """Listings that change often, favorites and pending listings are refreshed sooner"""
+        volatile = self.grouped[0]
+        self.env['real_estate.change_history'].create([
+            {'property_id': volatile.id, 'field_name': 'price', 'old_value': '1', 'new_value': '2'}
+            for _ in range(3)
+        ])
+        favorite = self.grouped[1]
+        favorite.is_favorite = True
+        stable = self.grouped[2]
+
+        now = fields.Datetime.now()
+        with patch.dict(os.environ, {'SCRAPE_REFRESH_HOURS': '24', 'SCRAPE_MIN_REFRESH_HOURS': '4'}):
+            (self.grouped | self.pending)._schedule_next_scrape()
+
+        def hours(listing):
+            return round((listing.next_scrape_at - now) / timedelta(hours=1))
+
+        self.assertEqual(hours(stable), 48)
+        self.assertEqual(hours(favorite), 24)
+        self.assertEqual(hours(self.pending), 24)
+        self.assertEqual(hours(volatile), 12)
+
+    def test_hourly_refresh_spends_budget_on_due_listings(self):
+        """The hourly cron queues at most its budget of due listings and schedules their next refresh"""
+        later = fields.Datetime.now() + timedelta(days=1)
+        self.Listing.search([]).write({'next_scrape_at': later})
+        due = self.grouped | self.pending | self.alone
+        due.write({'next_scrape_at': False})
+
+        published = self.run_cron('cron_refresh_due_properties', SCRAPE_HOURLY_BUDGET='2')
+
+        queued = due.filtered(lambda listing: listing.next_scrape_at)
+        self.assertEqual(len(queued), 2)
+        self.assertEqual(len(published), 2)
+        for listing in queued:
+            self.assertGreater(listing.next_scrape_at, fields.Datetime.now())
+
+        # Queued is not scraped: only the scraper marks listings scraped
+        self.assertFalse(any(due.mapped('last_scraped_at')))
+
+        # The rest is picked up by the next runs
+        self.run_cron('cron_refresh_due_properties', SCRAPE_HOURLY_BUDGET='2')
+        self.run_cron('cron_refresh_due_properties', SCRAPE_HOURLY_BUDGET='2')
+        self.assertTrue(all(due.mapped('next_scrape_at')))
+
+    def test_mark_scraped(self):
+        """The scraper stamps the listings it scraped, ignoring ids that no longer exist"""
+        missing_id = self.off_market.id
+        self.off_market.unlink()
+
+        self.assertTrue(self.Listing.browse(self.grouped.ids + [missing_id]).mark_scraped())
+        self.assertTrue(all(self.grouped.mapped('last_scraped_at')))
+        self.assertFalse(self.alone.last_scraped_at)
+
+    def test_refresh_bookkeeping_skips_history_and_notifications(self):
+        """Stamping and scheduling refreshes sends no bus message; other writes still do"""
+        Bus = type(self.env['bus.bus'])
+
+        with patch.object(Bus, '_sendone', autospec=True) as sendone, \
+                patch.object(type(self.Listing), '_record_changes', autospec=True) as record_changes:
+            self.grouped.mark_scraped()
+            self.grouped._schedule_next_scrape()
+            self.assertFalse(sendone.called)
+            self.assertFalse(record_changes.called)
+
+            self.alone.write({'price': 310000})
+            self.assertEqual(sendone.call_count, 1)
+            self.assertEqual(record_changes.call_count, 1)
+
+        self.assertTrue(all(self.grouped.mapped('last_scraped_at')))
+        self.assertTrue(all(self.grouped.mapped('next_scrape_at')))
+
+    def test_upgrade_turns_off_daily_cron(self):
+        """Upgrading from 1.0 deactivates the daily cron the noupdate data file keeps active"""
+        cron = self.env.ref('real_estate_listings.cron_scrape_active_properties')
+        cron.active = True
+
+        path = os.path.join(os.path.dirname(__file__), '..', 'migrations', '1.1', 'post-migrate.py')
+        spec = importlib.util.spec_from_file_location('post_migrate', path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        migration.migrate(self.env.cr, '19.0.1.0')
+
+        self.assertFalse(cron.active)
+        self.assertTrue(self.env.ref('real_estate_listings.cron_refresh_due_properties').active)
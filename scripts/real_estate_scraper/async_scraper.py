@@ -0,0 +1,761 @@
+#!/usr/bin/env python3
+"""
+asyncio runtime for the property scraper
+
+Selected with SCRAPER_RUNTIME=async. Consumes the same RabbitMQ messages as
+PropertyScraper and maps properties with the same PropertyMapper, but handles up to
+ASYNC_MESSAGE_CONCURRENCY messages and ASYNC_ODOO_CONCURRENCY Odoo calls at once,
+so one slow scrape or Odoo response no longer stalls the whole consumer.
+
+Listings are written with the addon's upsert_scraped_listing only; Odoo instances
+without it need the blocking runtime.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+import aio_pika
+import aiohttp
+
+from checkpoints import CheckpointStore, IngestInterruptedError
+from fingerprints import FingerprintStore
+from metrics import (
+    CHECKPOINTS,
+    MESSAGES,
+    ODOO_RPC_SECONDS,
+    PROPERTIES_PER_MESSAGE,
+    observe_queue_lag,
+    stage_timer,
+    start_metrics_server,
+    timed_iter,
+)
+from rate_limiter import RateLimiter, ScrapeThrottledError
+from scrape_cache import ScrapeCache, query_key
+from scraper import (
+    FINGERPRINT_DB,
+    FINGERPRINT_SKIP,
+    IDENTITY_BATCH_SIZE,
+    LISTING_LOCK_FIELDS,
+    ODOO_API_KEY,
+    ODOO_CONNECT_TIMEOUT,
+    ODOO_DB,
+    ODOO_POOL_SIZE,
+    ODOO_TIMEOUT,
+    ODOO_URL,
+    RABBITMQ_EXCHANGE,
+    RABBITMQ_HOST,
+    RABBITMQ_PASS,
+    RABBITMQ_PORT,
+    RABBITMQ_QUEUE,
+    RABBITMQ_ROUTING_KEY,
+    RABBITMQ_USER,
+    SCRAPE_CHECKPOINT_DB,
+    SCRAPE_CHECKPOINT_TTL,
+    SCRAPE_CACHE_DB,
+    SCRAPE_CACHE_MAX_MB,
+    SCRAPE_CACHE_TTL,
+    SCRAPE_BACKOFF_MAX,
+    SCRAPE_BACKOFF_MIN,
+    SCRAPE_MAX_WAIT,
+    SCRAPE_RATE_BURST,
+    SCRAPE_RATE_DB,
+    SCRAPE_RATE_PER_MINUTE,
+    SCRAPER_COALESCE_WINDOW,
+    SCRAPER_METRICS_PORT,
+    IdentityCache,
+    MessageCoalescer,
+    PropertyMapper,
+    UpsertUnavailableError,
+    shutdown_mapping_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+# Messages handled at once (also the RabbitMQ prefetch count)
+ASYNC_MESSAGE_CONCURRENCY = int(os.getenv('ASYNC_MESSAGE_CONCURRENCY', 4))
+
+# Odoo calls in flight at once, across all messages
+ASYNC_ODOO_CONCURRENCY = int(os.getenv('ASYNC_ODOO_CONCURRENCY', ODOO_POOL_SIZE))
+
+
+class AsyncOdooClient:
+    """
+    Pooled aiohttp client for the Odoo JSON-2 API
+
+    At most max_concurrency requests are in flight; the rest wait for a slot.
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], max_concurrency: int = ASYNC_ODOO_CONCURRENCY,
+                 connect_timeout: float = ODOO_CONNECT_TIMEOUT, timeout: float = ODOO_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+
+        self.requests = 0
+        self.session = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+
+    async def post(self, path: str, payload: Any, timeout: Optional[float] = None) -> tuple:
+        """
+        POST a JSON payload to /json/2/<path>
+
+        Args:
+            path: '<model>/<method>'
+            payload: JSON body
+            timeout: Optional total timeout in seconds for this call
+
+        Returns:
+            Tuple of (HTTP status, decoded JSON body or response text)
+        """
+        # timeout=None would disable the session's timeouts instead of keeping them
+        options = {'timeout': aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+
+        model, _, method = path.partition('/')
+
+        async with self._semaphore:
+            self.requests += 1
+            status = 'error'
+            start = time.perf_counter()
+            try:
+                url = f"{self.base_url}/{path}"
+                async with self.session.post(url, json=payload, **options) as response:
+                    status = str(response.status)
+                    if response.status == 200:
+                        return response.status, await response.json()
+                    return response.status, await response.text()
+            finally:
+                ODOO_RPC_SECONDS.labels(model, method, status).observe(time.perf_counter() - start)
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+
+class AsyncKeyedLock:
+    """asyncio counterpart of scraper.KeyedLock; owners are passed explicitly"""
+
+    def __init__(self):
+        self._owners = {}
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def hold(self, keys: Iterable[tuple], owner: Any):
+        """Hold every key for the duration of the async with block"""
+        keys = set(keys)
+
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: all(self._owners.get(key, (owner,))[0] == owner for key in keys)
+            )
+            for key in keys:
+                self._owners.setdefault(key, [owner, 0])[1] += 1
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                for key in keys:
+                    entry = self._owners[key]
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self._owners[key]
+                self._condition.notify_all()
+
+
+class AsyncPropertyScraper(PropertyMapper):
+    def __init__(self):
+        self.identity_cache = IdentityCache()
+        self.coalescer = MessageCoalescer() if SCRAPER_COALESCE_WINDOW > 0 else None
+        self.fingerprints = FingerprintStore(FINGERPRINT_DB) if FINGERPRINT_SKIP else None
+        self.scrape_cache = (
+            ScrapeCache(SCRAPE_CACHE_DB, SCRAPE_CACHE_TTL, SCRAPE_CACHE_MAX_MB * 1024 * 1024)
+            if SCRAPE_CACHE_TTL > 0 else None
+        )
+        self.rate_limiter = (
+            RateLimiter(SCRAPE_RATE_DB, SCRAPE_RATE_PER_MINUTE, SCRAPE_RATE_BURST,
+                        SCRAPE_BACKOFF_MIN, SCRAPE_BACKOFF_MAX, SCRAPE_MAX_WAIT)
+            if SCRAPE_RATE_PER_MINUTE > 0 else None
+        )
+        self.checkpoints = (
+            CheckpointStore(SCRAPE_CHECKPOINT_DB, SCRAPE_CHECKPOINT_TTL) if SCRAPE_CHECKPOINT_TTL > 0 else None
+        )
+
+        self.connection = None
+        self.channel = None
+        self.queue = None
+        self.odoo = None
+
+        # Bounds the messages handled at once
+        self._messages = asyncio.Semaphore(ASYNC_MESSAGE_CONCURRENCY)
+
+        # Messages waiting to be requeued once HomeHarvest searches resume
+        self._delayed = set()
+
+        # Messages touching the same listing are never handled at the same time
+        self.listing_locks = AsyncKeyedLock()
+
+    async def connect_rabbitmq(self):
+        """Connect to RabbitMQ and set up channel, exchange and queue"""
+        logger.info(f"Connecting to RabbitMQ at {RABBITMQ_HOST}:{RABBITMQ_PORT}")
+
+        # connect_robust reconnects (and re-declares) on its own after a connection loss
+        self.connection = await aio_pika.connect_robust(
+            host=RABBITMQ_HOST,
+            port=RABBITMQ_PORT,
+            login=RABBITMQ_USER,
+            password=RABBITMQ_PASS,
+            heartbeat=600,
+        )
+        self.channel = await self.connection.channel()
+        await self.channel.set_qos(prefetch_count=ASYNC_MESSAGE_CONCURRENCY)
+
+        exchange = await self.channel.declare_exchange(
+            RABBITMQ_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        self.queue = await self.channel.declare_queue(RABBITMQ_QUEUE, durable=True)
+        await self.queue.bind(exchange, routing_key=RABBITMQ_ROUTING_KEY)
+
+        logger.info("Successfully connected to RabbitMQ")
+
+    async def connect_odoo(self):
+        """Connect to Odoo using JSON-2 API"""
+        logger.info(f"Connecting to Odoo at {ODOO_URL}")
+
+        if not ODOO_API_KEY:
+            logger.error("ODOO_API_KEY environment variable is required")
+            raise ConnectionError("ODOO_API_KEY is required")
+
+        headers = {
+            'Authorization': f"bearer {ODOO_API_KEY}",
+            'Content-Type': 'application/json'
+        }
+        if ODOO_DB:
+            headers['X-Odoo-Database'] = ODOO_DB
+
+        self.odoo = AsyncOdooClient(f"{ODOO_URL}/json/2", headers)
+        await self.odoo.open()
+
+        status, _ = await self.odoo.post('res.users/context_get', {})
+        if status != 200:
+            logger.error(f"Authentication with Odoo failed: {status}")
+            raise ConnectionError("Authentication with Odoo failed")
+
+        logger.info(f"Connected to Odoo at {ODOO_URL} using JSON-2 API")
+
+        # Identify listings the way the addon does; addons predating the spec answer 404
+        status, spec = await self.odoo.post('real_estate.listing/scraper_sync_spec', {})
+        self.apply_sync_spec(spec if status == 200 else None)
+
+    async def odoo_request(self, model: str, method: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Make a JSON-2 API request to Odoo
+
+        Args:
+            model: Model name
+            method: Method name
+            timeout: Optional timeout in seconds for this call
+            **kwargs: Method arguments
+
+        Returns:
+            Response data or None if failed
+        """
+        try:
+            status, data = await self.odoo.post(f"{model}/{method}", kwargs, timeout=timeout)
+            if status == 200:
+                return data
+
+            logger.error(f"Odoo API request failed: {status} - {data}")
+            return None
+        except Exception as e:
+            logger.error(f"Error making Odoo API request: {e}")
+            return None
+
+    async def upsert_property(self, payload: Dict[str, Any]) -> int:
+        """
+        Create or update a listing tree with one upsert_scraped_listing call
+
+        Args:
+            payload: Result of build_listing_payload
+
+        Returns:
+            Odoo record ID
+        """
+        listing = payload['listing']
+
+        # A cached id lets Odoo skip its identity searches
+        if not payload['record_id']:
+            payload['record_id'] = self.lookup_cached_identity(listing)
+
+        with stage_timer('upsert'):
+            status, data = await self.odoo.post('real_estate.listing/upsert_scraped_listing', {'payload': payload})
+
+        if status == 404:
+            raise UpsertUnavailableError("Odoo does not provide real_estate.listing/upsert_scraped_listing")
+
+        if status != 200:
+            logger.error(f"Odoo API request failed: {status} - {data}")
+            self.forget_identity(listing)
+            raise Exception(f"Failed to upsert property {listing.get('property_id')}")
+
+        self.remember_identity(listing, data)
+
+        logger.info(f"Upserted property (ID: {data})")
+        return data
+
+    async def resolve_identities(self, identities: List[Dict[str, str]]) -> Optional[List[Optional[int]]]:
+        """
+        Resolve the Odoo ids of a page of mapped identities, one search per group of identity fields
+
+        Args:
+            identities: Identity fields per property (see payload_identity)
+
+        Returns:
+            Odoo id (or None for new listings) per property, or None if resolution failed
+        """
+        resolved = [self.lookup_cached_identity(identity) for identity in identities]
+
+        for field_names in self.identity_key_fields:
+            keys = list(dict.fromkeys(
+                tuple(identity[field_name] for field_name in field_names)
+                for identity, record_id in zip(identities, resolved)
+                if not record_id and all(identity.get(field_name) for field_name in field_names)
+            ))
+            if not keys:
+                continue
+
+            # Chunks are independent, so search them concurrently
+            responses = await asyncio.gather(*(
+                self.odoo_request(
+                    'real_estate.listing', 'search_read',
+                    domain=self.identity_domain(field_names, keys[start:start + IDENTITY_BATCH_SIZE]),
+                    fields=['id', *field_names]
+                )
+                for start in range(0, len(keys), IDENTITY_BATCH_SIZE)
+            ))
+            if any(response is None for response in responses):
+                logger.warning(f"Bulk identity resolution by {'/'.join(field_names)} failed")
+                return None
+
+            # Keep the first match per key, like a search() would
+            found = {}
+            for response in responses:
+                for record in response:
+                    found.setdefault(tuple(record[field_name] for field_name in field_names), record['id'])
+
+            for i, identity in enumerate(identities):
+                key = tuple(identity.get(field_name) for field_name in field_names)
+                if not resolved[i] and key in found:
+                    resolved[i] = found[key]
+
+        for identity, record_id in zip(identities, resolved):
+            if record_id:
+                self.remember_identity(identity, record_id)
+
+        return resolved
+
+    async def mark_scraped(self, record_ids: List[Optional[int]]) -> None:
+        """Stamp the listings of a successful message as scraped in Odoo (see PropertyScraper.mark_scraped)"""
+        ids = sorted({record_id for record_id in record_ids if record_id})
+        responses = await asyncio.gather(*(
+            self.odoo_request('real_estate.listing', 'mark_scraped', ids=ids[start:start + IDENTITY_BATCH_SIZE])
+            for start in range(0, len(ids), IDENTITY_BATCH_SIZE)
+        ))
+        if any(response is None for response in responses):
+            logger.warning(f"Could not mark {len(ids)} listings as scraped")
+
+    def group_by_identity(self, identities: List[Dict[str, str]]) -> List[List[int]]:
+        """
+        Group page positions whose identities share a listing lock key (see LISTING_LOCK_FIELDS)
+
+        Properties in one group would resolve to the same listing, so they are written
+        one after another (in page order) like the blocking runtime does; groups run
+        concurrently. The MLS name is shared by most of a page, so it does not group.
+
+        Args:
+            identities: Identity fields per property (see payload_identity)
+
+        Returns:
+            List of groups of positions
+        """
+        groups = []
+        group_by_key = {}
+
+        for i, identity in enumerate(identities):
+            keys = [(field_name, identity[field_name]) for field_name in LISTING_LOCK_FIELDS
+                    if identity.get(field_name)]
+            group = next((group_by_key[key] for key in keys if key in group_by_key), None)
+            if group is None:
+                group = []
+                groups.append(group)
+            group.append(i)
+            for key in keys:
+                group_by_key.setdefault(key, group)
+
+        return groups
+
+    async def upsert_group(self, payloads: List[Dict[str, Any]], force_refresh: bool, owner: Any) -> List[int]:
+        """Upsert payloads that may resolve to the same listing, in order, each under its listing lock"""
+        property_ids = []
+        for payload in payloads:
+            async with self.listing_locks.hold(self.listing_lock_keys(payload), owner=owner):
+                with stage_timer('dedup'):
+                    fingerprint = self.skip_unchanged_sections(payload, force_refresh)
+
+                if fingerprint is None:
+                    logger.info(f"Property {payload['record_id']} is unchanged since its last scrape, skipping")
+                    property_ids.append(payload['record_id'])
+                    continue
+
+                property_id = await self.upsert_property(payload)
+                self.remember_fingerprint(payload, property_id, fingerprint)
+                property_ids.append(property_id)
+        return property_ids
+
+    def prepare_payloads(self, properties: List[Any], record_id: Optional[int]) -> tuple:
+        """
+        Map a page of scraped properties, emptying the page; blocking, run in an executor
+
+        Returns:
+            Tuple of (upsert payloads, identities)
+        """
+        if record_id and len(properties) > 1:
+            logger.error("There was more than one item at this address, so we will take only the top result")
+            properties = properties[:1]
+
+        payloads = list(timed_iter(self.map_properties(properties, record_id), 'map'))
+        # The payloads hold everything written; release the models before the Odoo round trips
+        properties.clear()
+
+        return payloads, [self.payload_identity(payload) for payload in payloads]
+
+    async def ingest(self, location: str, listing_type: str, record_id: Optional[int],
+                     kwargs: Dict[str, Any], force_refresh: bool, owner: Any) -> List[List[int]]:
+        """
+        Scrape a location and upsert every property found
+
+        Searches for many properties are upserted page by page while later pages are fetched.
+
+        Args:
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            record_id: Optional record ID for direct update
+            kwargs: Additional parameters for the search
+            force_refresh: Write listings even if their fingerprint is unchanged
+            owner: Message holding the listing locks
+
+        Returns:
+            Odoo record IDs, per identity group
+        """
+        logger.info(
+            f"Calling scrape_property with: location={location}, listing_type={listing_type}, kwargs={kwargs}")
+
+        # HomeHarvest and the mapping are blocking, keep them off the event loop. Searches
+        # that are not for a record are checkpointed, so a failed message can resume
+        loop = asyncio.get_running_loop()
+        checkpoint = None
+        if not record_id and self.checkpoints is not None:
+            checkpoint = self.checkpoints.open(query_key(location, listing_type, kwargs))
+            pages = self.checkpointed_pages(checkpoint, location, listing_type, kwargs)
+        else:
+            pages = self.search_pages(location, listing_type, record_id, kwargs)
+
+        results = []
+        found = 0
+        try:
+            while True:
+                page = await loop.run_in_executor(None, next, pages, None)
+                if page is None:
+                    break
+                index, properties = page
+                del page
+
+                properties, written_ids = self.skip_written(checkpoint, properties)
+                results.extend([property_id] for property_id in written_ids)
+                found += len(written_ids)
+
+                payloads, identities = await loop.run_in_executor(
+                    None, self.prepare_payloads, properties, record_id
+                )
+                found += len(payloads)
+                del properties
+
+                # Resolve which properties already exist before writing anything
+                if not record_id and payloads:
+                    with stage_timer('identity'):
+                        resolved_ids = await self.resolve_identities(identities)
+                    if resolved_ids is not None:
+                        for payload, resolved_id in zip(payloads, resolved_ids):
+                            payload['record_id'] = resolved_id
+
+                groups = self.group_by_identity(identities)
+                group_ids = await asyncio.gather(
+                    *(self.upsert_group([payloads[i] for i in group], force_refresh, owner) for group in groups)
+                )
+                results.extend(group_ids)
+
+                if checkpoint is not None:
+                    written = {}
+                    for group, property_ids in zip(groups, group_ids):
+                        for i, property_id in zip(group, property_ids):
+                            if identities[i]['property_id'] and property_id:
+                                written[identities[i]['property_id']] = property_id
+                    self.checkpoints.page_written(checkpoint, index, written)
+        except Exception as e:
+            error = self.interrupted(checkpoint, location, e)
+            if error is e:
+                raise
+            raise error from e
+        finally:
+            # Stop prefetching pages of a search abandoned on error
+            await loop.run_in_executor(None, pages.close)
+
+        if checkpoint is not None:
+            self.checkpoints.finish(checkpoint)
+            if checkpoint.resumed:
+                CHECKPOINTS.labels('completed').inc()
+
+        PROPERTIES_PER_MESSAGE.observe(found)
+        return results
+
+    def prepare_refresh(self, location: str, listing_type: str, targets: List[Dict[str, Any]],
+                        kwargs: Dict[str, Any]) -> tuple:
+        """
+        Search an area and map the properties matching a bulk refresh message's listings;
+        blocking, run in an executor
+
+        Returns:
+            Tuple of (upsert payloads, targets no property matched)
+        """
+        properties = self.scrape_property(location, listing_type, **kwargs)
+        PROPERTIES_PER_MESSAGE.observe(len(properties))
+
+        matches, unmatched = self.match_refresh_targets(properties, targets)
+        payloads = list(timed_iter(
+            (self.build_listing_payload(property_model, record_id) for property_model, record_id in matches), 'map'
+        ))
+        return payloads, unmatched
+
+    async def refresh_area(self, location: str, listing_type: str, targets: List[Dict[str, Any]],
+                           kwargs: Dict[str, Any], force_refresh: bool, owner: Any) -> List[List[int]]:
+        """
+        Refresh the tracked listings of one area with a single search, falling back to
+        a search by address for listings it did not find (see PropertyScraper.refresh_area)
+
+        Args:
+            location: Area to search (ZIP code, or city and state)
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            targets: Listings to refresh (record_id, property_id, mls, mls_id, address)
+            kwargs: Additional parameters for the search
+            force_refresh: Write listings even if their fingerprint is unchanged
+            owner: Message holding the listing locks
+
+        Returns:
+            Odoo record IDs, per matched listing and per fallback search
+        """
+        logger.info(f"Refreshing {len(targets)} listings with one search of {location}")
+
+        loop = asyncio.get_running_loop()
+        payloads, unmatched = await loop.run_in_executor(
+            None, self.prepare_refresh, location, listing_type, targets, kwargs
+        )
+
+        # Matched payloads carry their record_id, so each is its own group
+        results = list(await asyncio.gather(
+            *(self.upsert_group([payload], force_refresh, owner) for payload in payloads)
+        ))
+
+        for target in unmatched:
+            address = target.get('address')
+            if not address:
+                logger.warning(f"Listing {target['record_id']} was not found and has no address, skipping")
+                continue
+
+            logger.info(f"Listing {target['record_id']} was not found in {location}, scraping its address")
+            try:
+                async with self.listing_locks.hold(self.message_lock_keys(address, target['record_id']), owner=owner):
+                    results.extend(await self.ingest(
+                        address, listing_type, target['record_id'], {'limit': 1}, force_refresh, owner))
+            except (UpsertUnavailableError, ScrapeThrottledError):
+                raise
+            except Exception as e:
+                # One listing failing must not fail the rest of the area
+                logger.error(f"Error refreshing listing {target['record_id']} by address: {str(e)}")
+
+        return results
+
+    async def handle_message(self, message: aio_pika.abc.AbstractIncomingMessage):
+        """
+        Process one RabbitMQ message; acknowledged the same way as PropertyScraper.process_message
+
+        Args:
+            message: Incoming message
+        """
+        async with self._messages:
+            MESSAGES.labels('consumed').inc()
+            observe_queue_lag(message.timestamp)
+
+            coalesce_key = None
+            succeeded = False
+            requeue = False
+            delay = 0.0
+
+            try:
+                logger.info(f"Received message: {message.body}")
+
+                location, listing_type, record_id, force_refresh, kwargs, refresh = self.parse_message(message.body)
+
+                if not location:
+                    logger.error("No location provided in message")
+                    await self.settle(message)
+                    return
+
+                if self.coalescer is not None:
+                    key = self.coalesce_key(location, listing_type, record_id, kwargs, refresh, force_refresh)
+                    role = self.coalescer.join(key, message)
+
+                    if role == MessageCoalescer.FOLLOW:
+                        logger.info("The same request is already being processed, it will settle this message")
+                        return
+
+                    if role == MessageCoalescer.DONE:
+                        logger.info("The same request was processed moments ago, skipping")
+                        MESSAGES.labels('coalesced').inc()
+                        await self.settle(message)
+                        return
+
+                    coalesce_key = key
+
+                async with self.listing_locks.hold(self.message_lock_keys(location, record_id), owner=message):
+                    if refresh:
+                        results = await self.refresh_area(
+                            location, listing_type, refresh, kwargs, force_refresh, owner=message)
+                    else:
+                        results = await self.ingest(
+                            location, listing_type, record_id, kwargs, force_refresh, owner=message)
+
+                await self.mark_scraped([property_id for ids in results for property_id in ids])
+                logger.info(f"Successfully processed {sum(len(ids) for ids in results)} properties")
+                logger.info(f"Odoo requests so far: {self.odoo.requests}")
+                logger.info(f"Identity cache stats: {self.identity_cache.stats()}")
+
+                succeeded = True
+                await self.settle(message)
+
+            except ScrapeThrottledError as e:
+                logger.warning(f"{e}. Requeueing the message in {e.retry_after:.0f}s.")
+                requeue = True
+                delay = e.retry_after
+                await self.settle(message, ack=False, requeue=True, delay=delay)
+            except IngestInterruptedError as e:
+                logger.warning(f"{e}. Requeueing the message to retry it later.")
+                requeue = True
+                await self.settle(message, ack=False, requeue=True)
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON in message")
+                await self.settle(message)
+            except UpsertUnavailableError as e:
+                logger.error(f"{e}. Upgrade the addon or run the scraper with SCRAPER_RUNTIME=sync.")
+                await self.settle(message, ack=False)
+            except Exception as e:
+                logger.error(f"Error processing message: {str(e)}")
+                # Remove the message from the queue, something went wrong.
+                await self.settle(message, ack=False)
+            finally:
+                if coalesce_key is not None:
+                    # Duplicates that arrived meanwhile share this message's outcome
+                    for follower in self.coalescer.finish(coalesce_key, succeeded):
+                        MESSAGES.labels('coalesced').inc()
+                        await self.settle(follower, ack=succeeded, requeue=requeue, delay=delay)
+
+    async def settle(self, message: aio_pika.abc.AbstractIncomingMessage, ack: bool = True,
+                     requeue: bool = False, delay: float = 0.0):
+        """
+        Acknowledge or reject a message, dropping it unless requeue is set
+
+        A delayed call runs in a task of its own, so the message does not hold one of
+        the ASYNC_MESSAGE_CONCURRENCY slots while it waits.
+        """
+        MESSAGES.labels('acked' if ack else 'requeued' if requeue else 'nacked').inc()
+
+        if delay > 0:
+            task = asyncio.create_task(self._settle_later(message, ack, requeue, delay))
+            self._delayed.add(task)
+            task.add_done_callback(self._delayed.discard)
+            return
+
+        if ack:
+            await message.ack()
+        else:
+            await message.nack(requeue=requeue)
+
+    @staticmethod
+    async def _settle_later(message: aio_pika.abc.AbstractIncomingMessage, ack: bool, requeue: bool,
+                            delay: float):
+        await asyncio.sleep(delay)
+        if ack:
+            await message.ack()
+        else:
+            await message.nack(requeue=requeue)
+
+    async def consume(self):
+        """Consume messages until cancelled"""
+        start_metrics_server(SCRAPER_METRICS_PORT)
+
+        await self.connect_odoo()
+        await self.connect_rabbitmq()
+
+        logger.info(
+            f"Starting to consume messages from queue: {RABBITMQ_QUEUE} "
+            f"(messages: {ASYNC_MESSAGE_CONCURRENCY}, Odoo calls: {ASYNC_ODOO_CONCURRENCY})")
+
+        tasks = set()
+
+        async def on_message(message):
+            # Handle each message in its own task so the consumer keeps receiving
+            task = asyncio.create_task(self.handle_message(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await self.queue.consume(on_message)
+
+        try:
+            await asyncio.Future()
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await self.odoo.close()
+            await self.connection.close()
+            shutdown_mapping_pool()
+
+            if self.fingerprints is not None:
+                self.fingerprints.close()
+
+            if self.scrape_cache is not None:
+                logger.info(f"HomeHarvest result cache stats: {self.scrape_cache.stats()}")
+                self.scrape_cache.close()
+
+            if self.rate_limiter is not None:
+                logger.info(f"HomeHarvest rate limiter stats: {self.rate_limiter.stats()}")
+                self.rate_limiter.close()
+
+            if self.checkpoints is not None:
+                self.checkpoints.close()
+
+
+def run():
+    """Run the asyncio runtime until interrupted"""
+    logger.info("Starting Property Scraper (asyncio runtime)")
+
+    try:
+        asyncio.run(AsyncPropertyScraper().consume())
+    except KeyboardInterrupt:
+        logger.info("Stopping consumer")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of ingesting scrape messages
+
+Feeds scrape messages through PropertyScraper.process_message against local
+stand-ins: a fake JSON-2 server (fake_odoo.py) with a configurable latency instead
+of Odoo, and searches answered page by page from a fixture (fixtures.py) instead of
+HomeHarvest. Every round sends the same messages: the first creates the listings,
+later ones re-scrape listings that did not change. Reports properties/s, RPCs per
+property, message and RPC latency percentiles and peak memory per round.
+
+Usage:
+    python benchmarks/bench_ingest.py [--size medium | --fixture austin.json.gz] [--messages 4]
+        [--latency-ms 2] [--rounds 2] [--concurrency 1] [--fallback] [--trace-memory] [--json out.json]
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_odoo import FakeOdoo, start_fake_odoo  # noqa: E402
+from fixtures import FIXTURE_SIZES, load_fixture, make_properties  # noqa: E402
+from homeharvest.core.scrapers.models import Property  # noqa: E402
+
+# Properties per page of a search, like realtor.com's
+PAGE_SIZE = 200
+
+
+class FixtureSearches:
+    """
+    HomeHarvest stand-in answering each benchmark location with its share of a fixture
+
+    Pages are kept as compressed JSON and only turned into Property models when
+    fetched, the way HomeHarvest parses each response, so the benchmark measures
+    the scraper's memory rather than the fixture's.
+    """
+
+    def __init__(self, fixture: List[Dict[str, Any]], locations: List[str], search_latency: float = 0.0):
+        self.search_latency = search_latency
+        self.pages = {}
+
+        share = -(-len(fixture) // len(locations))
+        for n, location in enumerate(locations):
+            properties = fixture[n * share:(n + 1) * share]
+            self.pages[location] = [
+                zlib.compress(json.dumps(properties[start:start + PAGE_SIZE]).encode())
+                for start in range(0, len(properties), PAGE_SIZE)
+            ]
+
+    def iter_property_pages(self, location: str, listing_type: str = 'for_sale', prefetch: int = 2,
+                            start_page: int = 0, **kwargs):
+        """Stand-in for homeharvest_pages.iter_property_pages"""
+        for data in self.pages.get(location, [])[start_page:]:
+            if self.search_latency:
+                time.sleep(self.search_latency)
+            yield [Property.model_validate(item) for item in json.loads(zlib.decompress(data))]
+
+    def scrape_property(self, location: str, listing_type: str = 'for_sale', **kwargs):
+        """Stand-in for homeharvest.scrape_property"""
+        return [property_model for page in self.iter_property_pages(location) for property_model in page]
+
+
+class Channel:
+    """Stand-in for the pika channel, counting acks and nacks"""
+
+    def __init__(self):
+        self.settled = {'acked': 0, 'nacked': 0, 'requeued': 0}
+        self._lock = threading.Lock()
+
+    def basic_ack(self, delivery_tag):
+        with self._lock:
+            self.settled['acked'] += 1
+
+    def basic_nack(self, delivery_tag, requeue=False):
+        with self._lock:
+            self.settled['requeued' if requeue else 'nacked'] += 1
+
+
+class Delivery:
+    def __init__(self, delivery_tag: int):
+        self.delivery_tag = delivery_tag
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of values, by nearest rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far (ru_maxrss is in KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size', choices=sorted(FIXTURE_SIZES), default='medium',
+                        help='Synthetic fixture size (small 50, medium 1000, large 10000 properties)')
+    parser.add_argument('--fixture', help='Fixture file from fixtures.py instead of synthetic properties')
+    parser.add_argument('--photos', type=int, default=20, help='Photos per synthetic property')
+    parser.add_argument('--messages', type=int, default=4, help='Messages (locations) the properties are split into')
+    parser.add_argument('--rounds', type=int, default=2, help='Times every message is sent')
+    parser.add_argument('--concurrency', type=int, default=1, help='Messages handled at once')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Latency of every fake Odoo call')
+    parser.add_argument('--search-latency-ms', type=float, default=0.0, help='Latency of every fake search page')
+    parser.add_argument('--fallback', action='store_true',
+                        help='Answer upsert_scraped_listing with 404, so listings are synced from the scraper')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report the peak of Python allocations per round (much slower)')
+    parser.add_argument('--json', help='Write the results to this file, to track them across changes')
+    args = parser.parse_args()
+
+    server = start_fake_odoo(FakeOdoo(latency=args.latency_ms / 1000, server_upsert=not args.fallback))
+    state_dir = tempfile.mkdtemp(prefix='bench_ingest_')
+
+    # The scraper reads its settings on import: point it at the stand-ins, with fresh
+    # local state and without the result cache, rate limit or coalescing
+    os.environ.update({
+        'ODOO_URL': f'http://127.0.0.1:{server.server_port}',
+        'ODOO_API_KEY': 'benchmark',
+        'ODOO_DB_NAME': '',
+        'SCRAPER_STATE_DIR': state_dir,
+    })
+    for name, value in (('SCRAPE_CACHE_TTL', '0'), ('SCRAPE_RATE_PER_MINUTE', '0'), ('SCRAPER_COALESCE_WINDOW', '0')):
+        os.environ.setdefault(name, value)
+
+    import scraper
+
+    # Ingestion logs per property; keep the measurement about ingestion
+    logging.disable(logging.INFO)
+
+    fixture = (
+        load_fixture(args.fixture) if args.fixture
+        else [p.model_dump(mode='json') for p in make_properties(FIXTURE_SIZES[args.size], args.photos)]
+    )
+    locations = [f'Benchmark Area {n + 1}' for n in range(max(1, args.messages))]
+    searches = FixtureSearches(fixture, locations, args.search_latency_ms / 1000)
+    property_count = len(fixture)
+    del fixture
+
+    scraper.scrape_property = searches.scrape_property
+    scraper.iter_property_pages = searches.iter_property_pages
+
+    property_scraper = scraper.PropertyScraper(connect_rabbitmq=False)
+
+    # Time every RPC as the scraper sees it
+    rpc_seconds = []
+    post = property_scraper.transport.post
+
+    def timed_post(path, payload, timeout=None):
+        start = time.perf_counter()
+        try:
+            return post(path, payload, timeout=timeout)
+        finally:
+            rpc_seconds.append(time.perf_counter() - start)
+
+    property_scraper.transport.post = timed_post
+
+    print(f"{property_count} properties in {len(locations)} messages, Odoo latency {args.latency_ms:g} ms"
+          f"{', fallback sync' if args.fallback else ''}, concurrency {args.concurrency}")
+    print(f"{'round':<7}{'props/s':>10}{'rpcs/prop':>11}{'msg p50 ms':>12}{'msg p99 ms':>12}"
+          f"{'rpc p50 ms':>12}{'rpc p99 ms':>12}{'peak MB':>10}  settled")
+
+    results = []
+    for round_number in range(1, args.rounds + 1):
+        server.odoo.reset_calls()
+        rpc_seconds.clear()
+        channel = Channel()
+        message_seconds = []
+
+        def send(n, location):
+            start = time.perf_counter()
+            property_scraper.process_message(channel, Delivery(n), None, json.dumps({'location': location}))
+            message_seconds.append(time.perf_counter() - start)
+
+        if args.trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            list(executor.map(send, range(1, len(locations) + 1), locations))
+        elapsed = time.perf_counter() - start
+
+        traced_peak = None
+        if args.trace_memory:
+            traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+        rpcs = sum(server.odoo.calls.values())
+        result = {
+            'round': round_number,
+            'properties': property_count,
+            'seconds': round(elapsed, 3),
+            'properties_per_second': round(property_count / elapsed, 1),
+            'rpcs': rpcs,
+            'rpcs_per_property': round(rpcs / max(1, property_count), 2),
+            'message_p50_ms': round(percentile(message_seconds, 50) * 1000, 1),
+            'message_p99_ms': round(percentile(message_seconds, 99) * 1000, 1),
+            'rpc_p50_ms': round(percentile(rpc_seconds, 50) * 1000, 2),
+            'rpc_p99_ms': round(percentile(rpc_seconds, 99) * 1000, 2),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'traced_peak_mb': round(traced_peak, 1) if traced_peak is not None else None,
+            'rpc_calls': {f'{model}/{method}': count for (model, method), count in server.odoo.calls.most_common()},
+            'settled': channel.settled,
+        }
+        results.append(result)
+
+        print(f"{round_number:<7}{result['properties_per_second']:>10.1f}{result['rpcs_per_property']:>11.2f}"
+              f"{result['message_p50_ms']:>12.1f}{result['message_p99_ms']:>12.1f}"
+              f"{result['rpc_p50_ms']:>12.2f}{result['rpc_p99_ms']:>12.2f}{result['peak_rss_mb']:>10.1f}"
+              f"  {' '.join(f'{event} {count}' for event, count in channel.settled.items() if count)}")
+        if traced_peak is not None:
+            print(f"{'':<7}peak of traced Python allocations: {traced_peak:.1f} MB")
+
+    print(f"Odoo calls of the last round: {results[-1]['rpc_calls']}")
+    print(f"Records in the fake Odoo: {server.odoo.counts()}")
+
+    listings = server.odoo.counts().get('real_estate.listing', 0)
+    if listings != property_count:
+        print(f"Warning: {property_count} properties were written to {listings} listings; "
+              f"properties sharing an identity (property_id, mls and mls_id, url or address) are merged")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({'arguments': vars(args), 'rounds': results}, output, indent=2)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
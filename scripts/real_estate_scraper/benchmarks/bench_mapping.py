@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark mapping HomeHarvest properties to Odoo values
+
+Reports the per-property cost of the compiled listing converter alone, of
+map_property_to_odoo (identity plus listing values of a dumped property), of the
+model_dump build_listing_payload starts with and of build_listing_payload (the
+whole upsert payload), on synthetic properties from fixtures.py.
+
+Usage:
+    python benchmarks/bench_mapping.py [--properties 1000] [--photos 20] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import make_properties  # noqa: E402
+from scraper import PAYLOAD_SOURCE_FIELDS, PropertyMapper  # noqa: E402
+
+
+def best_time(func, items, repeat):
+    """Return the best wall time, in seconds, of calling func on every item"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--properties', type=int, default=1000, help='Synthetic properties to map')
+    parser.add_argument('--photos', type=int, default=20, help='Photos per property')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best one is reported')
+    args = parser.parse_args()
+
+    # Mapping logs per datetime; keep the measurement about mapping
+    logging.disable(logging.INFO)
+
+    properties = make_properties(args.properties, args.photos)
+    dumped = [property_model.model_dump(include=PAYLOAD_SOURCE_FIELDS) for property_model in properties]
+
+    mapper = PropertyMapper()
+    converter = mapper.listing_converter
+
+    results = [
+        ('listing_converter', best_time(converter, dumped, args.repeat)),
+        ('map_property_to_odoo', best_time(mapper.map_property_to_odoo, dumped, args.repeat)),
+        ('model_dump', best_time(lambda p: p.model_dump(include=PAYLOAD_SOURCE_FIELDS), properties, args.repeat)),
+        ('build_listing_payload', best_time(mapper.build_listing_payload, properties, args.repeat)),
+    ]
+
+    print(f"{args.properties} properties, {args.photos} photos each, best of {args.repeat}")
+    print(f"{'stage':<24}{'us/property':>14}{'properties/s':>16}")
+    for name, elapsed in results:
+        print(f"{name:<24}{elapsed / args.properties * 1e6:>14.1f}{args.properties / elapsed:>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+In-memory stand-in for Odoo's JSON-2 API, for the scraper benchmarks
+
+Serves POST /json/2/<model>/<method> for the calls the scraper makes
+(res.users/context_get, search, search_read, read, create, write, unlink,
+fields_get, real_estate.listing/upsert_scraped_listing, scraper_sync_spec and mark_scraped) over keep-alive
+HTTP/1.1, with a configurable latency added to every call. Records live in
+dictionaries; upsert_scraped_listing resolves identities, tags, schools and
+child collections the way the addon does, so the scraper sends the same
+requests it sends to a real Odoo.
+"""
+import collections
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# Identity fields recognizing an existing listing, like the addon's _SCRAPER_IDENTITY_KEYS
+IDENTITY_KEYS = (('property_id',), ('mls', 'mls_id'), ('url',), ('address',))
+
+# Child collections of an upsert payload, like the addon's _SCRAPER_CHILD_COLLECTIONS:
+# section -> (model, one2many field of the listing, fields identifying a row within the listing)
+UPSERT_CHILDREN = {
+    'photos': ('real_estate.photo', 'photo_ids', ('preview_href',)),
+    'popularity': ('real_estate.popularity', 'popularity_ids', ('last_n_days',)),
+    'features': ('real_estate.feature', 'feature_ids', ('parent_category', 'category')),
+    'estimates': ('real_estate.estimate', 'estimate_ids', ('date', 'source_name', 'source_type')),
+    'tax_history': ('real_estate.tax_history', 'tax_history_ids', ('year',)),
+}
+
+# One2many fields of real_estate.listing: field -> (child model, inverse field)
+LISTING_CHILDREN = {field: (model, 'property_id') for model, field, _ in UPSERT_CHILDREN.values()}
+
+# Types fields_get reports; other fields are reported as char
+FIELD_TYPES = dict(
+    {name: 'one2many' for name in LISTING_CHILDREN},
+    listing_tag_ids='many2many',
+    nearby_school_ids='many2many',
+    tag_ids='many2many',
+    property_id='many2one',
+)
+
+
+class FakeOdooError(Exception):
+    """Raised for calls the stand-in does not support; answered with HTTP 422"""
+
+
+class FakeOdoo:
+    """
+    Records and methods of the stand-in, shared by all request threads behind a lock
+
+    Args:
+        latency: Seconds added to every call, to simulate the network and Odoo's own work
+        server_upsert: Serve upsert_scraped_listing and scraper_sync_spec; False answers them
+                       with 404, like an addon without the methods, so the scraper syncs
+                       collections itself with its built-in spec
+    """
+
+    def __init__(self, latency: float = 0.0, server_upsert: bool = True):
+        self.latency = latency
+        self.server_upsert = server_upsert
+
+        self.tables = collections.defaultdict(dict)
+        self.calls = collections.Counter()
+
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of records per model"""
+        with self._lock:
+            return {model: len(records) for model, records in self.tables.items()}
+
+    def call(self, model: str, method: str, kwargs: Dict[str, Any]) -> Any:
+        """
+        Run one JSON-2 call
+
+        Raises:
+            KeyError: For methods the stand-in does not serve (answered with 404)
+            FakeOdooError: For arguments it does not support
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.calls[(model, method)] += 1
+
+            if method == 'context_get':
+                return {'lang': 'en_US', 'tz': 'UTC'}
+            if method == 'fields_get':
+                return {name: {'type': field_type} for name, field_type in FIELD_TYPES.items()}
+            if method == 'search':
+                return self.search(model, kwargs.get('domain'), kwargs.get('limit'))
+            if method == 'search_read':
+                ids = self.search(model, kwargs.get('domain'), kwargs.get('limit'))
+                return self.read(model, ids, kwargs.get('fields'))
+            if method == 'read':
+                return self.read(model, kwargs['ids'], kwargs.get('fields'))
+            if method == 'create':
+                return [self.create(model, vals) for vals in kwargs['vals_list']]
+            if method == 'write':
+                for record_id in kwargs['ids']:
+                    self.write(model, record_id, kwargs['vals'])
+                return True
+            if method == 'unlink':
+                for record_id in kwargs['ids']:
+                    self.tables[model].pop(record_id, None)
+                return True
+            if method == 'upsert_scraped_listing' and model == 'real_estate.listing' and self.server_upsert:
+                return self.upsert_scraped_listing(kwargs['payload'])
+            if method == 'scraper_sync_spec' and model == 'real_estate.listing' and self.server_upsert:
+                return self.scraper_sync_spec()
+            if method == 'mark_scraped' and model == 'real_estate.listing':
+                for record_id in kwargs['ids']:
+                    if record_id in self.tables[model]:
+                        self.tables[model][record_id]['last_scraped_at'] = time.time()
+                return True
+
+        raise KeyError(f'{model}/{method}')
+
+    def matches(self, record: Dict[str, Any], domain: List[Any]) -> bool:
+        """Evaluate a domain of (field, '=' or 'in', value) leaves, all of which must match"""
+        for leaf in domain:
+            field_name, operator, value = leaf
+            if operator == '=':
+                if record.get(field_name) != value:
+                    return False
+            elif operator == 'in':
+                if record.get(field_name) not in value:
+                    return False
+            else:
+                raise FakeOdooError(f"Unsupported domain operator {operator!r}")
+        return True
+
+    def search(self, model: str, domain: Optional[List[Any]], limit: Optional[int] = None) -> List[int]:
+        ids = [record_id for record_id, record in self.tables[model].items() if self.matches(record, domain or [])]
+        return ids[:limit] if limit else ids
+
+    def read(self, model: str, ids: List[int], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        records = self.tables[model]
+        return [
+            {name: records[record_id].get(name, False) for name in fields or records[record_id]} | {'id': record_id}
+            for record_id in ids if record_id in records
+        ]
+
+    def create(self, model: str, vals: Dict[str, Any]) -> int:
+        record_id = next(self._ids)
+        self.tables[model][record_id] = {'id': record_id}
+        self.write(model, record_id, vals)
+        return record_id
+
+    def write(self, model: str, record_id: int, vals: Dict[str, Any]) -> None:
+        """Write values, applying x2many commands"""
+        record = self.tables[model][record_id]
+
+        for name, value in vals.items():
+            if model == 'real_estate.listing' and name in LISTING_CHILDREN:
+                child_model, inverse = LISTING_CHILDREN[name]
+                for command, child_id, child_vals in value:
+                    if command == 0:
+                        self.create(child_model, dict(child_vals, **{inverse: record_id}))
+                    elif command == 1:
+                        self.write(child_model, child_id, child_vals)
+                    elif command == 2:
+                        self.tables[child_model].pop(child_id, None)
+            elif FIELD_TYPES.get(name) == 'many2many':
+                ids = set(record.get(name) or [])
+                for command in value:
+                    if command[0] == 6:
+                        ids = set(command[2])
+                    elif command[0] == 4:
+                        ids.add(command[1])
+                    elif command[0] == 3:
+                        ids.discard(command[1])
+                    elif command[0] == 5:
+                        ids.clear()
+                record[name] = sorted(ids)
+            else:
+                record[name] = value
+
+    def resolve_names(self, model: str, field_name: str, names: List[str], new_values=None) -> List[int]:
+        """Return the ids of the records named names, creating the missing ones"""
+        names = list(dict.fromkeys(name for name in names if name))
+        existing = {record[field_name]: record_id for record_id, record in self.tables[model].items()
+                    if record.get(field_name) in names}
+
+        return [
+            existing.get(name) or self.create(model, dict({field_name: name}, **(new_values(name) if new_values else {})))
+            for name in names
+        ]
+
+    def upsert_scraped_listing(self, payload: Dict[str, Any]) -> int:
+        """Create or update a listing and its child collections, like the addon's method"""
+        vals = dict(payload.get('listing') or {})
+        listings = self.tables['real_estate.listing']
+
+        listing_id = payload.get('record_id') if payload.get('record_id') in listings else None
+        if listing_id is None:
+            for field_names in IDENTITY_KEYS:
+                if all(vals.get(field_name) for field_name in field_names):
+                    found = self.search(
+                        'real_estate.listing', [[field_name, '=', vals[field_name]] for field_name in field_names], 1)
+                    if found:
+                        listing_id = found[0]
+                        break
+
+        if payload.get('tags'):
+            vals['listing_tag_ids'] = [[6, 0, self.resolve_names(
+                'real_estate.tag', 'api_name', payload['tags'],
+                lambda name: {'name': ' '.join(word.capitalize() for word in name.split('_')), 'tag_type': 'listing'}
+            )]]
+        if payload.get('schools'):
+            vals['nearby_school_ids'] = [[6, 0, self.resolve_names('real_estate.school', 'name', payload['schools'])]]
+
+        if listing_id is None:
+            listing_id = self.create('real_estate.listing', vals)
+        else:
+            self.write('real_estate.listing', listing_id, vals)
+
+        for section, (model, _, key_fields) in UPSERT_CHILDREN.items():
+            rows = payload.get(section)
+            if rows:
+                self.sync_children(listing_id, model, key_fields, rows)
+
+        return listing_id
+
+    def scraper_sync_spec(self) -> Dict[str, Any]:
+        """Identity keys and child collections, in the addon's format"""
+        return {
+            'identity_keys': [list(field_names) for field_names in IDENTITY_KEYS],
+            'child_collections': {
+                section: {'model': model, 'field': field, 'key_fields': list(key_fields)}
+                for section, (model, field, key_fields) in UPSERT_CHILDREN.items()
+            },
+        }
+
+    def sync_children(self, listing_id: int, model: str, key_fields: tuple, rows: List[Dict[str, Any]]) -> None:
+        """Make a child collection match the rows: create new rows, write changed ones, unlink the rest"""
+        def row_key(values):
+            return tuple(str(values.get(name) or '') for name in key_fields)
+
+        children = self.tables[model]
+        existing = {row_key(child): child_id for child_id, child in children.items()
+                    if child.get('property_id') == listing_id}
+
+        kept = set()
+        for row in rows:
+            row = dict(row)
+            labels = row.pop('tags', None)
+            if labels is not None:
+                row['tag_ids'] = [[6, 0, self.resolve_names('real_estate.photo.tag', 'name', labels)]]
+
+            child_id = existing.get(row_key(row))
+            if child_id is None:
+                child_id = self.create(model, dict(row, property_id=listing_id))
+            elif any(children[child_id].get(name) != value for name, value in row.items() if name != 'tag_ids'):
+                self.write(model, child_id, row)
+            kept.add(child_id)
+
+        for child_id in set(existing.values()) - kept:
+            children.pop(child_id, None)
+
+
+def start_fake_odoo(odoo: Optional[FakeOdoo] = None) -> ThreadingHTTPServer:
+    """
+    Serve a FakeOdoo on a free local port, in a daemon thread
+
+    Args:
+        odoo: Stand-in to serve (a new one without latency by default)
+
+    Returns:
+        The running server; its URL is f"http://127.0.0.1:{server.server_port}" and
+        the stand-in is server.odoo. Stop it with server.shutdown()
+    """
+    odoo = odoo or FakeOdoo()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are separate writes; without TCP_NODELAY every response waits for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            kwargs = json.loads(self.rfile.read(length) or b'{}')
+
+            parts = self.path.strip('/').split('/')
+            if len(parts) != 4 or parts[:2] != ['json', '2']:
+                self.respond(404, {'name': 'werkzeug.exceptions.NotFound', 'message': self.path})
+                return
+
+            try:
+                self.respond(200, odoo.call(parts[2], parts[3], kwargs))
+            except KeyError as e:
+                self.respond(404, {'name': 'werkzeug.exceptions.NotFound', 'message': str(e)})
+            except (FakeOdooError, TypeError, ValueError) as e:
+                self.respond(422, {'name': 'odoo.exceptions.ValidationError', 'message': str(e)})
+
+        def respond(self, status: int, result: Any):
+            body = json.dumps(result).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.odoo = odoo
+    threading.Thread(target=server.serve_forever, name='fake-odoo', daemon=True).start()
+    return server
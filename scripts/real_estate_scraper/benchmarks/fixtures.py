@@ -0,0 +1,178 @@
+"""
+HomeHarvest properties for the scraper benchmarks
+
+Synthetic properties are shaped like realtor.com results (nested address,
+description, advertisers, photos, tax history, ...) so mapping and syncing do the
+same work they do on scraped data, without network access. Real searches can be
+recorded to a fixture file once and replayed from it:
+
+    python benchmarks/fixtures.py record "Austin, TX" austin.json.gz --limit 2000
+    python benchmarks/fixtures.py synthetic 10000 large.json.gz
+"""
+import argparse
+import gzip
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from homeharvest.core.scrapers.models import Property
+
+# Sizes of the synthetic fixtures the benchmarks accept by name
+FIXTURE_SIZES = {'small': 50, 'medium': 1000, 'large': 10000}
+
+STYLES = ('SINGLE_FAMILY', 'CONDOS', 'TOWNHOMES', 'MULTI_FAMILY', 'LAND')
+PHOTO_TAGS = ('kitchen', 'living_room', 'bedroom', 'bathroom', 'exterior', 'garage')
+
+
+def make_property(i: int, photos: int = 20, price_offset: int = 0) -> Property:
+    """
+    Build the i-th synthetic property
+
+    Args:
+        i: Property number; the same number always gives the same property
+        photos: Number of photos (and alt photos)
+        price_offset: Added to the list price, to simulate a changed listing
+
+    Returns:
+        HomeHarvest Property model
+    """
+    listed = datetime(2025, 1, 1) + timedelta(days=i % 365)
+
+    return Property.model_validate({
+        'property_url': f'https://www.realtor.com/realestateandhomes-detail/{i}',
+        'property_id': f'{9000000 + i}',
+        'listing_id': f'{8000000 + i}',
+        'mls': 'TXAUS',
+        'mls_id': f'A{i:07d}',
+        'mls_status': 'Active',
+        'status': 'FOR_SALE',
+        'address': {
+            'full_line': f'{i} Main St',
+            'street': f'{i} Main St',
+            'street_number': str(i),
+            'street_name': 'Main',
+            'street_suffix': 'St',
+            'city': 'Austin',
+            'state': 'TX',
+            'zip': f'787{i % 100:02d}',
+        },
+        'list_price': 400000 + 1000 * (i % 500) + price_offset,
+        'list_date': listed,
+        'days_on_mls': i % 120,
+        'hoa_fee': 50 * (i % 5),
+        'latitude': 30.2 + (i % 1000) / 10000,
+        'longitude': -97.7 - (i % 1000) / 10000,
+        'county': 'Travis',
+        'fips_code': '48453',
+        'neighborhoods': 'Downtown',
+        'description': {
+            'style': STYLES[i % len(STYLES)],
+            'beds': 1 + i % 5,
+            'baths_full': 1 + i % 3,
+            'baths_half': i % 2,
+            'sqft': 900 + 10 * (i % 300),
+            'lot_sqft': 4000 + 10 * (i % 500),
+            'year_built': 1950 + i % 75,
+            'stories': 1 + i % 3,
+            'garage': i % 3,
+            'text': f'Bright home number {i} close to downtown. ' * 5,
+            'name': f'Home {i}',
+            'alt_photos': [f'https://ap.rdcpix.com/{i}/{k}-w1024.jpg' for k in range(photos)],
+        },
+        'tags': ['central_air', 'community_gym', 'garage_1_or_more', f'view_{i % 4}'],
+        'nearby_schools': ['Lincoln Elementary', 'Central High', f'School {i % 20}'],
+        'details': [
+            {'category': f'Category {k}', 'parent_category': 'Interior' if k % 2 else 'Exterior',
+             'text': [f'Item {k}.{n}' for n in range(4)]}
+            for k in range(10)
+        ],
+        'tax_history': [
+            {'year': 2020 + k, 'tax': 5000 + 100 * k, 'assessed_year': 2020 + k,
+             'assessment': {'total': 350000 + k, 'building': 250000, 'land': 100000 + k},
+             'value': {'total': 350000 + k}}
+            for k in range(5)
+        ],
+        'popularity': {'periods': [
+            {'last_n_days': days, 'views_total': 10 * days + i % 50, 'clicks_total': days, 'saves_total': i % 7}
+            for days in (7, 30)
+        ]},
+        'estimates': {'current_values': [
+            {'estimate': 410000 + i, 'estimate_high': 430000 + i, 'estimate_low': 390000 + i,
+             'date': datetime(2025, 6, 1), 'is_best_home_value': True,
+             'source': {'name': 'CoreLogic', 'type': 'corelogic'}},
+        ]},
+        'photos': [
+            {'href': f'https://ap.rdcpix.com/{i}/{k}-w1024.jpg',
+             'tags': [{'label': PHOTO_TAGS[(i + k) % len(PHOTO_TAGS)], 'probability': 0.9}]}
+            for k in range(photos)
+        ],
+        'advertisers': {
+            'agent': {'name': f'Agent {i % 40}', 'email': f'agent{i % 40}@example.com',
+                      'phones': [{'number': '512-555-0100', 'type': 'Mobile', 'primary': True}]},
+            'broker': {'name': 'Example Realty', 'uuid': 'broker-1'},
+            'office': {'name': 'Example Realty Austin', 'email': 'office@example.com',
+                       'phones': [{'number': '512-555-0199', 'type': 'Office'}]},
+        },
+        'open_houses': [
+            {'start_date': listed + timedelta(days=3), 'end_date': listed + timedelta(days=3, hours=2),
+             'description': 'Open house', 'href': f'https://www.realtor.com/openhouse/{i}'},
+        ] if i % 4 == 0 else None,
+        'flags': {'is_new_listing': i % 3 == 0, 'is_price_reduced': i % 5 == 0},
+        'tax_record': {'apn': f'APN{i}', 'public_record_id': f'PR{i}',
+                       'last_update_date': datetime(2025, 3, 1)},
+    })
+
+
+def make_properties(count: int, photos: int = 20, start: int = 0):
+    """Build count synthetic properties numbered from start"""
+    return [make_property(i, photos) for i in range(start, start + count)]
+
+
+def save_fixture(path: str, properties: List[Property]) -> None:
+    """Write properties to a gzipped JSON fixture file"""
+    with gzip.open(path, 'wt', encoding='utf-8') as fixture:
+        json.dump([property_model.model_dump(mode='json') for property_model in properties], fixture)
+
+
+def load_fixture(path: str) -> List[dict]:
+    """
+    Read a fixture file written by save_fixture
+
+    Returns:
+        List of dumped properties; Property.model_validate turns one back into a model
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as fixture:
+        return json.load(fixture)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write HomeHarvest fixture files for the benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Record a live HomeHarvest search')
+    record.add_argument('location')
+    record.add_argument('path')
+    record.add_argument('--listing-type', default='for_sale')
+    record.add_argument('--limit', type=int, default=1000)
+
+    synthetic = commands.add_parser('synthetic', help='Write synthetic properties')
+    synthetic.add_argument('count', type=int)
+    synthetic.add_argument('path')
+    synthetic.add_argument('--photos', type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        from homeharvest import scrape_property
+
+        properties = scrape_property(location=args.location, listing_type=args.listing_type,
+                                     limit=args.limit, return_type='pydantic')
+    else:
+        properties = make_properties(args.count, args.photos)
+
+    save_fixture(args.path, properties)
+    print(f"Wrote {len(properties)} properties to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
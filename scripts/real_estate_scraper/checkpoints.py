@@ -0,0 +1,219 @@
+"""
+Resumable ingestion of search results
+
+A search too large to write in one go is checkpointed in a local SQLite file,
+keyed by its normalized parameters (see scrape_cache.query_key). The checkpoint
+holds the raw results of every page fetched but not yet completely written, the
+index of the next page to fetch and the property_id -> Odoo id of every listing
+written. When a message fails part-way, a redelivered or resubmitted message for
+the same search writes the stored pages first, skipping the listings already
+written, and then fetches from the next page on. Checkpoints are removed once a
+search is fully written, and expire after a TTL.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Tuple
+
+from homeharvest.core.scrapers.models import Property
+
+logger = logging.getLogger(__name__)
+
+
+class IngestInterruptedError(Exception):
+    """Raised when a checkpointed search failed after writing part of it; the message should be retried"""
+
+
+class Checkpoint:
+    """Progress of one search, as loaded when its message is handled"""
+
+    def __init__(self, key: str, next_page: int, fetched_all: bool, written: Dict[str, int]):
+        self.key = key
+        self.next_page = next_page
+        self.fetched_all = fetched_all
+        self.written = written
+
+        # Whether an earlier attempt made progress on the search
+        self.resumed = bool(next_page or written)
+
+        # Pages fetched or completely written by the current attempt
+        self.progress = 0
+
+
+class CheckpointStore:
+    """
+    SQLite-backed checkpoints of search ingestion
+
+    One connection is shared by all threads of the scraper behind a lock.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            ' key TEXT PRIMARY KEY,'
+            ' created_at REAL NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' next_page INTEGER NOT NULL,'
+            ' fetched_all INTEGER NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoint_pages ('
+            ' key TEXT NOT NULL,'
+            ' page INTEGER NOT NULL,'
+            ' data BLOB NOT NULL,'
+            ' PRIMARY KEY (key, page))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoint_listings ('
+            ' key TEXT NOT NULL,'
+            ' property_id TEXT NOT NULL,'
+            ' record_id INTEGER NOT NULL,'
+            ' PRIMARY KEY (key, property_id))'
+        )
+        self._db.commit()
+
+        logger.info(f"Using ingestion checkpoints at {path} (ttl {ttl}s)")
+
+    def _delete(self, keys: List[str]) -> None:
+        for table in ('checkpoints', 'checkpoint_pages', 'checkpoint_listings'):
+            self._db.executemany(f'DELETE FROM {table} WHERE key = ?', [(key,) for key in keys])
+
+    def open(self, key: str) -> Checkpoint:
+        """
+        Load the checkpoint of a search, starting a new one if there is none
+
+        Expired checkpoints (of any search) are dropped first.
+
+        Args:
+            key: Result of query_key
+
+        Returns:
+            Checkpoint of the search
+        """
+        now = time.time()
+
+        with self._lock:
+            expired = [row[0] for row in self._db.execute(
+                'SELECT key FROM checkpoints WHERE updated_at <= ?', (now - self.ttl,)
+            ).fetchall()]
+            if expired:
+                self._delete(expired)
+                logger.info(f"Dropped {len(expired)} expired ingestion checkpoints")
+
+            row = self._db.execute(
+                'SELECT next_page, fetched_all FROM checkpoints WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self._db.execute(
+                    'INSERT INTO checkpoints (key, created_at, updated_at, next_page, fetched_all) '
+                    'VALUES (?, ?, ?, 0, 0)', (key, now, now)
+                )
+                self._db.commit()
+                return Checkpoint(key, 0, False, {})
+
+            self._db.commit()
+            written = dict(self._db.execute(
+                'SELECT property_id, record_id FROM checkpoint_listings WHERE key = ?', (key,)
+            ).fetchall())
+
+        return Checkpoint(key, row[0], bool(row[1]), written)
+
+    def pages(self, checkpoint: Checkpoint) -> Iterator[Tuple[int, List[Property]]]:
+        """
+        Yield the pages fetched by an earlier attempt but not completely written, in order
+
+        Returns:
+            Iterator of (page index, list of Property models)
+        """
+        with self._lock:
+            indexes = [row[0] for row in self._db.execute(
+                'SELECT page FROM checkpoint_pages WHERE key = ? ORDER BY page', (checkpoint.key,)
+            ).fetchall()]
+
+        # One page at a time, so resuming holds no more than streaming does
+        for index in indexes:
+            with self._lock:
+                row = self._db.execute(
+                    'SELECT data FROM checkpoint_pages WHERE key = ? AND page = ?', (checkpoint.key, index)
+                ).fetchone()
+
+            if row is not None:
+                yield index, [Property.model_validate(item) for item in json.loads(zlib.decompress(row[0]))]
+
+    def save_page(self, checkpoint: Checkpoint, index: int, properties: List[Property]) -> None:
+        """Store a fetched page until it is completely written"""
+        data = zlib.compress(json.dumps(
+            [property_model.model_dump(mode='json') for property_model in properties],
+            separators=(',', ':')
+        ).encode())
+
+        checkpoint.next_page = max(checkpoint.next_page, index + 1)
+        checkpoint.progress += 1
+
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO checkpoint_pages (key, page, data) VALUES (?, ?, ?)',
+                (checkpoint.key, index, data)
+            )
+            self._db.execute(
+                'UPDATE checkpoints SET next_page = ?, updated_at = ? WHERE key = ?',
+                (checkpoint.next_page, time.time(), checkpoint.key)
+            )
+            self._db.commit()
+
+    def fetched_all(self, checkpoint: Checkpoint) -> None:
+        """Record that every page of the search has been fetched"""
+        checkpoint.fetched_all = True
+
+        with self._lock:
+            self._db.execute(
+                'UPDATE checkpoints SET fetched_all = 1, updated_at = ? WHERE key = ?',
+                (time.time(), checkpoint.key)
+            )
+            self._db.commit()
+
+    def page_written(self, checkpoint: Checkpoint, index: int, written: Dict[str, int]) -> None:
+        """
+        Record the listings written from a page and drop its stored results
+
+        Args:
+            checkpoint: Checkpoint of the search
+            index: Page index
+            written: HomeHarvest property_id -> Odoo id of the page's listings
+        """
+        checkpoint.written.update(written)
+        checkpoint.progress += 1
+
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO checkpoint_listings (key, property_id, record_id) VALUES (?, ?, ?)',
+                [(checkpoint.key, property_id, record_id) for property_id, record_id in written.items()]
+            )
+            self._db.execute('DELETE FROM checkpoint_pages WHERE key = ? AND page = ?', (checkpoint.key, index))
+            self._db.execute('UPDATE checkpoints SET updated_at = ? WHERE key = ?', (time.time(), checkpoint.key))
+            self._db.commit()
+
+    def finish(self, checkpoint: Checkpoint) -> None:
+        """Forget a search that was completely written"""
+        with self._lock:
+            self._delete([checkpoint.key])
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
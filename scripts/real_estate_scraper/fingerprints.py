@@ -0,0 +1,122 @@
+"""
+Content fingerprints of scraped listings
+
+A fingerprint is a SHA-256 of each section of a mapped listing payload. The last
+fingerprint written to Odoo is kept per HomeHarvest property_id in a local SQLite
+file, so the next scrape can skip every section (or the whole listing) that did
+not change upstream.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Payload sections fingerprinted separately; 'listing' covers the listing values, tags and schools
+FINGERPRINT_SECTIONS = ('listing', 'photos', 'popularity', 'features', 'estimates', 'tax_history')
+
+
+def payload_fingerprint(payload: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Hash every section of an upsert payload
+
+    Args:
+        payload: Mapped property from PropertyMapper.build_listing_payload
+
+    Returns:
+        Dictionary of section -> hex digest, plus 'overall' over all sections
+    """
+    sections = {
+        'listing': {
+            'listing': payload.get('listing'),
+            'tags': sorted(payload.get('tags') or []),
+            'schools': sorted(payload.get('schools') or []),
+        },
+    }
+    for section in FINGERPRINT_SECTIONS[1:]:
+        sections[section] = payload.get(section)
+
+    fingerprint = {
+        section: hashlib.sha256(
+            json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()
+        ).hexdigest()
+        for section, value in sections.items()
+    }
+    fingerprint['overall'] = hashlib.sha256(
+        ''.join(fingerprint[section] for section in FINGERPRINT_SECTIONS).encode()
+    ).hexdigest()
+
+    return fingerprint
+
+
+class FingerprintStore:
+    """
+    SQLite-backed map of property_id -> (Odoo record id, section fingerprints)
+
+    One connection is shared by all threads of the scraper behind a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            ' property_id TEXT PRIMARY KEY,'
+            ' record_id INTEGER NOT NULL,'
+            ' sections TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._db.commit()
+
+        logger.info(f"Using fingerprint store at {path}")
+
+    def get(self, property_id: str) -> Optional[tuple]:
+        """
+        Return the last written fingerprint of a property
+
+        Args:
+            property_id: HomeHarvest property id
+
+        Returns:
+            Tuple of (Odoo record id, section fingerprints), or None if unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT record_id, sections FROM fingerprints WHERE property_id = ?', (property_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, property_id: str, record_id: int, fingerprint: Dict[str, str]) -> None:
+        """Remember the fingerprint written to an Odoo listing"""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO fingerprints (property_id, record_id, sections, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                (property_id, record_id, json.dumps(fingerprint), time.time())
+            )
+            self._db.commit()
+
+    def discard(self, property_id: str) -> None:
+        """Forget a property, so its next scrape is written in full"""
+        with self._lock:
+            self._db.execute('DELETE FROM fingerprints WHERE property_id = ?', (property_id,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,203 @@
+"""
+Page-at-a-time HomeHarvest searches
+
+homeharvest.scrape_property fetches every 200-property page of a search before it
+returns anything. iter_property_pages() runs the same search through HomeHarvest's
+RealtorScraper (homeharvest is pinned in requirements.txt) but yields each page as
+soon as it is fetched, with a bounded number of later pages fetched meanwhile, so
+callers can write the first pages while the rest of the search is still running.
+"""
+import inspect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List
+
+import homeharvest
+from homeharvest.core.scrapers import ScraperInput
+from homeharvest.core.scrapers.models import ListingType, ReturnType, SearchPropertyType
+from homeharvest.core.scrapers.realtor import RealtorScraper
+from homeharvest.utils import (
+    validate_dates,
+    validate_datetime,
+    validate_filters,
+    validate_input,
+    validate_limit,
+    validate_sort,
+)
+
+# Parameters of homeharvest.scrape_property, with their defaults
+SCRAPE_PROPERTY_PARAMETERS = inspect.signature(homeharvest.scrape_property).parameters
+
+# Range filters, in the order validate_filters takes them
+FILTER_PARAMETERS = (
+    'beds_min', 'beds_max', 'baths_min', 'baths_max', 'sqft_min', 'sqft_max',
+    'price_min', 'price_max', 'lot_sqft_min', 'lot_sqft_max', 'year_built_min', 'year_built_max',
+)
+
+
+def build_scraper_input(location: str, listing_type: str = 'for_sale', **kwargs) -> ScraperInput:
+    """
+    Validate scrape_property arguments and convert them to a ScraperInput, the way
+    homeharvest.scrape_property does
+
+    Args:
+        location: Location to search for properties
+        listing_type: Type of listing (for_sale, for_rent, sold, pending)
+        **kwargs: Other homeharvest.scrape_property arguments
+
+    Returns:
+        ScraperInput for RealtorScraper
+
+    Raises:
+        TypeError: For arguments scrape_property does not take
+    """
+    unknown = set(kwargs) - set(SCRAPE_PROPERTY_PARAMETERS)
+    if unknown:
+        raise TypeError(f"scrape_property() got unexpected keyword arguments: {', '.join(sorted(unknown))}")
+
+    options = {
+        name: parameter.default for name, parameter in SCRAPE_PROPERTY_PARAMETERS.items()
+        if name not in ('location', 'listing_type')
+    }
+    options.update(kwargs)
+
+    validate_input(listing_type)
+    validate_dates(options['date_from'], options['date_to'])
+    validate_limit(options['limit'])
+    validate_datetime(options['datetime_from'])
+    validate_datetime(options['datetime_to'])
+    validate_filters(*(options[name] for name in FILTER_PARAMETERS))
+    validate_sort(options['sort_by'], options['sort_direction'])
+
+    property_type = options.pop('property_type')
+    return_type = options.pop('return_type')
+    past_days = options.pop('past_days')
+
+    return ScraperInput(
+        location=location,
+        listing_type=ListingType(listing_type.upper()),
+        return_type=ReturnType(return_type.lower()),
+        property_type=[SearchPropertyType[prop.upper()] for prop in property_type] if property_type else None,
+        last_x_days=past_days,
+        **options
+    )
+
+
+class PagedRealtorScraper(RealtorScraper):
+    """RealtorScraper whose search yields page by page instead of returning every page at once"""
+
+    def filter_page(self, homes: List[Any]) -> List[Any]:
+        """Apply the client-side filters RealtorScraper.search applies to the whole result"""
+        homes = [home for home in homes if home]
+
+        # The API only filters by day, so hours are filtered here
+        if self.past_hours or self.datetime_from or self.datetime_to:
+            return self._apply_hour_based_date_filter(homes)
+        # Server-side pending date filters are broken in the API
+        if self.listing_type == ListingType.PENDING and (self.last_x_days or self.date_from):
+            return self._apply_pending_date_filter(homes)
+        return homes
+
+    def iter_pages(self, prefetch: int = 2, start_page: int = 0) -> Iterator[List[Any]]:
+        """
+        Run the search of RealtorScraper.search, yielding each page of properties in
+        order as soon as it is fetched
+
+        Args:
+            prefetch: Pages fetched ahead of the page being consumed
+            start_page: Index of the first page to fetch, to resume an earlier search
+
+        Returns:
+            Iterator of lists of properties (at most DEFAULT_PAGE_SIZE each)
+        """
+        location_info = self.handle_location()
+        if not location_info:
+            return
+
+        location_type = location_info["area_type"]
+        search_variables = {
+            "offset": start_page * self.DEFAULT_PAGE_SIZE,
+        }
+
+        search_type = (
+            "comps"
+            if self.radius and location_type == "address"
+            else "address" if location_type == "address" and not self.radius else "area"
+        )
+        if location_type == "address":
+            if not self.radius:  #: single address search, non comps
+                if start_page:
+                    return
+                yield self.filter_page(self.handle_home(location_info["mpr_id"]))
+                return
+
+            if not location_info.get("centroid"):
+                return
+
+            search_variables |= {
+                "coordinates": list(location_info["centroid"].values()),
+                "radius": "{}mi".format(self.radius),
+            }
+        elif location_type == "postal_code":
+            search_variables |= {
+                "postal_code": location_info.get("postal_code"),
+            }
+        else:  #: general search, location
+            search_variables |= {
+                "city": location_info.get("city"),
+                "county": location_info.get("county"),
+                "state_code": location_info.get("state_code"),
+                "postal_code": location_info.get("postal_code"),
+            }
+
+        if self.foreclosure:
+            search_variables["foreclosure"] = self.foreclosure
+
+        first_page = self.general_search(search_variables, search_type=search_type)
+        offsets = deque(range(
+            search_variables["offset"] + self.DEFAULT_PAGE_SIZE, min(first_page["total"], self.limit),
+            self.DEFAULT_PAGE_SIZE
+        ))
+
+        with ThreadPoolExecutor(max_workers=max(1, prefetch)) as executor:
+            fetching = deque()
+
+            def fetch_ahead():
+                while offsets and len(fetching) < max(1, prefetch):
+                    fetching.append(executor.submit(
+                        self.general_search,
+                        variables=search_variables | {"offset": offsets.popleft()},
+                        search_type=search_type,
+                    ))
+
+            # Later pages are fetched while the caller handles the first one
+            fetch_ahead()
+            yield self.filter_page(first_page["properties"])
+            del first_page
+
+            while fetching:
+                page = fetching.popleft().result()["properties"]
+                fetch_ahead()
+                yield self.filter_page(page)
+
+
+def iter_property_pages(location: str, listing_type: str = 'for_sale', prefetch: int = 2, start_page: int = 0,
+                        **kwargs) -> Iterator[List[Any]]:
+    """
+    Search HomeHarvest like homeharvest.scrape_property, yielding the results page by page
+
+    Args:
+        location: Location to search for properties
+        listing_type: Type of listing (for_sale, for_rent, sold, pending)
+        prefetch: Pages fetched ahead of the page being consumed
+        start_page: Index of the first page to fetch, to resume an earlier search
+        **kwargs: Other homeharvest.scrape_property arguments (return_type 'pandas' is not supported)
+
+    Returns:
+        Iterator of lists of Property models (or raw dictionaries with return_type='raw')
+    """
+    kwargs.setdefault('return_type', 'pydantic')
+    if kwargs['return_type'] == 'pandas':
+        raise ValueError("Paged searches return pydantic or raw properties, not pandas")
+
+    yield from PagedRealtorScraper(build_scraper_input(location, listing_type, **kwargs)).iter_pages(prefetch, start_page)
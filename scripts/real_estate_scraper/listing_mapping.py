@@ -0,0 +1,202 @@
+"""
+Declarative mapping of a dumped HomeHarvest property to real_estate.listing values
+
+LISTING_FIELDS lists every mapped listing field with the path of its source value
+and the name of its coercer. compile_listing_mapping() turns the spec into a single
+converter once, so mapping a property is a flat loop over prepared lookups instead
+of building, re-converting and trial-serializing a dictionary per property.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+# (Odoo field, path of the source value in the dumped property, coercer)
+LISTING_FIELDS: Tuple[Tuple[str, Tuple[str, ...], str], ...] = (
+    # Basic Information (property_id, mls, url and address come from PropertyMapper.map_identity)
+    ('mls_id', ('mls_id',), 'text'),
+    ('mls_status_raw', ('mls_status',), 'text'),
+
+    # Address Components
+    ('street', ('address', 'street'), 'text'),
+    ('street_number', ('address', 'street_number'), 'text'),
+    ('street_direction', ('address', 'street_direction'), 'text'),
+    ('street_name', ('address', 'street_name'), 'text'),
+    ('street_suffix', ('address', 'street_suffix'), 'text'),
+    ('address_full_line', ('address', 'full_line'), 'text'),
+    ('unit', ('address', 'unit'), 'text'),
+    ('city', ('address', 'city'), 'text'),
+    ('state', ('address', 'state'), 'text'),
+    ('zip_code', ('address', 'zip'), 'text'),
+    ('county', ('county',), 'text'),
+    ('neighborhoods', ('neighborhoods',), 'json'),
+
+    # Location Information
+    ('latitude', ('latitude',), 'float'),
+    ('longitude', ('longitude',), 'float'),
+    ('fips_code', ('fips_code',), 'text'),
+    ('parcel_number', ('parcel_number',), 'text'),
+
+    # Price Information (price_per_sqft is computed in Odoo; estimated_value is related to best estimate)
+    ('price', ('list_price',), 'float'),
+    ('list_price_min', ('list_price_min',), 'float'),
+    ('list_price_max', ('list_price_max',), 'float'),
+    ('sold_price', ('sold_price',), 'float'),
+    ('last_sold_price', ('last_sold_price',), 'float'),
+    ('estimated_monthly_rental', ('estimated_monthly_rental',), 'float'),
+
+    # Property Description
+    ('property_type', ('description', 'style'), 'property_type'),
+    ('listing_description', ('description', 'text'), 'text'),
+    ('description_title', ('description', 'name'), 'text'),
+    ('bedrooms', ('description', 'beds'), 'int'),
+    ('baths_full', ('description', 'baths_full'), 'int'),
+    ('baths_half', ('description', 'baths_half'), 'int'),
+    ('sqft', ('description', 'sqft'), 'int'),
+    ('lot_sqft', ('description', 'lot_sqft'), 'int'),
+    ('stories', ('description', 'stories'), 'float'),
+    ('garage', ('description', 'garage'), 'int'),
+    ('parking', ('parking',), 'json'),
+    ('year_built', ('description', 'year_built'), 'int'),
+
+    # Status and Dates
+    ('market_status', ('status',), 'status'),
+    ('listing_date', ('list_date',), 'datetime'),
+    ('pending_date', ('pending_date',), 'datetime'),
+    ('sold_date', ('last_sold_date',), 'datetime'),
+    ('days_on_mls', ('days_on_mls',), 'int'),
+
+    # Financial Information (annual_tax/assessed_value are related from latest tax in Odoo)
+    ('hoa_fee', ('hoa_fee',), 'float'),
+
+    # Agent/Broker Information
+    ('agent_name', ('advertisers', 'agent', 'name'), 'text'),
+    ('agent_phone', ('advertisers', 'agent', 'phones'), 'first_phone'),
+    ('agent_email', ('advertisers', 'agent', 'email'), 'text'),
+    ('agent_uuid', ('advertisers', 'agent', 'uuid'), 'text'),
+    ('agent_state_license', ('advertisers', 'agent', 'state_license'), 'text'),
+    ('broker_name', ('advertisers', 'broker', 'name'), 'text'),
+    ('broker_uuid', ('advertisers', 'broker', 'uuid'), 'text'),
+    ('office_name', ('advertisers', 'office', 'name'), 'text'),
+    ('office_uuid', ('advertisers', 'office', 'uuid'), 'text'),
+    ('office_email', ('advertisers', 'office', 'email'), 'text'),
+
+    # Tax Record Information
+    ('tax_record_apn', ('tax_record', 'apn'), 'text'),
+    ('tax_record_cl_id', ('tax_record', 'cl_id'), 'text'),
+    ('tax_record_last_update_date', ('tax_record', 'last_update_date'), 'datetime'),
+    ('tax_record_public_record_id', ('tax_record', 'public_record_id'), 'text'),
+    ('tax_record_tax_parcel_id', ('tax_record', 'tax_parcel_id'), 'text'),
+
+    # Property Flags
+    ('is_coming_soon', ('flags', 'is_coming_soon'), 'bool'),
+    ('is_contingent', ('flags', 'is_contingent'), 'bool'),
+    ('is_foreclosure', ('flags', 'is_foreclosure'), 'bool'),
+    ('is_new_construction', ('flags', 'is_new_construction'), 'bool'),
+    ('is_new_listing', ('flags', 'is_new_listing'), 'bool'),
+    ('is_pending', ('flags', 'is_pending'), 'bool'),
+    ('is_price_reduced', ('flags', 'is_price_reduced'), 'bool'),
+
+    # Additional Information (nearby schools and tags are linked on write)
+    ('pet_policy', ('pet_policy',), 'json'),
+    ('terms', ('terms',), 'optional_json'),
+    ('open_houses', ('open_houses',), 'json'),
+    ('units', ('units',), 'json'),
+    ('current_estimates', ('current_estimates',), 'json'),
+    ('estimates', ('estimates',), 'json'),
+    ('property_tags', ('tags',), 'optional_json'),
+)
+
+# Returned by a coercer to leave the field out of the listing values
+OMIT = object()
+
+
+def json_default(value: Any) -> Any:
+    """Serialize the values json cannot: datetimes in Odoo format, anything else (URLs, enums) as text"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def dump_json(value: Any) -> str:
+    return json.dumps(value, default=json_default)
+
+
+def coerce_text(value: Any) -> Any:
+    if value is None:
+        return OMIT
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+
+def coerce_json(value: Any) -> str:
+    return dump_json(value) if value else ''
+
+
+def coerce_optional_json(value: Any) -> Any:
+    return dump_json(value) if value else OMIT
+
+
+def coerce_first_phone(phones: Any) -> str:
+    # HomeHarvest gives either a list of phones or a single phone
+    if isinstance(phones, dict):
+        phones = [phones]
+    if not phones:
+        return ''
+    return (phones[0] or {}).get('number', '') or ''
+
+
+# Coercers that do not depend on the mapper; PropertyMapper adds status, property_type and datetime
+COERCERS: Dict[str, Callable[[Any], Any]] = {
+    'text': coerce_text,
+    'int': lambda value: int(value or 0),
+    'float': lambda value: float(value or 0),
+    'bool': bool,
+    'json': coerce_json,
+    'optional_json': coerce_optional_json,
+    'first_phone': coerce_first_phone,
+}
+
+
+def compile_listing_mapping(coercers: Dict[str, Callable[[Any], Any]],
+                            spec: Iterable[Tuple[str, Tuple[str, ...], str]] = LISTING_FIELDS
+                            ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a mapping spec into a converter of dumped properties to listing values
+
+    Fields are grouped by the nested dictionary they read from, so every nested
+    dictionary (address, description, advertisers.agent, ...) is looked up once
+    per property. A source key the property does not have is coerced from '', one
+    set to None from None (which text fields leave out).
+
+    Args:
+        coercers: Coercer name -> function, for every coercer named in the spec
+        spec: Sequence of (Odoo field, source path, coercer name)
+
+    Returns:
+        Function mapping a dumped HomeHarvest property to listing values
+    """
+    groups = {}
+    for field_name, path, coercer_name in spec:
+        if coercer_name not in coercers:
+            raise ValueError(f"Unknown coercer '{coercer_name}' for field {field_name}")
+        groups.setdefault(path[:-1], []).append((field_name, path[-1], coercers[coercer_name]))
+
+    plan = tuple((parent, tuple(fields)) for parent, fields in groups.items())
+
+    def convert(prop: Dict[str, Any]) -> Dict[str, Any]:
+        values = {}
+
+        for parent, fields in plan:
+            source = prop
+            for key in parent:
+                source = source.get(key) or {}
+
+            for field_name, key, coerce in fields:
+                value = coerce(source.get(key, ''))
+                if value is not OMIT:
+                    values[field_name] = value
+
+        return values
+
+    return convert
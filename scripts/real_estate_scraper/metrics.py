@@ -0,0 +1,106 @@
+"""
+Prometheus metrics of the scraper worker
+
+Both runtimes record into the default prometheus_client registry, which
+start_metrics_server() exposes on a local HTTP port for Prometheus to scrape.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Buckets for Odoo RPCs and pipeline stages, which range from milliseconds to a few seconds
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Buckets for HomeHarvest searches and queue lag, which range from seconds to hours
+SLOW_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+MESSAGES = Counter(
+    'scraper_messages_total', 'RabbitMQ messages consumed, coalesced, acked, nacked and requeued', ['event']
+)
+QUEUE_LAG = Histogram(
+    'scraper_queue_lag_seconds', 'Time between publishing a message and the scraper receiving it',
+    buckets=SLOW_BUCKETS
+)
+HOMEHARVEST_SECONDS = Histogram(
+    'scraper_homeharvest_seconds', 'Duration of HomeHarvest searches', ['outcome'], buckets=SLOW_BUCKETS
+)
+SCRAPE_CACHE = Counter(
+    'scraper_scrape_cache_total', 'HomeHarvest searches answered from the local result cache (hit) or not (miss)',
+    ['result']
+)
+RATE_LIMIT_WAIT = Histogram(
+    'scraper_rate_limit_wait_seconds', 'Time HomeHarvest searches waited for the host-wide rate limit',
+    buckets=(0, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900)
+)
+PROPERTIES_PER_MESSAGE = Histogram(
+    'scraper_properties_per_message', 'Properties found by the search of one message',
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 200, 500, 1000, 2500, 5000, 10000)
+)
+REFRESH_LISTINGS = Counter(
+    'scraper_refresh_listings_total',
+    'Listings of bulk refresh messages found by the area search (matched) or scraped by address (fallback)',
+    ['result']
+)
+CHECKPOINTS = Counter(
+    'scraper_checkpoints_total', 'Checkpointed searches resumed, interrupted part-way or completed', ['event']
+)
+ODOO_RPC_SECONDS = Histogram(
+    'scraper_odoo_rpc_seconds', 'Duration of Odoo JSON-2 calls', ['model', 'method', 'status'],
+    buckets=FAST_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'scraper_stage_seconds',
+    'Duration of pipeline stages: map and dedup per property, identity per message, '
+    'upsert and listing_write per listing, sync_<collection> per batch of listings',
+    ['stage'], buckets=FAST_BUCKETS
+)
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve the metrics on http://0.0.0.0:<port>/metrics from a daemon thread; 0 disables them"""
+    if not port:
+        return
+
+    start_http_server(port)
+    logger.info(f"Serving metrics on port {port}")
+
+
+def observe_queue_lag(published_at: Optional[Any]) -> None:
+    """Record the queue lag of a message from its AMQP timestamp (seconds or datetime), if it has one"""
+    if published_at is None:
+        return
+
+    if hasattr(published_at, 'timestamp'):
+        published_at = published_at.timestamp()
+
+    QUEUE_LAG.observe(max(0.0, time.time() - published_at))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time the with block as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def timed_iter(iterable: Iterable[Any], stage: str) -> Iterator[Any]:
+    """Yield from iterable, timing how long each item takes to produce as a pipeline stage"""
+    histogram = STAGE_SECONDS.labels(stage)
+    iterator = iter(iterable)
+
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        histogram.observe(time.perf_counter() - start)
+        yield item
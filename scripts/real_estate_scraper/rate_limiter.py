@@ -0,0 +1,199 @@
+"""
+Host-wide rate limit of HomeHarvest searches
+
+A token bucket kept in a SQLite file, so every scraper thread and process sharing
+the file draws from one budget of searches per minute. A throttling-style error
+empties the bucket and blocks every searcher for a backoff that doubles with each
+consecutive throttle; successful searches halve it again.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses realtor.com answers with when it throttles a client
+THROTTLING_STATUSES = (403, 429)
+
+# Error texts of throttled searches that carry no response; urllib3 gives up retrying
+# 403/429 answers with "too many 403 error responses"
+THROTTLING_MESSAGES = ('too many requests', 'rate limit', 'too many 403', 'too many 429')
+
+
+class ScrapeThrottledError(Exception):
+    """Raised when a HomeHarvest search is throttled or paused; the message should be retried later"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        # Seconds until searches are expected to resume
+        self.retry_after = retry_after
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """
+    Tell whether a HomeHarvest error means upstream is throttling us
+
+    Args:
+        error: Exception raised by homeharvest.scrape_property
+
+    Returns:
+        True for 403/429 answers and explicit rate limit errors, False for anything else
+    """
+    # HTTP errors, and HomeHarvest's AuthenticationError, carry the response
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in THROTTLING_STATUSES:
+        return True
+
+    message = str(error).lower()
+    return any(text in message for text in THROTTLING_MESSAGES)
+
+
+class RateLimiter:
+    """
+    Token bucket in a SQLite file, shared by threads (behind a lock) and processes
+    (behind SQLite's write lock)
+    """
+
+    def __init__(self, path: str, tokens_per_minute: float, burst: int = 1,
+                 min_backoff: float = 30, max_backoff: float = 900, max_wait: float = 60):
+        self.path = path
+        self.rate = tokens_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.waited = 0.0
+        self.throttles = 0
+
+        self._lock = threading.Lock()
+        # Transactions are explicit, so BEGIN IMMEDIATE serializes processes
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS bucket ('
+            ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+            ' tokens REAL NOT NULL,'
+            ' updated_at REAL NOT NULL,'
+            ' backoff REAL NOT NULL,'
+            ' blocked_until REAL NOT NULL)'
+        )
+        self._db.execute(
+            'INSERT OR IGNORE INTO bucket (id, tokens, updated_at, backoff, blocked_until) VALUES (1, ?, ?, 0, 0)',
+            (self.burst, time.time())
+        )
+
+        logger.info(f"Rate limiting HomeHarvest searches to {tokens_per_minute:g}/min (burst {self.burst}) via {path}")
+
+    @contextmanager
+    def _bucket(self):
+        """Yield the bucket state as a dict, refilled up to now, and write it back in one transaction"""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                tokens, updated_at, backoff, blocked_until = self._db.execute(
+                    'SELECT tokens, updated_at, backoff, blocked_until FROM bucket WHERE id = 1'
+                ).fetchone()
+
+                now = time.time()
+                state = {
+                    'now': now,
+                    'tokens': min(self.burst, tokens + max(0.0, now - updated_at) * self.rate),
+                    'backoff': backoff,
+                    'blocked_until': blocked_until,
+                }
+
+                yield state
+
+                self._db.execute(
+                    'UPDATE bucket SET tokens = ?, updated_at = ?, backoff = ?, blocked_until = ? WHERE id = 1',
+                    (state['tokens'], now, state['backoff'], state['blocked_until'])
+                )
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def acquire(self) -> float:
+        """
+        Wait for a token, and for any throttling backoff to pass
+
+        Waits add up to max_wait at most; a caller that would have to wait longer,
+        typically because searches are paused after a throttle, is told when to retry.
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            ScrapeThrottledError: If the token is further away than max_wait
+        """
+        waited = 0.0
+
+        try:
+            while True:
+                with self._bucket() as state:
+                    if state['now'] < state['blocked_until']:
+                        wait = state['blocked_until'] - state['now']
+                    elif state['tokens'] >= 1:
+                        state['tokens'] -= 1
+                        wait = 0.0
+                    else:
+                        wait = (1 - state['tokens']) / self.rate
+
+                if not wait:
+                    return waited
+
+                if waited + wait > self.max_wait:
+                    raise ScrapeThrottledError(
+                        f"HomeHarvest searches are rate limited for another {wait:.0f}s", retry_after=wait)
+
+                time.sleep(wait)
+                waited += wait
+        finally:
+            if waited:
+                with self._lock:
+                    self.waited += waited
+
+    def throttled(self) -> float:
+        """
+        Record a throttled search: empty the bucket and block every searcher
+
+        Searches already in flight when the block started do not extend it again.
+
+        Returns:
+            Seconds until searches resume
+        """
+        with self._bucket() as state:
+            if state['now'] >= state['blocked_until']:
+                state['backoff'] = min(self.max_backoff, max(self.min_backoff, state['backoff'] * 2))
+                state['blocked_until'] = state['now'] + state['backoff']
+                logger.warning(f"HomeHarvest is throttling us, pausing searches for {state['backoff']:.0f}s")
+            state['tokens'] = 0.0
+            remaining = state['blocked_until'] - state['now']
+
+        with self._lock:
+            self.throttles += 1
+        return remaining
+
+    def succeeded(self) -> None:
+        """Record a successful search, halving the backoff of the next throttle"""
+        with self._bucket() as state:
+            if state['backoff']:
+                halved = state['backoff'] / 2
+                state['backoff'] = halved if halved >= self.min_backoff else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'waited_seconds': round(self.waited, 1), 'throttles': self.throttles}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,204 @@
+"""
+Local cache of HomeHarvest search results
+
+Results are keyed by the normalized search parameters and stored as compressed
+JSON in a SQLite file, so overlapping saved searches or a listing refreshed twice
+in a row reuse the earlier search instead of querying realtor.com again. Entries
+expire after a TTL; the least recently used ones are evicted once the cache
+outgrows its size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from homeharvest.core.scrapers.models import Property
+
+logger = logging.getLogger(__name__)
+
+
+def query_key(location: str, listing_type: str, kwargs: Dict[str, Any]) -> str:
+    """
+    Hash the parameters of a HomeHarvest search
+
+    Location and listing type are compared case- and whitespace-insensitively;
+    keyword arguments are compared regardless of their order.
+
+    Args:
+        location: Location searched
+        listing_type: Type of listing
+        kwargs: Other scrape_property arguments
+
+    Returns:
+        Hex digest identifying the search
+    """
+    query = {
+        'location': ' '.join(str(location or '').lower().split()),
+        'listing_type': str(listing_type or '').lower(),
+        'kwargs': {name: value for name, value in kwargs.items() if name != 'return_type'},
+    }
+    return hashlib.sha256(
+        json.dumps(query, sort_keys=True, separators=(',', ':'), default=str).encode()
+    ).hexdigest()
+
+
+class ScrapeCache:
+    """
+    SQLite-backed, size-bounded map of search key -> HomeHarvest properties
+
+    One connection is shared by all threads of the scraper behind a lock.
+    """
+
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' key TEXT PRIMARY KEY,'
+            ' created_at REAL NOT NULL,'
+            ' used_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' data BLOB NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)')
+        self._db.commit()
+
+        logger.info(f"Using HomeHarvest result cache at {path} (ttl {ttl}s)")
+
+    def get(self, key: str) -> Optional[List[Property]]:
+        """
+        Return the cached properties of a search
+
+        Args:
+            key: Result of query_key
+
+        Returns:
+            List of Property models, or None if the search is not cached or expired
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data FROM results WHERE key = ? AND created_at > ?', (key, now - self.ttl)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute('UPDATE results SET used_at = ? WHERE key = ?', (now, key))
+            self._db.commit()
+
+        return [Property.model_validate(item) for item in json.loads(zlib.decompress(row[0]))]
+
+    def set(self, key: str, properties: List[Property]) -> None:
+        """Cache the properties found by a search, evicting expired and least recently used entries"""
+        writer = self.writer(key)
+        writer.add(properties)
+        writer.commit()
+
+    def writer(self, key: str) -> 'ResultWriter':
+        """
+        Start caching the properties of a search that arrive page by page
+
+        Args:
+            key: Result of query_key
+
+        Returns:
+            ResultWriter to add the pages to, and to commit once the search completed
+        """
+        return ResultWriter(self, key)
+
+    def _store(self, key: str, data: bytes) -> None:
+        """Store compressed results, evicting expired and least recently used entries"""
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (key, created_at, used_at, size, data) VALUES (?, ?, ?, ?, ?)',
+                (key, now, now, len(data), data)
+            )
+            self._db.execute('DELETE FROM results WHERE created_at <= ?', (now - self.ttl,))
+
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                for old_key, size in self._db.execute(
+                        'SELECT key, size FROM results WHERE key != ? ORDER BY used_at', (key,)).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute('DELETE FROM results WHERE key = ?', (old_key,))
+                    total -= size
+                    evicted += 1
+                logger.info(f"Evicted {evicted} cached HomeHarvest results")
+
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ResultWriter:
+    """
+    Compress the properties of a search as they arrive, so a streamed search is
+    cached without holding its properties; nothing is cached until commit
+    """
+
+    def __init__(self, cache: ScrapeCache, key: str):
+        self.cache = cache
+        self.key = key
+        self.count = 0
+
+        self._compressor = zlib.compressobj()
+        self._chunks = [self._compressor.compress(b'[')]
+        self._size = 0
+
+    def add(self, properties: List[Property]) -> None:
+        """Add a page of properties; a search outgrowing the whole cache is dropped"""
+        if self._chunks is None:
+            return
+
+        for property_model in properties:
+            item = json.dumps(property_model.model_dump(mode='json'), separators=(',', ':')).encode()
+            chunk = self._compressor.compress(item if not self.count else b',' + item)
+            self.count += 1
+            if chunk:
+                self._chunks.append(chunk)
+                self._size += len(chunk)
+
+        if self._size > self.cache.max_bytes:
+            logger.info(f"Not caching the search, its results outgrew the cache ({self.count} properties)")
+            self._chunks = None
+
+    def commit(self) -> None:
+        """Cache the properties added so far"""
+        if self._chunks is None:
+            return
+
+        self._chunks.append(self._compressor.compress(b']'))
+        self._chunks.append(self._compressor.flush())
+        self.cache._store(self.key, b''.join(self._chunks))
+        self._chunks = None
@@ -3,14 +3,42 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import cached_property, partial
+from itertools import repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Any
 
 import pika
 import requests
 from dotenv import load_dotenv
 from homeharvest import scrape_property
+from requests.adapters import HTTPAdapter
+
+from checkpoints import Checkpoint, CheckpointStore, IngestInterruptedError
+from fingerprints import FINGERPRINT_SECTIONS, FingerprintStore, payload_fingerprint
+from homeharvest_pages import iter_property_pages
+from listing_mapping import COERCERS, LISTING_FIELDS, compile_listing_mapping
+from metrics import (
+    CHECKPOINTS,
+    HOMEHARVEST_SECONDS,
+    MESSAGES,
+    ODOO_RPC_SECONDS,
+    PROPERTIES_PER_MESSAGE,
+    RATE_LIMIT_WAIT,
+    REFRESH_LISTINGS,
+    SCRAPE_CACHE,
+    observe_queue_lag,
+    stage_timer,
+    start_metrics_server,
+    timed_iter,
+)
+from rate_limiter import RateLimiter, ScrapeThrottledError, is_throttling_error
+from scrape_cache import ScrapeCache, query_key
 
 # Configure logging
 logging.basicConfig(
@@ -31,1403 +59,2511 @@ RABBITMQ_QUEUE = os.getenv('RABBITMQ_QUEUE', 'property_scrape_queue')
 RABBITMQ_EXCHANGE = os.getenv('RABBITMQ_EXCHANGE', 'property_exchange')
 RABBITMQ_ROUTING_KEY = os.getenv('RABBITMQ_ROUTING_KEY', 'property.scrape')
 
+# Scraper runtime: 'sync' (blocking pika consumer) or 'async' (asyncio, see async_scraper.py)
+SCRAPER_RUNTIME = os.getenv('SCRAPER_RUNTIME', 'sync').lower()
+
 # Odoo connection parameters
 ODOO_URL = os.getenv('ODOO_URL', 'http://localhost:8069')
 ODOO_DB = os.getenv('ODOO_DB_NAME', 'odoo')
 # Do not provide a default here — we want to ensure the user sets a real API key
 ODOO_API_KEY = os.getenv('ODOO_API_KEY')
 
+# Odoo transport tuning
+ODOO_POOL_SIZE = int(os.getenv('ODOO_POOL_SIZE', 10))
+ODOO_CONNECT_TIMEOUT = float(os.getenv('ODOO_CONNECT_TIMEOUT', 5))
+ODOO_TIMEOUT = float(os.getenv('ODOO_TIMEOUT', 30))
 
-class PropertyScraper:
-    def __init__(self):
-        self.connect_rabbitmq()
-        self.connect_odoo()
-
-    def connect_rabbitmq(self):
-        """Connect to RabbitMQ and set up channel"""
-        logger.info(f"Connecting to RabbitMQ at {RABBITMQ_HOST}:{RABBITMQ_PORT}")
+# Send each listing tree to real_estate.listing/upsert_scraped_listing in a single RPC
+ODOO_SERVER_UPSERT = os.getenv('ODOO_SERVER_UPSERT', 'true').lower() in ('1', 'true', 'yes')
 
-        # Retry connection to RabbitMQ with exponential backoff
-        retry_count = 0
-        max_retries = 10
-        connected = False
+# Local cache of listing identity (property_id, mls and mls_id, url, address) -> Odoo id
+IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', 50000))
+IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 7 * 24 * 3600))
 
-        while not connected and retry_count < max_retries:
-            try:
-                credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+# Listing fields identifying a listing
+IDENTITY_FIELDS = ('property_id', 'mls', 'mls_id', 'url', 'address')
 
-                parameters = pika.ConnectionParameters(
-                    host=RABBITMQ_HOST,
-                    port=RABBITMQ_PORT,
-                    credentials=credentials,
-                    heartbeat=600
-                )
+# Identity fields recognizing an existing listing, alone or together, in order of precedence
+# ('mls' names the MLS, so it only identifies a listing together with its mls_id). The addon
+# defines them and serves them from real_estate.listing/scraper_sync_spec (see load_sync_spec);
+# this copy is only used with addons that predate that method
+IDENTITY_KEY_FIELDS = (('property_id',), ('mls', 'mls_id'), ('url',), ('address',))
 
-                self.connection = pika.BlockingConnection(parameters)
-                self.channel = self.connection.channel()
+# HomeHarvest fields the identity fields are mapped from
+IDENTITY_SOURCE_FIELDS = {'property_id', 'mls', 'property_url', 'address'}
 
-                # Declare exchange
-                self.channel.exchange_declare(
-                    exchange=RABBITMQ_EXCHANGE,
-                    exchange_type='topic',
-                    durable=True
-                )
+# HomeHarvest fields read by the child collections, tags and nearby schools of a payload
+CHILD_SOURCE_FIELDS = {'photos', 'description', 'popularity', 'tax_history', 'details', 'estimates',
+                       'tags', 'nearby_schools'}
 
-                # Declare queue
-                self.channel.queue_declare(
-                    queue=RABBITMQ_QUEUE,
-                    durable=True
-                )
+# HomeHarvest fields dumped to build a payload; the rest of the model is never read
+PAYLOAD_SOURCE_FIELDS = (
+    IDENTITY_SOURCE_FIELDS | CHILD_SOURCE_FIELDS | {path[0] for _, path, _ in LISTING_FIELDS}
+)
 
-                # Bind queue to exchange
-                self.channel.queue_bind(
-                    exchange=RABBITMQ_EXCHANGE,
-                    queue=RABBITMQ_QUEUE,
-                    routing_key=RABBITMQ_ROUTING_KEY
-                )
+# Fields matching an area search result to a listing of a bulk refresh message, in order of precedence
+# ('mls' names the MLS, so it only identifies a listing together with its mls_id)
+REFRESH_MATCH_FIELDS = (('property_id',), ('mls', 'mls_id'), ('address',))
 
-                connected = True
-                logger.info("Successfully connected to RabbitMQ")
+# Maximum number of values in one bulk identity search
+IDENTITY_BATCH_SIZE = int(os.getenv('IDENTITY_BATCH_SIZE', 1000))
 
-            except pika.exceptions.AMQPConnectionError as e:
-                retry_count += 1
-                wait_time = 2 ** retry_count
-                logger.warning(
-                    f"Failed to connect to RabbitMQ (attempt {retry_count}/{max_retries}). Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+# Seconds before the preloaded tag/photo tag/school vocabularies are reloaded from Odoo
+VOCABULARY_REFRESH_INTERVAL = int(os.getenv('VOCABULARY_REFRESH_INTERVAL', 3600))
 
-        if not connected:
-            logger.error("Failed to connect to RabbitMQ after maximum retries")
-            raise ConnectionError("Could not connect to RabbitMQ")
+# Messages handled at once by the blocking runtime, each in its own worker thread
+SCRAPER_WORKERS = int(os.getenv('SCRAPER_WORKERS', 1))
 
-    def connect_odoo(self):
-        """Connect to Odoo using JSON-2 API"""
-        logger.info(f"Connecting to Odoo at {ODOO_URL}")
+# Unacknowledged messages RabbitMQ delivers ahead (defaults to one per worker)
+SCRAPER_PREFETCH = int(os.getenv('SCRAPER_PREFETCH', SCRAPER_WORKERS))
 
-        try:
-            if not ODOO_API_KEY:
-                logger.error("ODOO_API_KEY environment variable is required")
-                raise ConnectionError("ODOO_API_KEY is required")
+# Identity fields that lock a listing while it is written ('mls' names the MLS, not the listing)
+LISTING_LOCK_FIELDS = ('property_id', 'url', 'address')
 
-            # Prepare headers for JSON-2 API
-            self.headers = {
-                'Authorization': f"bearer {ODOO_API_KEY}",
-                'Content-Type': 'application/json'
-            }
+# Processes mapping large scrape results in parallel (0 maps in the consumer process)
+MAPPING_WORKERS = int(os.getenv('MAPPING_WORKERS', 0))
 
-            # Add database header if needed (for multi-database setups)
-            if ODOO_DB:
-                self.headers['X-Odoo-Database'] = ODOO_DB
+# Properties per batch sent to a mapping process; smaller results are mapped in-process
+MAPPING_BATCH_SIZE = int(os.getenv('MAPPING_BATCH_SIZE', 200))
 
-            # Set up base URL for JSON-2 API
-            self.base_url = f"{ODOO_URL}/json/2"
+# Directory for the scraper's local state
+SCRAPER_STATE_DIR = os.getenv('SCRAPER_STATE_DIR', os.path.expanduser('~/.listing_lab'))
 
-            # Test connection by getting current user context
-            test_response = requests.post(
-                f"{self.base_url}/res.users/context_get",
-                headers=self.headers,
-                json={},
-                timeout=30
-            )
+# Skip listings (and sections of listings) whose content did not change since they were last written
+FINGERPRINT_SKIP = os.getenv('FINGERPRINT_SKIP', 'true').lower() in ('1', 'true', 'yes')
+FINGERPRINT_DB = os.getenv('FINGERPRINT_DB', os.path.join(SCRAPER_STATE_DIR, 'fingerprints.sqlite3'))
 
-            if test_response.status_code != 200:
-                logger.error(f"Authentication with Odoo failed: {test_response.status_code}")
-                raise ConnectionError("Authentication with Odoo failed")
+# Seconds a HomeHarvest search result is reused for identical searches (0 disables the cache)
+SCRAPE_CACHE_TTL = int(os.getenv('SCRAPE_CACHE_TTL', 900))
+SCRAPE_CACHE_MAX_MB = int(os.getenv('SCRAPE_CACHE_MAX_MB', 256))
+SCRAPE_CACHE_DB = os.getenv('SCRAPE_CACHE_DB', os.path.join(SCRAPER_STATE_DIR, 'scrape_cache.sqlite3'))
 
-            logger.info(f"Connected to Odoo at {ODOO_URL} using JSON-2 API")
+# HomeHarvest searches per minute shared by every scraper using SCRAPE_RATE_DB (0 disables the limit)
+SCRAPE_RATE_PER_MINUTE = float(os.getenv('SCRAPE_RATE_PER_MINUTE', 30))
+SCRAPE_RATE_BURST = int(os.getenv('SCRAPE_RATE_BURST', 5))
+SCRAPE_RATE_DB = os.getenv('SCRAPE_RATE_DB', os.path.join(SCRAPER_STATE_DIR, 'rate_limit.sqlite3'))
 
-        except Exception as e:
-            logger.error(f"Error connecting to Odoo: {str(e)}")
-            raise
+# Seconds searches pause after a throttling error, doubled per consecutive throttle up to the max
+SCRAPE_BACKOFF_MIN = float(os.getenv('SCRAPE_BACKOFF_MIN', 30))
+SCRAPE_BACKOFF_MAX = float(os.getenv('SCRAPE_BACKOFF_MAX', 900))
 
-    def odoo_request(self, model, method, **kwargs):
-        """
-        Make a JSON-2 API request to Odoo
-        
-        Args:
-            model: Model name
-            method: Method name
-            **kwargs: Method arguments
-        
-        Returns:
-            Response data or None if failed
-        """
-        try:
-            # For create method, convert 'vals' to 'vals_list' as expected by JSON-2 API
-            if method == 'create' and 'vals' in kwargs:
-                vals = kwargs.pop('vals')
-                kwargs['vals_list'] = [vals]  # Wrap single record in list
+# Longest a search waits for the rate limit while its message is handled; kept well below
+# the RabbitMQ heartbeat, longer waits requeue the message once searches may resume
+SCRAPE_MAX_WAIT = float(os.getenv('SCRAPE_MAX_WAIT', 60))
 
-            url = f"{self.base_url}/{model}/{method}"
-            response = requests.post(
-                url,
-                headers=self.headers,
-                json=kwargs,
-                timeout=30
-            )
+# Write search results page by page while HomeHarvest fetches the next pages
+SCRAPE_STREAM_PAGES = os.getenv('SCRAPE_STREAM_PAGES', 'true').lower() in ('1', 'true', 'yes')
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Odoo API request failed: {response.status_code} - {response.text}")
-                return None
-        except Exception as e:
-            logger.error(f"Error making Odoo API request: {e}")
-            return None
+# Pages fetched ahead of the page being written; bounds memory to about this many pages plus one
+SCRAPE_STREAM_PREFETCH = int(os.getenv('SCRAPE_STREAM_PREFETCH', 2))
 
-    def scrape_property(self, location: str, listing_type: str = "for_sale", **kwargs) -> List[Any]:
-        """
-        Scrape property data using HomeHarvest with Pydantic models
-        
-        Args:
-            location: Location to search for properties
-            listing_type: Type of listing (for_sale, for_rent, sold, pending)
-            **kwargs: Additional parameters for the search
-            
-        Returns:
-            List of Property Pydantic models
-        """
-        logger.info(f"Scraping property data for location: {location}, type: {listing_type}")
-        try:
-            # Always use Pydantic models for return type
-            kwargs['return_type'] = 'pydantic'
+# Seconds the progress of a search that failed part-way is kept to resume it (0 disables checkpoints)
+SCRAPE_CHECKPOINT_TTL = int(os.getenv('SCRAPE_CHECKPOINT_TTL', 24 * 3600))
+SCRAPE_CHECKPOINT_DB = os.getenv('SCRAPE_CHECKPOINT_DB', os.path.join(SCRAPER_STATE_DIR, 'checkpoints.sqlite3'))
 
-            # Use HomeHarvest to scrape property data
-            properties = scrape_property(
-                location=location,
-                listing_type=listing_type,
-                **kwargs
-            )
+# Child collections of a listing payload: section -> (model, one2many field on real_estate.listing,
+# fields identifying a row within the listing). Served by the addon like IDENTITY_KEY_FIELDS
+CHILD_COLLECTIONS = {
+    'photos': ('real_estate.photo', 'photo_ids', ('preview_href',)),
+    'popularity': ('real_estate.popularity', 'popularity_ids', ('last_n_days',)),
+    'features': ('real_estate.feature', 'feature_ids', ('parent_category', 'category')),
+    'estimates': ('real_estate.estimate', 'estimate_ids', ('date', 'source_name', 'source_type')),
+    'tax_history': ('real_estate.tax_history', 'tax_history_ids', ('year',)),
+}
 
-            logger.info(f"Successfully scraped {len(properties)} properties")
-            return properties
-        except Exception as e:
-            logger.error(f"Error scraping properties: {str(e)}")
-            raise
+# Listings whose child collections are reconciled together when syncing from the scraper
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', 50))
 
-    def create_or_update_property(self, property_model: Any, record_id: Optional[int] = None) -> int:
-        """
-        Create or update property in Odoo using Pydantic model
-        
-        Args:
-            property_model: Pydantic model from homeharvest
-            record_id: Optional record ID for direct update
-            
-        Returns:
-            Odoo record ID
-        """
-        try:
-            # Convert property data to Odoo format
-            odoo_property = self.map_property_to_odoo(property_model)
-            property_id = record_id
+# Seconds a finished request absorbs identical messages (same record or same search); 0 disables coalescing
+SCRAPER_COALESCE_WINDOW = int(os.getenv('SCRAPER_COALESCE_WINDOW', 60))
 
-            if property_id:
-                logger.info(f"Using provided record_id: {property_id} for direct update")
+# Local port serving Prometheus metrics at /metrics (0 disables the endpoint)
+SCRAPER_METRICS_PORT = int(os.getenv('SCRAPER_METRICS_PORT', 8000))
 
-            # If no record_id provided, check if property already exists (by property_id, mls, url, or address)
-            if not property_id:
-                # Check by property_id
-                if 'property_id' in odoo_property and odoo_property['property_id']:
-                    existing_response = self.odoo_request(
-                        'real_estate.listing', 'search',
-                        domain=[['property_id', '=', odoo_property['property_id']]]
-                    )
-                    if existing_response:
-                        existing_ids = existing_response if isinstance(existing_response,
-                                                                       list) else existing_response.get('result', [])
-                        if existing_ids:
-                            property_id = existing_ids[0]
-
-                # Check by MLS
-                if not property_id and 'mls' in odoo_property and odoo_property['mls']:
-                    existing_response = self.odoo_request(
-                        'real_estate.listing', 'search',
-                        domain=[['mls', '=', odoo_property['mls']]]
-                    )
-                    if existing_response:
-                        existing_ids = existing_response if isinstance(existing_response,
-                                                                       list) else existing_response.get('result', [])
-                        if existing_ids:
-                            property_id = existing_ids[0]
-
-                # Check by URL
-                if not property_id and 'url' in odoo_property and odoo_property['url']:
-                    existing_response = self.odoo_request(
-                        'real_estate.listing', 'search',
-                        domain=[['url', '=', odoo_property['url']]]
-                    )
-                    if existing_response:
-                        existing_ids = existing_response if isinstance(existing_response,
-                                                                       list) else existing_response.get('result', [])
-                        if existing_ids:
-                            property_id = existing_ids[0]
-
-                # Check by address
-                if not property_id and 'address' in odoo_property and odoo_property['address']:
-                    existing_response = self.odoo_request(
-                        'real_estate.listing', 'search',
-                        domain=[['address', '=', odoo_property['address']]]
-                    )
-                    if existing_response:
-                        existing_ids = existing_response if isinstance(existing_response,
-                                                                       list) else existing_response.get('result', [])
-                        if existing_ids:
-                            property_id = existing_ids[0]
 
-            # Extract photos, popularity, tax history, estimates, and features data before removing it from odoo_property
-            photos_data = None
-            alt_photos_data = None
-            popularity_data = None
-            tax_history_data = None
-            features_data = None
-            estimates_data = None
+def _counting_pool_class(base, on_new_connection):
+    """Subclass a urllib3 connection pool so every freshly opened socket is reported"""
 
-            property_data = property_model.model_dump()
-            if 'photos' in property_data:
-                photos_data = property_data.get('photos', [])
+    class CountingConnectionPool(base):
+        def _new_conn(self):
+            on_new_connection()
+            return super()._new_conn()
 
-            # Extract alt_photos from description field
-            if 'description' in property_data and property_data['description'] and 'alt_photos' in property_data[
-                'description']:
-                alt_photos_data = property_data['description'].get('alt_photos', [])
+    CountingConnectionPool.__name__ = f"Counting{base.__name__}"
+    return CountingConnectionPool
 
-            if 'popularity' in property_data:
-                popularity_data = property_data.get('popularity', {})
 
-            if 'tax_history' in property_data:
-                tax_history_data = property_data.get('tax_history', [])
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that reports when urllib3 has to open a new connection instead of reusing one"""
 
-            if 'details' in property_data:
-                features_data = property_data.get('details', [])
+    def __init__(self, on_new_connection, **kwargs):
+        # Must be set before HTTPAdapter.__init__, which builds the pool manager
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
 
-            if 'estimates' in property_data:
-                estimates_data = property_data.get('estimates', {})
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_class, self._on_new_connection)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
 
-            # Create or update the property
-            if property_id:
-                logger.info(f"Updating existing property (ID: {property_id})")
 
-                update_response = self.odoo_request(
-                    'real_estate.listing', 'write',
-                    ids=[property_id],
-                    vals=odoo_property
-                )
-                if not update_response:
-                    raise Exception(f"Failed to update property {property_id}")
+class OdooTransport:
+    """
+    Pooled keep-alive HTTP transport for the Odoo JSON-2 API
 
-                # Process photos if available
-                if photos_data:
-                    self.process_property_photos(property_id, photos_data, alt_photos_data)
+    A single requests.Session is shared by every call so TCP/TLS connections are
+    reused across RPCs instead of being re-established for each request.
+    """
 
-                # Process popularity data if available
-                if popularity_data:
-                    self.process_property_popularity(property_id, popularity_data)
+    def __init__(self, base_url: str, headers: Dict[str, str], pool_size: int = ODOO_POOL_SIZE,
+                 connect_timeout: float = ODOO_CONNECT_TIMEOUT, timeout: float = ODOO_TIMEOUT):
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
 
-                # Process tax history data if available
-                if tax_history_data:
-                    self.process_property_tax_history(property_id, tax_history_data)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._new_connections = 0
 
-                # Process features data if available
-                if features_data:
-                    self.process_property_features(property_id, features_data)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
 
-                # Process estimates data if available
-                if estimates_data:
-                    self.process_property_estimates(property_id, estimates_data)
+        # Odoo is a single host, so one pool sized for our concurrency is enough
+        adapter = CountingHTTPAdapter(
+            self._record_new_connection,
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
-                return property_id
-            else:
-                logger.info("Creating new property")
+    def _record_new_connection(self):
+        with self._lock:
+            self._new_connections += 1
 
-                create_response = self.odoo_request(
-                    'real_estate.listing', 'create',
-                    vals=odoo_property
-                )
-                if not create_response:
-                    raise Exception("Failed to create new property")
-
-                # Handle response - it could be a list or dict
-                if isinstance(create_response, list):
-                    new_id = create_response[0] if create_response else None
-                elif isinstance(create_response, dict):
-                    new_id = create_response.get('result')
-                    if isinstance(new_id, list):
-                        new_id = new_id[0] if new_id else None
-                else:
-                    new_id = create_response
+    def post(self, path: str, payload: Any, timeout: Optional[float] = None) -> requests.Response:
+        """
+        POST a JSON payload to a JSON-2 endpoint
 
-                # Process photos if available
-                if photos_data:
-                    self.process_property_photos(new_id, photos_data, alt_photos_data)
+        Args:
+            path: Path relative to the JSON-2 base URL (e.g. 'res.partner/search')
+            payload: JSON-serializable request body
+            timeout: Optional read timeout overriding the transport default
 
-                # Process popularity data if available
-                if popularity_data:
-                    self.process_property_popularity(new_id, popularity_data)
+        Returns:
+            requests.Response
+        """
+        with self._lock:
+            self._requests += 1
 
-                # Process tax history data if available
-                if tax_history_data:
-                    self.process_property_tax_history(new_id, tax_history_data)
+        model, _, method = path.partition('/')
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/{path}",
+                json=payload,
+                timeout=(self.connect_timeout, timeout or self.timeout)
+            )
+            status = str(response.status_code)
+            return response
+        finally:
+            ODOO_RPC_SECONDS.labels(model, method, status).observe(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, int]:
+        """Return request and connection reuse counters"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'new_connections': self._new_connections,
+                'reused_connections': max(self._requests - self._new_connections, 0),
+            }
 
-                # Process features data if available
-                if features_data:
-                    self.process_property_features(new_id, features_data)
+    def close(self):
+        self.session.close()
 
-                # Process estimates data if available
-                if estimates_data:
-                    self.process_property_estimates(new_id, estimates_data)
 
-                return new_id
+class IdentityCache:
+    """
+    Bounded LRU cache with a TTL mapping listing identity keys to Odoo record IDs
 
-        except Exception as e:
-            logger.error(f"Error creating/updating property in Odoo: {str(e)}")
-            raise
+    Keys are (field, value, ...) tuples such as ('property_id', '1234567890') or
+    ('mls', 'CRMLS', 'mls_id', 'OC24012345').
+    """
 
-    def process_property_popularity(self, property_id: int, popularity_data: Dict[str, List[Dict[str, Any]]]) -> None:
-        """
-        Process and store property popularity metrics
-        
-        Args:
-            property_id: Odoo property record ID
-            popularity_data: Dictionary containing popularity metrics
-        """
-        if not popularity_data or 'periods' not in popularity_data:
-            logger.info(f"No popularity data available for property {property_id}")
-            return
+    def __init__(self, max_size: int = IDENTITY_CACHE_SIZE, ttl: int = IDENTITY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
 
-        try:
-            # Get existing popularity records for this property
-            existing_response = self.odoo_request(
-                'real_estate.popularity', 'search_read',
-                domain=[['property_id', '=', property_id]],
-                fields=['id', 'last_n_days']
-            )
-            existing_records = existing_response if isinstance(existing_response, list) else existing_response.get(
-                'result', []) if existing_response else []
-
-            # Create a mapping of period days to record IDs
-            existing_periods = {record['last_n_days']: record['id'] for record in existing_records}
-
-            # Process each period in the popularity data
-            for period in popularity_data.get('periods', []):
-                last_n_days = period.get('last_n_days')
-
-                # Skip if last_n_days is not available
-                if not last_n_days:
-                    continue
-
-                # Prepare popularity data
-                popularity_values = {
-                    'property_id': property_id,
-                    'last_n_days': last_n_days,
-                    'views_total': period.get('views_total', 0) or 0,
-                    'clicks_total': period.get('clicks_total', 0) or 0,
-                    'saves_total': period.get('saves_total', 0) or 0,
-                    'shares_total': period.get('shares_total', 0) or 0,
-                    'leads_total': period.get('leads_total', 0) or 0,
-                    'dwell_time_mean': period.get('dwell_time_mean', 0.0) or 0.0,
-                    'dwell_time_median': period.get('dwell_time_median', 0.0) or 0.0,
-                }
-
-                # Update existing record or create new one
-                if last_n_days in existing_periods:
-                    record_id = existing_periods[last_n_days]
-                    logger.info(f"Updating existing popularity record for period {last_n_days} days")
-
-                    self.odoo_request(
-                        'real_estate.popularity', 'write',
-                        ids=[record_id],
-                        vals=popularity_values
-                    )
-                else:
-                    logger.info(f"Creating new popularity record for period {last_n_days} days")
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-                    self.odoo_request(
-                        'real_estate.popularity', 'create',
-                        vals=popularity_values
-                    )
+    def get(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
 
-        except Exception as e:
-            logger.error(f"Error processing popularity data: {str(e)}")
-            # Continue with property creation even if popularity processing fails
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
 
-    def process_property_features(self, property_id: int, features_data: List[Dict[str, Any]]) -> None:
-        """
-        Process and store property features
-        
-        Args:
-            property_id: Odoo property record ID
-            features_data: List of feature data dictionaries with category, parent_category, and text fields
-        """
-        try:
-            if not features_data:
-                logger.info(f"No features data to process for property {property_id}")
-                return
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
 
-            logger.info(f"Processing {len(features_data)} feature records for property {property_id}")
+    def set(self, key: tuple, record_id: int) -> None:
+        with self._lock:
+            self._entries[key] = (record_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
 
-            # First, get existing feature records for this property
-            existing_response = self.odoo_request(
-                'real_estate.feature', 'search_read',
-                domain=[['property_id', '=', property_id]],
-                fields=['id', 'category', 'parent_category']
-            )
-            existing_records = existing_response if isinstance(existing_response, list) else existing_response.get(
-                'result', []) if existing_response else []
-
-            # Create a map of category+parent_category -> record_id for quick lookup
-            existing_features = {f"{record['parent_category']}:{record['category']}": record['id'] for record in
-                                 existing_records}
-
-            # Process each feature record
-            for feature_data in features_data:
-                category = feature_data.get('category', '')
-                parent_category = feature_data.get('parent_category', '')
-                text_items = feature_data.get('text', [])
-
-                if not category:
-                    logger.warning(f"Feature record missing category, skipping: {feature_data}")
-                    continue
-
-                # Prepare feature record data
-                feature_record = {
-                    'property_id': property_id,
-                    'category': category,
-                    'parent_category': parent_category,
-                    'text_items': json.dumps(text_items)
-                }
-
-                # Check if record for this category already exists
-                feature_key = f"{parent_category}:{category}"
-                if feature_key in existing_features:
-                    # Update existing record
-                    self.odoo_request(
-                        'real_estate.feature', 'write',
-                        ids=[existing_features[feature_key]],
-                        vals=feature_record
-                    )
-                    logger.debug(f"Updated feature record for {parent_category} - {category}")
-                else:
-                    # Create new record
-                    create_response = self.odoo_request(
-                        'real_estate.feature', 'create',
-                        vals=feature_record
-                    )
-                    # Handle response - it could be a list or dict
-                    if isinstance(create_response, list):
-                        new_id = create_response[0] if create_response else None
-                    elif isinstance(create_response, dict):
-                        new_id = create_response.get('result')
-                        if isinstance(new_id, list):
-                            new_id = new_id[0] if new_id else None
-                    else:
-                        new_id = create_response
-                    logger.debug(f"Created new feature record for {parent_category} - {category} with ID {new_id}")
-
-            logger.info(f"Completed processing features for property {property_id}")
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
 
-        except Exception as e:
-            logger.error(f"Error processing features: {str(e)}")
-            # Continue with property creation even if features processing fails
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
 
-    def process_property_estimates(self, property_id: int, estimates_data: Dict[str, List[Dict[str, Any]]]) -> None:
-        """
-        Process and store property value estimates
-        
-        Args:
-            property_id: Odoo property record ID
-            estimates_data: Dictionary containing property value estimates
-        """
-        try:
-            # Check if estimates data exists
-            if not estimates_data or 'current_values' not in estimates_data:
-                logger.info(f"No estimate data to process for property {property_id}")
-                return
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
 
-            current_values = estimates_data.get('current_values', [])
-            if not current_values:
-                logger.info(f"No current value estimates to process for property {property_id}")
-                return
 
-            logger.info(f"Processing {len(current_values)} estimate records for property {property_id}")
+class KeyedLock:
+    """
+    Mutual exclusion on arbitrary keys, such as listing ids and addresses
 
-            # First, get existing estimate records for this property
-            existing_response = self.odoo_request(
-                'real_estate.estimate', 'search_read',
-                domain=[['property_id', '=', property_id]],
-                fields=['id', 'date', 'source_name', 'source_type']
-            )
-            existing_records = existing_response if isinstance(existing_response, list) else existing_response.get(
-                'result', []) if existing_response else []
-
-            # Create a map for quick lookup of existing records
-            existing_estimates = {}
-            for record in existing_records:
-                key = f"{record['date']}_{record['source_name']}_{record['source_type']}"
-                existing_estimates[key] = record['id']
-
-            # Process each estimate record
-            for estimate_data in current_values:
-                date_value = estimate_data.get('date')
-                if not date_value:
-                    logger.warning(f"Estimate record missing date, skipping: {estimate_data}")
-                    continue
-
-                # Convert datetime to date string
-                if isinstance(date_value, datetime):
-                    date_str = date_value.strftime('%Y-%m-%d')
-                else:
-                    date_str = str(date_value).split(' ')[0]  # Get just the date part
-
-                # Get source information
-                source = estimate_data.get('source', {})
-                source_name = source.get('name', '')
-                source_type = source.get('type', '')
-
-                # Prepare estimate record data
-                estimate_record = {
-                    'property_id': property_id,
-                    'date': date_str,
-                    'estimate': estimate_data.get('estimate', 0),
-                    'estimate_high': estimate_data.get('estimate_high', 0),
-                    'estimate_low': estimate_data.get('estimate_low', 0),
-                    'is_best_home_value': estimate_data.get('is_best_home_value', False),
-                    'source_name': source_name,
-                    'source_type': source_type
-                }
-
-                # Check if record already exists
-                key = f"{date_str}_{source_name}_{source_type}"
-                if key in existing_estimates:
-                    # Update existing record
-                    self.odoo_request(
-                        'real_estate.estimate', 'write',
-                        ids=[existing_estimates[key]],
-                        vals=estimate_record
-                    )
-                    logger.debug(f"Updated estimate record for {source_name} on {date_str}")
-                else:
-                    # Create new record
-                    create_response = self.odoo_request(
-                        'real_estate.estimate', 'create',
-                        vals=estimate_record
-                    )
-                    # Handle response - it could be a list or dict
-                    if isinstance(create_response, list):
-                        new_id = create_response[0] if create_response else None
-                    elif isinstance(create_response, dict):
-                        new_id = create_response.get('result')
-                        if isinstance(new_id, list):
-                            new_id = new_id[0] if new_id else None
-                    else:
-                        new_id = create_response
-                    logger.debug(f"Created new estimate record for {source_name} on {date_str} with ID {new_id}")
-
-            logger.info(f"Completed processing estimates for property {property_id}")
+    hold() waits until none of the keys is held by another owner and then takes all
+    of them at once, so an owner never holds part of a call's keys while waiting for
+    the rest. Holds are re-entrant per owner.
+    """
 
-        except Exception as e:
-            logger.error(f"Error processing estimates: {str(e)}")
-            # Continue with property creation even if estimates processing fails
+    def __init__(self):
+        self._owners = {}
+        self._condition = threading.Condition()
 
-    def process_property_tax_history(self, property_id: int, tax_history_data: List[Dict[str, Any]]) -> None:
+    @contextmanager
+    def hold(self, keys: Iterable[tuple], owner: Any = None):
         """
-        Process and store property tax history
-        
+        Hold every key for the duration of the with block
+
         Args:
-            property_id: Odoo property record ID
-            tax_history_data: List of tax history data dictionaries
+            keys: Keys to hold
+            owner: Holder identity, defaults to the current thread
         """
-        try:
-            if not tax_history_data:
-                logger.info(f"No tax history data to process for property {property_id}")
-                return
+        owner = threading.get_ident() if owner is None else owner
+        keys = set(keys)
 
-            logger.info(f"Processing {len(tax_history_data)} tax history records for property {property_id}")
-
-            # First, get existing tax history records for this property
-            existing_response = self.odoo_request(
-                'real_estate.tax_history', 'search_read',
-                domain=[['property_id', '=', property_id]],
-                fields=['id', 'year']
+        with self._condition:
+            self._condition.wait_for(
+                lambda: all(self._owners.get(key, (owner,))[0] == owner for key in keys)
             )
-            existing_records = existing_response if isinstance(existing_response, list) else existing_response.get(
-                'result', []) if existing_response else []
-
-            # Create a map of year -> record_id for quick lookup
-            existing_years = {record['year']: record['id'] for record in existing_records}
-
-            # Process each tax history record
-            for tax_data in tax_history_data:
-                year = tax_data.get('year')
-
-                if not year:
-                    logger.warning(f"Tax history record missing year, skipping: {tax_data}")
-                    continue
-
-                # Prepare tax history record data
-                tax_record = {
-                    'property_id': property_id,
-                    'year': year,
-                    'tax': tax_data.get('tax', 0),
-                    'assessed_year': tax_data.get('assessed_year'),
-                    'value': tax_data.get('value', 0)
-                }
-
-                # Handle assessment data if present
-                assessment = tax_data.get('assessment', {})
-                if assessment:
-                    tax_record.update({
-                        'assessment_total': assessment.get('total', 0),
-                        'assessment_building': assessment.get('building', 0),
-                        'assessment_land': assessment.get('land', 0)
-                    })
+            for key in keys:
+                self._owners.setdefault(key, [owner, 0])[1] += 1
 
-                # Add other fields if present
-                if 'appraisal' in tax_data:
-                    tax_record['appraisal'] = tax_data.get('appraisal', 0)
+        try:
+            yield
+        finally:
+            with self._condition:
+                for key in keys:
+                    entry = self._owners[key]
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self._owners[key]
+                self._condition.notify_all()
+
+
+class MessageCoalescer:
+    """
+    Folds messages asking for the same work into one
+
+    The first message for a key leads and is processed. Identical messages arriving
+    while it runs follow it and are settled with its outcome; identical messages
+    arriving within window seconds after it succeeded are acknowledged right away.
+    """
+
+    LEAD = 'lead'
+    FOLLOW = 'follow'
+    DONE = 'done'
+
+    def __init__(self, window: int = SCRAPER_COALESCE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._followers = {}
+        self._finished = OrderedDict()
+
+    def join(self, key: Any, message: Any) -> str:
+        """
+        Register a message for a key
 
-                if 'market' in tax_data:
-                    tax_record['market'] = tax_data.get('market', 0)
+        Args:
+            key: What the message asks for (see PropertyMapper.coalesce_key)
+            message: Handle used to settle the message once its leader finishes
 
-                # Check if record for this year already exists
-                if year in existing_years:
-                    # Update existing record
-                    self.odoo_request(
-                        'real_estate.tax_history', 'write',
-                        ids=[existing_years[year]],
-                        vals=tax_record
-                    )
-                    logger.debug(f"Updated tax history record for year {year}")
-                else:
-                    # Create new record
-                    create_response = self.odoo_request(
-                        'real_estate.tax_history', 'create',
-                        vals=tax_record
-                    )
-                    # Handle response - it could be a list or dict
-                    if isinstance(create_response, list):
-                        new_id = create_response[0] if create_response else None
-                    elif isinstance(create_response, dict):
-                        new_id = create_response.get('result')
-                        if isinstance(new_id, list):
-                            new_id = new_id[0] if new_id else None
-                    else:
-                        new_id = create_response
-                    logger.debug(f"Created new tax history record for year {year} with ID {new_id}")
-
-            logger.info(f"Completed processing tax history for property {property_id}")
+        Returns:
+            LEAD to process the message, FOLLOW if the leader will settle it, or DONE
+            if the same work just succeeded and the message can be acknowledged
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._finished and next(iter(self._finished.values())) < now - self.window:
+                self._finished.popitem(last=False)
+
+            if key in self._followers:
+                self._followers[key].append(message)
+                return self.FOLLOW
+
+            if key in self._finished:
+                return self.DONE
+
+            self._followers[key] = []
+            return self.LEAD
+
+    def finish(self, key: Any, succeeded: bool) -> List[Any]:
+        """End the lead of a key, returning the messages that followed it"""
+        with self._lock:
+            if succeeded:
+                self._finished[key] = time.monotonic()
+                self._finished.move_to_end(key)
+            return self._followers.pop(key, [])
+
+
+class VocabularyCache:
+    """
+    Preloaded name -> id map of a small, slowly growing model such as real_estate.tag
+
+    The whole model is loaded with one search_read and reloaded every
+    VOCABULARY_REFRESH_INTERVAL seconds. Unknown names are created in one batch.
+    """
+
+    def __init__(self, scraper: 'PropertyScraper', model: str, key_field: str,
+                 new_values: Callable[[str], Dict[str, Any]],
+                 refresh_interval: int = VOCABULARY_REFRESH_INTERVAL):
+        self.scraper = scraper
+        self.model = model
+        self.key_field = key_field
+        self.new_values = new_values
+        self.refresh_interval = refresh_interval
+
+        self._ids = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def load(self) -> bool:
+        """Reload every record of the model, returning whether it succeeded"""
+        response = self.scraper.odoo_request(self.model, 'search_read', domain=[], fields=['id', self.key_field])
+        if response is None:
+            logger.warning(f"Could not preload {self.model}")
+            return False
+
+        with self._lock:
+            self._ids = {
+                record[self.key_field]: record['id']
+                for record in reversed(self.scraper._response_records(response))
+                if record.get(self.key_field)
+            }
+            self._loaded_at = time.monotonic()
 
-        except Exception as e:
-            logger.error(f"Error processing tax history: {str(e)}")
-            # Continue with property creation even if tax history processing fails
+        logger.info(f"Preloaded {len(self._ids)} {self.model} records")
+        return True
 
-    def process_property_photos(self, property_id: int, photos_data: List[Dict[str, Any]],
-                                alt_photos_data: Optional[List[str]] = None) -> None:
+    def resolve(self, names: List[str]) -> Dict[str, int]:
         """
-        Process and store property photos
-        
+        Map names to record IDs, creating the unknown ones in a single call
+
         Args:
-            property_id: Odoo property record ID
-            photos_data: List of photo data dictionaries (preview images)
-            alt_photos_data: List of alt photo URLs (detailed images)
+            names: Names (values of key_field) to resolve
+
+        Returns:
+            Dictionary of name -> record ID for every name that could be resolved
         """
-        try:
-            # Check if photos_data is None or empty
-            if photos_data is None:
-                logger.warning(f"Photos data is None for property ID {property_id}")
-                return
+        names = list(dict.fromkeys(name for name in names if name))
 
-            if not photos_data:
-                logger.info(f"No photos to process for property ID {property_id}")
-                return
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+                self.load()
 
-            logger.info(f"Processing {len(photos_data)} photos for property ID {property_id}")
+            missing = [name for name in names if name not in self._ids]
+            if missing:
+                try:
+                    created = self.scraper.create_records(self.model, [self.new_values(name) for name in missing])
+                    self._ids.update(zip(missing, created))
+                    logger.info(f"Created {len(created)} {self.model} records")
+                except Exception as e:
+                    # Another worker may have created some of them meanwhile
+                    logger.warning(f"Could not create {self.model} records, reloading: {e}")
+                    self.load()
 
-            # First, get existing photos to avoid duplicates
-            existing_response = self.odoo_request(
-                'real_estate.photo', 'search_read',
-                domain=[['property_id', '=', property_id]],
-                fields=['preview_href']
-            )
-            # JSON-2 responses typically wrap data under "result"; be defensive
-            existing_photos: List[Dict[str, Any]] = []
-            if isinstance(existing_response, list):
-                existing_photos = existing_response
-            elif isinstance(existing_response, dict):
-                existing_photos = existing_response.get('result') or existing_response.get('records') or []
-
-            existing_preview_hrefs = [
-                p.get('preview_href') for p in existing_photos
-                if isinstance(p, dict) and p.get('preview_href')
-            ]
+            return {name: self._ids[name] for name in names if name in self._ids}
 
-            # Process each photo
-            for i, photo in enumerate(photos_data):
-                # Skip None photos or photos without href
-                if photo is None:
-                    logger.warning(f"Skipping None photo at index {i}")
-                    continue
 
-                # Normalize photo item which can be dict | str | list/tuple
-                href = ''
-                title = ''
-                tags = None
+class ChildReconciler:
+    """
+    Makes one child collection (photos, popularity, ...) of many listings match their scraped rows
 
-                if isinstance(photo, dict):
-                    href = str(photo.get('href') or photo.get('url') or '')
-                    title = photo.get('title', '') or ''
-                    tags = photo.get('tags')
-                elif isinstance(photo, str):
-                    href = str(photo)
-                elif isinstance(photo, (list, tuple)):
-                    # Common patterns: [href], [href, tags]
-                    if len(photo) > 0 and isinstance(photo[0], (str,)):
-                        href = str(photo[0])
-                    if len(photo) > 1:
-                        tags = photo[1]
-                else:
-                    logger.warning(f"Unexpected photo item type at index {i}: {type(photo)} - skipping")
-                    continue
-
-                # Skip photos without href or already existing photos
-                if not href or href in existing_preview_hrefs:
-                    logger.info(f"Skipping photo at index {i}: missing href or already exists")
-                    continue
-
-                # Get corresponding alt_photo URL if available
-                alt_photo_url = ''
-                if alt_photos_data and i < len(alt_photos_data):
-                    alt_val = alt_photos_data[i]
-                    alt_photo_url = str(alt_val) if alt_val else ''
-
-                # Prepare photo data
-                photo_data = {
-                    'property_id': property_id,
-                    'preview_href': href,  # Convert HttpUrl/other to string
-                    'href': str(alt_photo_url),  # Convert HttpUrl to string
-                    'title': title,  # Ensure title is never None
-                    'sequence': i + 1,
-                    'is_primary': i == 0  # First photo is primary
-                }
-
-                # Log the photo data for debugging
-                logger.info(f"Photo data for creation: {photo_data}")
-
-                # Create photo record
-                create_response = self.odoo_request(
-                    'real_estate.photo', 'create',
-                    vals=photo_data
-                )
-                photo_id = None
-                if isinstance(create_response, (int, str)):
-                    photo_id = int(create_response)
-                elif isinstance(create_response, dict):
-                    res = create_response.get('result') if create_response else None
-                    if isinstance(res, list) and res:
-                        photo_id = res[0]
-                    elif isinstance(res, int):
-                        photo_id = res
-
-                # Process tags if available
-                if tags:
-                    # Ensure tags is not None and is a list
-                    if isinstance(tags, list):
-                        self.process_photo_tags(photo_id, tags)
-                    else:
-                        logger.warning(f"Tags for photo {photo_id} is not a list: {type(tags)}")
-
-            logger.info(f"Successfully processed photos for property ID {property_id}")
+    Existing children of every listing are read with one search_read. Rows are matched
+    on key_fields; unmatched rows are created in one call, children no longer scraped
+    (and duplicates) are unlinked in one call, and changed children are written with
+    one write per listing.
+    """
 
-        except Exception as e:
-            logger.error(f"Error processing property photos: {str(e)}")
-            # Continue with property creation/update even if photo processing fails
+    def __init__(self, scraper: 'PropertyScraper', model: str, relation_field: str, key_fields: tuple,
+                 order: str = 'id'):
+        self.scraper = scraper
+        self.model = model
+        self.relation_field = relation_field
+        self.key_fields = key_fields
+        self.order = order
+
+    def row_key(self, values: Dict[str, Any]) -> tuple:
+        """Identify a row (or an existing child) within its listing"""
+        return tuple(str(values.get(field) or '') for field in self.key_fields)
 
-    def process_photo_tags(self, photo_id: int, tags_data: List[Dict[str, Any]]) -> None:
+    def reconcile(self, rows_by_listing: Dict[int, List[Dict[str, Any]]]) -> Dict[str, int]:
         """
-        Process and store photo tags
-        
+        Reconcile the children of many listings
+
         Args:
-            photo_id: Odoo photo record ID
-            tags_data: List of tag data dictionaries
+            rows_by_listing: Mapping of listing ID -> scraped rows. Listings without rows
+                             are left untouched, as an empty section means missing data
+
+        Returns:
+            Dictionary with the number of children created, updated and deleted
         """
+        rows_by_listing = {property_id: rows for property_id, rows in rows_by_listing.items() if rows}
+        if not rows_by_listing:
+            return {'created': 0, 'updated': 0, 'deleted': 0}
+
+        # Rows repeating a key collapse to the last one
+        wanted = {
+            property_id: {self.row_key(row): dict(row, property_id=property_id) for row in rows}
+            for property_id, rows in rows_by_listing.items()
+        }
+
+        response = self.scraper.odoo_request(
+            self.model, 'search_read',
+            domain=[['property_id', 'in', list(rows_by_listing)]],
+            fields=self.scraper.row_fields([row for rows in rows_by_listing.values() for row in rows]),
+            order=self.order
+        )
+        if response is None:
+            raise Exception(f"Could not read the {self.model} records of {len(rows_by_listing)} listings")
+
+        current = {}
+        matched = {property_id: {} for property_id in wanted}
+        stale_ids = []
+
+        for record in self.scraper._response_records(response):
+            property_id = record['property_id']
+            if isinstance(property_id, (list, tuple)):
+                property_id = property_id[0]
+
+            key = self.row_key(record)
+            if key in wanted.get(property_id, {}) and key not in matched[property_id]:
+                matched[property_id][key] = record['id']
+                current[record['id']] = record
+            else:
+                stale_ids.append(record['id'])
+
+        self.scraper.delete_records(self.model, stale_ids)
+
+        updated = 0
+        for property_id, record_ids in matched.items():
+            updated += self.scraper.update_child_records(
+                property_id, self.model, self.relation_field,
+                {record_id: wanted[property_id][key] for key, record_id in record_ids.items()},
+                current=current
+            )
+
+        created = self.scraper.create_records(self.model, [
+            row
+            for property_id, rows in wanted.items()
+            for key, row in rows.items()
+            if key not in matched[property_id]
+        ])
+
+        return {'created': len(created), 'updated': updated, 'deleted': len(stale_ids)}
+
+
+class UpsertUnavailableError(Exception):
+    """Raised when the Odoo addon does not provide the single-call listing upsert"""
+
+
+class PropertyMapper:
+    """
+    Scraping and mapping of HomeHarvest properties to Odoo values
+
+    Holds no connections, so it is shared by the blocking PropertyScraper and the
+    asyncio runtime in async_scraper.py. Subclasses provide self.identity_cache,
+    self.fingerprints, self.scrape_cache and self.rate_limiter.
+    """
+
+    # How listings are identified and their children matched, until Odoo serves its own (see apply_sync_spec)
+    identity_key_fields = IDENTITY_KEY_FIELDS
+    child_collections = CHILD_COLLECTIONS
+
+    def apply_sync_spec(self, spec: Optional[Dict[str, Any]]) -> None:
+        """
+        Identify listings and match their children the way the addon does
+
+        Args:
+            spec: Result of real_estate.listing/scraper_sync_spec, or None when the addon
+                  does not serve it (the built-in IDENTITY_KEY_FIELDS and CHILD_COLLECTIONS are kept)
+        """
+        if not spec:
+            logger.info("Odoo does not serve real_estate.listing/scraper_sync_spec, using the built-in sync spec")
+            return
+
+        self.identity_key_fields = tuple(tuple(field_names) for field_names in spec['identity_keys'])
+        self.child_collections = {
+            section: (collection['model'], collection['field'], tuple(collection['key_fields']))
+            for section, collection in spec['child_collections'].items()
+        }
+
+    def parse_message(self, body: Any) -> tuple:
+        """
+        Extract the scraping parameters from a RabbitMQ message body
+
+        Args:
+            body: Message body (JSON)
+
+        Returns:
+            Tuple of (location, listing_type, record_id, force_refresh, scrape_property kwargs,
+            listings to refresh from one area search (empty for other messages))
+
+        Raises:
+            json.JSONDecodeError: If the body is not valid JSON
+        """
+        message = json.loads(body)
+
+        # Extract scraping parameters from message
+        location = message.get('location')
+        listing_type = message.get('listing_type', 'for_sale')
+        record_id = message.get('record_id')  # Extract record_id if provided
+        force_refresh = bool(message.get('force_refresh'))  # Write even if the listing looks unchanged
+        refresh = [target for target in message.get('refresh') or [] if target.get('record_id')]
+
+        if refresh:
+            logger.info(f"Bulk refresh of {len(refresh)} listings in {location}.")
+        elif record_id:
+            logger.info(f"Record ID provided: {record_id}. Will update this specific record.")
+            message['limit'] = 1
+        else:
+            logger.info("No record ID provided. Will search for existing record or create new one.")
+
+        # Extract additional parameters and filter out unsupported parameters like 'source_url'
+        kwargs = {
+            k: v for k, v in message.items()
+            if k not in [
+                'location',
+                'listing_type',
+                'record_id',
+                'force_refresh',
+                'source_url',
+                'refresh'
+            ]
+        }
+
+        return location, listing_type, record_id, force_refresh, kwargs, refresh
+
+    def scrape_property(self, location: str, listing_type: str = "for_sale", **kwargs) -> List[Any]:
+        """
+        Scrape property data using HomeHarvest with Pydantic models
+
+        Identical searches within SCRAPE_CACHE_TTL are answered from the local result cache.
+        Other searches wait for the host-wide rate limit, up to SCRAPE_MAX_WAIT; a throttled
+        search pauses the rate limiter and raises, and the message is requeued once the
+        backoff has passed rather than waiting for it here.
+        
+        Args:
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            **kwargs: Additional parameters for the search
+            
+        Returns:
+            List of Property Pydantic models
+
+        Raises:
+            ScrapeThrottledError: If upstream throttled the search, or searches are paused
+        """
+        logger.info(f"Scraping property data for location: {location}, type: {listing_type}")
         try:
-            # Ensure tags_data is not None
-            if tags_data is None:
-                logger.warning(f"Tags data is None for photo ID {photo_id}")
+            cache_key = None
+            if self.scrape_cache is not None:
+                cache_key = query_key(location, listing_type, kwargs)
+                properties = self.scrape_cache.get(cache_key)
+
+                SCRAPE_CACHE.labels('miss' if properties is None else 'hit').inc()
+                if properties is not None:
+                    logger.info(f"Reusing {len(properties)} cached properties")
+                    return properties
+
+            # Always use Pydantic models for return type
+            kwargs['return_type'] = 'pydantic'
+
+            if self.rate_limiter is not None:
+                RATE_LIMIT_WAIT.observe(self.rate_limiter.acquire())
+
+            # Use HomeHarvest to scrape property data
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                properties = scrape_property(
+                    location=location,
+                    listing_type=listing_type,
+                    **kwargs
+                )
+                outcome = 'ok'
+            except Exception as e:
+                if self.rate_limiter is None or not is_throttling_error(e):
+                    raise
+
+                outcome = 'throttled'
+                backoff = self.rate_limiter.throttled()
+                raise ScrapeThrottledError(
+                    f"HomeHarvest throttled the search of {location} ({e})", retry_after=backoff) from e
+            finally:
+                HOMEHARVEST_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.succeeded()
+
+            logger.info(f"Successfully scraped {len(properties)} properties")
+
+            if cache_key is not None:
+                self.scrape_cache.set(cache_key, properties)
+
+            return properties
+        except Exception as e:
+            logger.error(f"Error scraping properties: {str(e)}")
+            raise
+
+    def scrape_pages(self, location: str, listing_type: str = "for_sale", start_page: int = 0,
+                     **kwargs) -> Iterator[List[Any]]:
+        """
+        Scrape property data page by page, yielding each page as soon as HomeHarvest fetched it
+
+        A cached search is yielded as a single page. A search that streams to completion
+        is cached too, compressed page by page as it arrives rather than held; a resumed
+        search is not, another attempt fetched its first pages. Earlier pages may already
+        be written when upstream throttles a later one, so a throttled stream is not
+        retried here: it pauses the rate limiter and raises, and the requeued message
+        repeats the search (fingerprints make the pages already written cheap to repeat).
+
+        Args:
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            start_page: Index of the first page to fetch, to resume an earlier search
+            **kwargs: Additional parameters for the search
+
+        Returns:
+            Iterator of lists of Property Pydantic models
+
+        Raises:
+            ScrapeThrottledError: If upstream throttled the search
+        """
+        logger.info(f"Streaming property data for location: {location}, type: {listing_type}, from page {start_page}")
+
+        cached = None
+        if self.scrape_cache is not None and not start_page:
+            cache_key = query_key(location, listing_type, kwargs)
+            properties = self.scrape_cache.get(cache_key)
+
+            SCRAPE_CACHE.labels('miss' if properties is None else 'hit').inc()
+            if properties is not None:
+                logger.info(f"Reusing {len(properties)} cached properties")
+                yield properties
                 return
 
-            logger.info(f"Processing {len(tags_data)} tags for photo ID {photo_id}")
-            tag_ids = []
+            cached = self.scrape_cache.writer(cache_key)
+
+        if self.rate_limiter is not None:
+            RATE_LIMIT_WAIT.observe(self.rate_limiter.acquire())
+
+        kwargs['return_type'] = 'pydantic'
+        pages = iter_property_pages(location, listing_type, SCRAPE_STREAM_PREFETCH, start_page, **kwargs)
+
+        # Only the time spent waiting for pages counts as HomeHarvest time
+        fetching = 0.0
+        found = 0
+        outcome = 'error'
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    page = next(pages, None)
+                finally:
+                    fetching += time.perf_counter() - start
+
+                if page is None:
+                    break
+
+                found += len(page)
+                logger.info(f"Scraped a page of {len(page)} properties ({found} so far)")
+                if cached is not None:
+                    cached.add(page)
+                yield page
+
+            outcome = 'ok'
+        except Exception as e:
+            if self.rate_limiter is None or not is_throttling_error(e):
+                logger.error(f"Error scraping properties: {str(e)}")
+                raise
+
+            outcome = 'throttled'
+            backoff = self.rate_limiter.throttled()
+            raise ScrapeThrottledError(
+                f"HomeHarvest throttled the search of {location} after {found} properties",
+                retry_after=backoff) from e
+        finally:
+            HOMEHARVEST_SECONDS.labels(outcome).observe(fetching)
+            pages.close()
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.succeeded()
+
+        logger.info(f"Successfully scraped {found} properties")
+
+        if cached is not None:
+            cached.commit()
+
+    def search_pages(self, location: str, listing_type: str, record_id: Optional[int], kwargs: Dict[str, Any],
+                     start_page: int = 0) -> Iterator[tuple]:
+        """
+        Search a location, page by page if the search is streamed
+
+        Searches for a record are never streamed; they return a single page.
+
+        Args:
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            record_id: Optional record ID for direct update
+            kwargs: Additional parameters for the search
+            start_page: Index of the first page to fetch, to resume an earlier search
+
+        Returns:
+            Iterator of (page index, list of Property Pydantic models)
+        """
+        if record_id or not SCRAPE_STREAM_PAGES:
+            if not start_page:
+                yield 0, self.scrape_property(location, listing_type, **kwargs)
+            return
+
+        yield from enumerate(self.scrape_pages(location, listing_type, start_page, **kwargs), start_page)
+
+    def checkpointed_pages(self, checkpoint: Checkpoint, location: str, listing_type: str,
+                           kwargs: Dict[str, Any]) -> Iterator[tuple]:
+        """
+        Yield the pages of a checkpointed search: first the pages an earlier attempt
+        fetched but did not completely write, then the pages it did not fetch, each
+        stored in the checkpoint as it arrives
+
+        Args:
+            checkpoint: Checkpoint of the search (see checkpoints.CheckpointStore.open)
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            kwargs: Additional parameters for the search
+
+        Returns:
+            Iterator of (page index, list of Property Pydantic models)
+        """
+        if checkpoint.resumed:
+            logger.info(
+                f"Resuming the search at page {checkpoint.next_page}, "
+                f"{len(checkpoint.written)} listings were already written")
+            CHECKPOINTS.labels('resumed').inc()
+
+        yield from self.checkpoints.pages(checkpoint)
+
+        if checkpoint.fetched_all:
+            return
+
+        for index, properties in self.search_pages(location, listing_type, None, kwargs, checkpoint.next_page):
+            self.checkpoints.save_page(checkpoint, index, properties)
+            yield index, properties
+
+        self.checkpoints.fetched_all(checkpoint)
+
+    def skip_written(self, checkpoint: Optional[Checkpoint], properties: List[Any]) -> tuple:
+        """
+        Leave out the properties a resumed search already wrote
+
+        Returns:
+            Tuple of (properties still to write, Odoo ids of the ones left out)
+        """
+        if checkpoint is None or not checkpoint.written:
+            return properties, []
+
+        written_ids = [checkpoint.written[p.property_id] for p in properties if p.property_id in checkpoint.written]
+        if written_ids:
+            logger.info(f"Skipping {len(written_ids)} properties written before the search was interrupted")
+            properties = [p for p in properties if p.property_id not in checkpoint.written]
+
+        return properties, written_ids
+
+    def interrupted(self, checkpoint: Optional[Checkpoint], location: str, error: Exception) -> Exception:
+        """
+        Tell whether a failed search can be resumed, returning the error to raise
+
+        A search is worth retrying only if the failed attempt fetched or wrote part of
+        it; otherwise the next attempt would fail the same way.
+        """
+        if checkpoint is None or not checkpoint.progress or isinstance(error, ScrapeThrottledError):
+            return error
+
+        CHECKPOINTS.labels('interrupted').inc()
+        return IngestInterruptedError(
+            f"The search of {location} failed after {len(checkpoint.written)} listings ({error}), "
+            f"it will resume at page {checkpoint.next_page}")
+
+    def coalesce_key(self, location: str, listing_type: str, record_id: Optional[int],
+                     kwargs: Dict[str, Any], refresh: Optional[List[Dict[str, Any]]] = None,
+                     force_refresh: bool = False) -> tuple:
+        """
+        Identify the work a message asks for: refreshing one listing, one search, or an area's listings
+
+        A forced refresh is different work from a normal one (it writes unchanged
+        listings too), so it is never folded into a normal run of the same request.
+        """
+        if refresh:
+            key = ('refresh', query_key(location, listing_type, kwargs),
+                   tuple(sorted(target['record_id'] for target in refresh)))
+        elif record_id:
+            key = ('id', record_id)
+        else:
+            key = ('query', query_key(location, listing_type, kwargs))
+        return key + ('force',) if force_refresh else key
+
+    def refresh_match_keys(self, values: Dict[str, Any]) -> List[tuple]:
+        """
+        Keys matching a listing of a bulk refresh message to a scraped property, in
+        order of precedence (see REFRESH_MATCH_FIELDS)
+
+        Args:
+            values: Listing from the message, or the identity of a scraped property
+
+        Returns:
+            List of (fields, normalized values...) tuples
+        """
+        keys = []
+        for field_names in REFRESH_MATCH_FIELDS:
+            parts = tuple(' '.join(str(values.get(field_name) or '').lower().split()) for field_name in field_names)
+            if all(parts):
+                keys.append((field_names,) + parts)
+        return keys
+
+    def match_refresh_targets(self, properties: List[Any], targets: List[Dict[str, Any]]) -> tuple:
+        """
+        Match the properties found by an area search to the listings a bulk refresh
+        message asks for; properties matching none of them are left out
+
+        Args:
+            properties: List of Property Pydantic models
+            targets: Listings from the message (record_id and their identity fields)
+
+        Returns:
+            Tuple of (list of (property, record_id) pairs, list of targets no property matched)
+        """
+        target_by_key = {}
+        for target in targets:
+            for key in self.refresh_match_keys(target):
+                target_by_key.setdefault(key, target)
+
+        matches = []
+        matched_ids = set()
+        for property_model in properties:
+            prop = property_model.model_dump(include=IDENTITY_SOURCE_FIELDS | {'mls_id'})
+            identity = dict(self.map_identity(prop), mls_id=prop.get('mls_id'))
+
+            for key in self.refresh_match_keys(identity):
+                target = target_by_key.get(key)
+                if target and target['record_id'] not in matched_ids:
+                    matched_ids.add(target['record_id'])
+                    matches.append((property_model, target['record_id']))
+                    break
+
+        unmatched = [target for target in targets if target['record_id'] not in matched_ids]
+
+        REFRESH_LISTINGS.labels('matched').inc(len(matches))
+        REFRESH_LISTINGS.labels('fallback').inc(len(unmatched))
+        logger.info(
+            f"Matched {len(matches)} of {len(targets)} listings to the {len(properties)} properties found")
+        return matches, unmatched
+
+    def identity_keys(self, odoo_property: Dict[str, Any]) -> List[tuple]:
+        """
+        List the identity cache keys of a mapped listing, in order of precedence
+
+        Args:
+            odoo_property: Mapped listing values
+
+        Returns:
+            List of (field, value, ...) tuples, one per group of identity_key_fields
+        """
+        return [
+            tuple(part for field_name in field_names for part in (field_name, odoo_property[field_name]))
+            for field_names in self.identity_key_fields
+            if all(odoo_property.get(field_name) for field_name in field_names)
+        ]
+
+    def identity_domain(self, field_names: tuple, keys: List[tuple]) -> List[list]:
+        """
+        Domain of a bulk search for listings by a group of identity_key_fields
+
+        Records may match a combination of values that is not one of the keys, so
+        results must be matched back on all of the group's fields.
+
+        Args:
+            field_names: Group of identity fields
+            keys: Values of the group's fields per listing
+
+        Returns:
+            Domain with one 'in' leaf per field
+        """
+        return [[field_name, 'in', list(dict.fromkeys(key[n] for key in keys))]
+                for n, field_name in enumerate(field_names)]
+
+    def lookup_cached_identity(self, odoo_property: Dict[str, Any]) -> Optional[int]:
+        """Return the cached Odoo id of a mapped listing, if any of its identity keys is cached"""
+        for key in self.identity_keys(odoo_property):
+            record_id = self.identity_cache.get(key)
+            if record_id:
+                return record_id
+        return None
+
+    def remember_identity(self, odoo_property: Dict[str, Any], record_id: int) -> None:
+        """Cache the Odoo id under every identity key of a mapped listing"""
+        for key in self.identity_keys(odoo_property):
+            self.identity_cache.set(key, record_id)
+
+    def forget_identity(self, odoo_property: Dict[str, Any]) -> None:
+        """Drop every identity key of a mapped listing from the cache"""
+        for key in self.identity_keys(odoo_property):
+            self.identity_cache.discard(key)
+
+    def message_lock_keys(self, location: str, record_id: Optional[int] = None) -> List[tuple]:
+        """
+        Lock keys of a scrape request; two messages sharing one are never handled at once
+
+        Args:
+            location: Location from the message
+            record_id: Optional record ID from the message
+
+        Returns:
+            List of lock keys
+        """
+        keys = [('location', ' '.join(str(location).lower().split()))]
+        if record_id:
+            keys.append(('id', record_id))
+        return keys
+
+    def listing_lock_keys(self, payload: Dict[str, Any]) -> List[tuple]:
+        """
+        Lock keys of a mapped property; held while it is written so that concurrent
+        messages never create the same listing twice or interleave its child writes
+
+        Args:
+            payload: Mapped property from build_listing_payload
+
+        Returns:
+            List of lock keys
+        """
+        listing = payload['listing']
+        keys = [(field_name, listing[field_name]) for field_name in LISTING_LOCK_FIELDS if listing.get(field_name)]
+        if payload['record_id']:
+            keys.append(('id', payload['record_id']))
+        return keys
+
+    def skip_unchanged_sections(self, payload: Dict[str, Any], force_refresh: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Compare a payload with the fingerprint last written for its listing and empty
+        the sections that did not change, so they are not sent to Odoo
+
+        Nothing is skipped unless the payload targets the same Odoo record the stored
+        fingerprint was written to.
+
+        Args:
+            payload: Mapped property from build_listing_payload
+            force_refresh: Keep every section
+
+        Returns:
+            Fingerprint of the payload, or None if the whole listing is unchanged
+        """
+        fingerprint = payload_fingerprint(payload)
+        property_id = payload['listing'].get('property_id')
+
+        if force_refresh or self.fingerprints is None or not property_id or not payload['record_id']:
+            return fingerprint
+
+        stored = self.fingerprints.get(property_id)
+        if stored is None or stored[0] != payload['record_id']:
+            return fingerprint
+
+        sections = stored[1]
+        if sections.get('overall') == fingerprint['overall']:
+            return None
+
+        for section in FINGERPRINT_SECTIONS[1:]:
+            if sections.get(section) == fingerprint[section]:
+                payload[section] = []
+
+        # The listing values are always sent for identity; Odoo skips unchanged fields
+        if sections.get('listing') == fingerprint['listing']:
+            payload['tags'] = []
+            payload['schools'] = []
+
+        return fingerprint
+
+    def remember_fingerprint(self, payload: Dict[str, Any], record_id: int, fingerprint: Dict[str, str],
+                             failed_sections: Iterable[str] = ()) -> None:
+        """
+        Store the fingerprint of a payload once it was written to Odoo
+
+        Args:
+            payload: Mapped property from build_listing_payload
+            record_id: Odoo id the payload was written to
+            fingerprint: Result of skip_unchanged_sections
+            failed_sections: Sections that could not be written; they are left
+                             without a fingerprint, so the next scrape sends them again
+        """
+        property_id = payload['listing'].get('property_id')
+        if self.fingerprints is None or not property_id:
+            return
+
+        failed_sections = set(failed_sections)
+        if failed_sections:
+            fingerprint = {
+                section: None if section in failed_sections or section == 'overall' else digest
+                for section, digest in fingerprint.items()
+            }
+        self.fingerprints.set(property_id, record_id, fingerprint)
+
+    def diff_values(self, current: Dict[str, Any], vals: Dict[str, Any],
+                    field_types: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Return the values that differ from a record's current values
+
+        Args:
+            current: Values as returned by Odoo read/search_read
+            vals: Values about to be written
+            field_types: Field name -> Odoo field type (see fields_get)
+
+        Returns:
+            Dictionary with the changed values; fields missing from current count as changed
+        """
+        changes = {}
+
+        for name, value in vals.items():
+            if name not in current:
+                changes[name] = value
+                continue
+
+            field_type = field_types.get(name)
+            if self.normalize_value(value, field_type) != self.normalize_value(current[name], field_type):
+                changes[name] = value
+
+        return changes
+
+    def normalize_value(self, value: Any, field_type: Optional[str]) -> Any:
+        """
+        Bring a written or read field value to a comparable form
+
+        Empty values ('', False, 0, []) are all None, x2many (6, 0, ids) commands and
+        read id lists become sets, many2one [id, name] pairs become ids, monetary
+        amounts are rounded to cents and dates/datetimes are compared as strings.
+        Other commands never compare equal, so they are always written.
+        """
+        if not value:
+            return None
+
+        if isinstance(value, list) and all(isinstance(item, (list, tuple)) for item in value):
+            if all(len(item) == 3 and item[0] == 6 for item in value):
+                return frozenset(value[-1][2]) or None
+            return object()
+
+        if field_type in ('one2many', 'many2many'):
+            return frozenset(value)
+
+        if field_type == 'many2one':
+            return value[0] if isinstance(value, (list, tuple)) else value
+
+        try:
+            if field_type == 'monetary':
+                return round(float(value), 2)
+            if field_type == 'float':
+                return float(value)
+            if field_type == 'integer':
+                return int(value)
+        except (TypeError, ValueError):
+            return value
+
+        if field_type == 'date':
+            return str(value)[:10]
+        if field_type == 'datetime':
+            return str(value)[:19]
+
+        return value
+
+    def map_properties(self, properties: List[Any], record_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Map scraped properties to upsert payloads, in order
+
+        Results larger than MAPPING_BATCH_SIZE are split into batches mapped by the
+        MAPPING_WORKERS process pool, so the caller can write the first batch while
+        the others are still being mapped.
+
+        Args:
+            properties: List of Property Pydantic models
+            record_id: Optional record ID for direct update
+
+        Returns:
+            Iterator of payloads (see build_listing_payload)
+        """
+        if not MAPPING_WORKERS or len(properties) <= MAPPING_BATCH_SIZE:
+            for property_model in properties:
+                yield self.build_listing_payload(property_model, record_id)
+            return
+
+        batches = [properties[start:start + MAPPING_BATCH_SIZE]
+                   for start in range(0, len(properties), MAPPING_BATCH_SIZE)]
+        logger.info(f"Mapping {len(properties)} properties in {len(batches)} batches with {MAPPING_WORKERS} processes")
+
+        for payloads in get_mapping_pool().map(map_property_batch, batches, repeat(record_id, len(batches))):
+            yield from payloads
+
+    def build_listing_payload(self, property_model: Any, record_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Map a HomeHarvest property to the payload accepted by upsert_scraped_listing
+
+        Args:
+            property_model: Pydantic model from homeharvest
+            record_id: Optional record ID for direct update
+
+        Returns:
+            Dictionary with the listing values, relation names and child rows
+        """
+        # The only dump of the model; every part of the payload is mapped from it
+        property_data = property_model.model_dump(include=PAYLOAD_SOURCE_FIELDS)
+        sections = self.extract_child_sections(property_data)
+
+        return {
+            'record_id': record_id,
+            'listing': self.map_property_to_odoo(property_data),
+            'tags': [tag for tag in property_data.get('tags') or [] if tag and isinstance(tag, str)],
+            'schools': [name for name in property_data.get('nearby_schools') or [] if name],
+            'photos': self.map_photo_rows(sections['photos'], sections['alt_photos']),
+            'popularity': self.map_popularity_rows(sections['popularity']),
+            'features': self.map_feature_rows(sections['features']),
+            'estimates': self.map_estimate_rows(sections['estimates']),
+            'tax_history': self.map_tax_history_rows(sections['tax_history']),
+        }
+
+    def extract_child_sections(self, property_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pull the raw child collections out of a dumped HomeHarvest property
+
+        Args:
+            property_data: Result of property_model.model_dump()
+
+        Returns:
+            Dictionary with photos, alt_photos, popularity, tax_history, features and estimates
+        """
+        description = property_data.get('description') or {}
+
+        return {
+            'photos': property_data.get('photos'),
+            'alt_photos': description.get('alt_photos'),
+            'popularity': property_data.get('popularity'),
+            'tax_history': property_data.get('tax_history'),
+            'features': property_data.get('details'),
+            'estimates': property_data.get('estimates'),
+        }
+
+    def map_popularity_rows(self, popularity_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Map HomeHarvest popularity periods to real_estate.popularity values
+
+        Args:
+            popularity_data: Dictionary containing popularity metrics
+
+        Returns:
+            List of popularity values, one per period
+        """
+        rows = []
+
+        for period in (popularity_data or {}).get('periods') or []:
+            last_n_days = period.get('last_n_days')
+
+            # Skip if last_n_days is not available
+            if not last_n_days:
+                continue
+
+            rows.append({
+                'last_n_days': last_n_days,
+                'views_total': period.get('views_total', 0) or 0,
+                'clicks_total': period.get('clicks_total', 0) or 0,
+                'saves_total': period.get('saves_total', 0) or 0,
+                'shares_total': period.get('shares_total', 0) or 0,
+                'leads_total': period.get('leads_total', 0) or 0,
+                'dwell_time_mean': period.get('dwell_time_mean', 0.0) or 0.0,
+                'dwell_time_median': period.get('dwell_time_median', 0.0) or 0.0,
+            })
+
+        return rows
+
+    def map_feature_rows(self, features_data: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Map HomeHarvest details to real_estate.feature values
+
+        Args:
+            features_data: List of feature data dictionaries with category, parent_category, and text fields
+
+        Returns:
+            List of feature values
+        """
+        rows = []
+
+        for feature_data in features_data or []:
+            category = feature_data.get('category', '')
+
+            if not category:
+                logger.warning(f"Feature record missing category, skipping: {feature_data}")
+                continue
+
+            rows.append({
+                'category': category,
+                'parent_category': feature_data.get('parent_category', ''),
+                'text_items': json.dumps(feature_data.get('text', [])),
+            })
+
+        return rows
+
+    def map_estimate_rows(self, estimates_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Map HomeHarvest current value estimates to real_estate.estimate values
+
+        Args:
+            estimates_data: Dictionary containing property value estimates
+
+        Returns:
+            List of estimate values
+        """
+        rows = []
+
+        for estimate_data in (estimates_data or {}).get('current_values') or []:
+            date_value = estimate_data.get('date')
+            if not date_value:
+                logger.warning(f"Estimate record missing date, skipping: {estimate_data}")
+                continue
+
+            # Convert datetime to date string
+            if isinstance(date_value, datetime):
+                date_str = date_value.strftime('%Y-%m-%d')
+            else:
+                date_str = str(date_value).split(' ')[0]  # Get just the date part
+
+            # Get source information
+            source = estimate_data.get('source') or {}
+
+            rows.append({
+                'date': date_str,
+                'estimate': estimate_data.get('estimate', 0),
+                'estimate_high': estimate_data.get('estimate_high', 0),
+                'estimate_low': estimate_data.get('estimate_low', 0),
+                'is_best_home_value': estimate_data.get('is_best_home_value', False),
+                'source_name': source.get('name', ''),
+                'source_type': source.get('type', ''),
+            })
+
+        return rows
+
+    def map_tax_history_rows(self, tax_history_data: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Map HomeHarvest tax history to real_estate.tax_history values
+
+        Args:
+            tax_history_data: List of tax history data dictionaries
+
+        Returns:
+            List of tax history values
+        """
+        rows = []
+
+        for tax_data in tax_history_data or []:
+            year = tax_data.get('year')
+
+            if not year:
+                logger.warning(f"Tax history record missing year, skipping: {tax_data}")
+                continue
+
+            tax_record = {
+                'year': year,
+                'tax': tax_data.get('tax', 0),
+                'assessed_year': tax_data.get('assessed_year'),
+                'value': self.assessment_amount(tax_data.get('value'))
+            }
+
+            # Handle assessment data if present
+            assessment = tax_data.get('assessment', {})
+            if assessment:
+                tax_record.update({
+                    'assessment_total': assessment.get('total', 0),
+                    'assessment_building': assessment.get('building', 0),
+                    'assessment_land': assessment.get('land', 0)
+                })
+
+            # Add other fields if present
+            if 'appraisal' in tax_data:
+                tax_record['appraisal'] = self.assessment_amount(tax_data.get('appraisal'))
+
+            if 'market' in tax_data:
+                tax_record['market'] = self.assessment_amount(tax_data.get('market'))
+
+            rows.append(tax_record)
+
+        return rows
+
+    def assessment_amount(self, value: Any) -> float:
+        """
+        Reduce a HomeHarvest assessment value to a monetary amount
+
+        Args:
+            value: Number or Assessment dictionary with building/land/total
+
+        Returns:
+            The amount (the assessment total for dictionaries)
+        """
+        if isinstance(value, dict):
+            value = value.get('total')
+        return value or 0
+
+    def map_photo_rows(self, photos_data: Optional[List[Any]],
+                       alt_photos_data: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Map HomeHarvest photos to real_estate.photo values
+
+        Args:
+            photos_data: List of photo data dictionaries (preview images)
+            alt_photos_data: List of alt photo URLs (detailed images)
+
+        Returns:
+            List of photo values, each with the photo's tag labels under 'tags'
+        """
+        rows = []
+        seen_hrefs = set()
+
+        for i, photo in enumerate(photos_data or []):
+            # Skip None photos or photos without href
+            if photo is None:
+                logger.warning(f"Skipping None photo at index {i}")
+                continue
+
+            # Normalize photo item which can be dict | str | list/tuple
+            href = ''
+            title = ''
+            tags = None
+
+            if isinstance(photo, dict):
+                href = str(photo.get('href') or photo.get('url') or '')
+                title = photo.get('title', '') or ''
+                tags = photo.get('tags')
+            elif isinstance(photo, str):
+                href = str(photo)
+            elif isinstance(photo, (list, tuple)):
+                # Common patterns: [href], [href, tags]
+                if len(photo) > 0 and isinstance(photo[0], (str,)):
+                    href = str(photo[0])
+                if len(photo) > 1:
+                    tags = photo[1]
+            else:
+                logger.warning(f"Unexpected photo item type at index {i}: {type(photo)} - skipping")
+                continue
+
+            # Skip photos without href or repeated within the listing
+            if not href or href in seen_hrefs:
+                logger.debug(f"Skipping photo at index {i}: missing or repeated href")
+                continue
+
+            seen_hrefs.add(href)
+
+            # Get corresponding alt_photo URL if available
+            alt_photo_url = ''
+            if alt_photos_data and i < len(alt_photos_data):
+                alt_val = alt_photos_data[i]
+                alt_photo_url = str(alt_val) if alt_val else ''
+
+            if tags is not None and not isinstance(tags, list):
+                logger.warning(f"Tags for photo at index {i} is not a list: {type(tags)}")
+                tags = None
+
+            rows.append({
+                'preview_href': href,  # Convert HttpUrl/other to string
+                'href': str(alt_photo_url),  # Convert HttpUrl to string
+                'title': title,  # Ensure title is never None
+                'sequence': i + 1,
+                'is_primary': i == 0,  # First photo is primary
+                'tags': self.photo_tag_labels(tags),
+            })
+
+        return rows
+
+    def photo_tag_labels(self, tags_data: Optional[List[Any]]) -> List[str]:
+        """
+        Normalize HomeHarvest photo tags to a list of labels
+
+        Args:
+            tags_data: List of tag data dictionaries or strings
+
+        Returns:
+            List of unique tag labels
+        """
+        labels = []
+
+        for tag_data in tags_data or []:
+            if tag_data is None:
+                continue
+
+            # Handle different tag data formats
+            if isinstance(tag_data, dict):
+                tag_label = tag_data.get('label', '')
+            elif isinstance(tag_data, str):
+                tag_label = tag_data
+            else:
+                logger.warning(f"Unexpected tag data type: {type(tag_data)}, value: {tag_data}")
+                continue
+
+            if tag_label and tag_label not in labels:
+                labels.append(tag_label)
+
+        return labels
+
+    def new_listing_tag_values(self, api_name: str) -> Dict[str, Any]:
+        """
+        Values for a scraper-generated real_estate.tag
+
+        Args:
+            api_name: Tag name from the listing source (e.g., 'community_gym')
+
+        Returns:
+            Dictionary of tag values
+        """
+        return {
+            # Convert api_name to display name (e.g., 'community_gym' -> 'Community Gym')
+            'name': ' '.join(word.capitalize() for word in api_name.split('_')),
+            'api_name': api_name,
+            'tag_type': 'listing',  # mark scraper-generated tags
+        }
+
+    @cached_property
+    def listing_converter(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """Listing field mapping (see listing_mapping.LISTING_FIELDS), compiled on first use"""
+        return compile_listing_mapping(dict(
+            COERCERS,
+            status=self.map_status,
+            property_type=self.map_property_type,
+            datetime=self.format_datetime,
+        ))
+
+    def map_property_to_odoo(self, prop: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map a dumped HomeHarvest property to Odoo model fields
+
+        Args:
+            prop: Dumped HomeHarvest property (at least PAYLOAD_SOURCE_FIELDS)
+            
+        Returns:
+            Dictionary with Odoo field mappings
+        """
+        odoo_property = {name: value for name, value in self.map_identity(prop).items() if value is not None}
+        odoo_property.update(self.listing_converter(prop))
+
+        return odoo_property
+
+    def map_address_components(self, address: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Extract address components from a dumped HomeHarvest address
+
+        Args:
+            address: Address dictionary (may be None)
+
+        Returns:
+            Dictionary with address components
+        """
+        if not address:
+            return {}
+
+        return {
+            'street': address.get('street', ''),
+            'unit': address.get('unit', ''),
+            'city': address.get('city', ''),
+            'state': address.get('state', ''),
+            'zip_code': address.get('zip', ''),
+            'formatted_address': address.get('formatted_address', '')
+        }
+
+    def payload_identity(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Read the identity fields (see IDENTITY_FIELDS) back from a mapped payload
+
+        Args:
+            payload: Mapped property from build_listing_payload
+
+        Returns:
+            Dictionary with the Odoo identity fields
+        """
+        listing = payload['listing']
+        return {field_name: listing.get(field_name, '') for field_name in IDENTITY_FIELDS}
+
+    def map_identity(self, prop: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Map the fields identifying a listing (property_id, mls, url, address)
+
+        Args:
+            prop: Dumped HomeHarvest property (at least IDENTITY_SOURCE_FIELDS)
+
+        Returns:
+            Dictionary with the Odoo identity fields
+        """
+        return {
+            'property_id': prop.get('property_id', ''),
+            'mls': prop.get('mls', ''),
+            'url': str(prop.get('property_url', '')),
+            'address': self.format_address(self.map_address_components(prop.get('address'))),
+        }
+
+    def format_address(self, address_components: Dict[str, str]) -> str:
+        """
+        Format the address from address components
+        
+        Args:
+            address_components: Dictionary with address components
+            
+        Returns:
+            Formatted address string
+        """
+        # Try to get formatted address first
+        if 'formatted_address' in address_components and address_components['formatted_address']:
+            return address_components['formatted_address']
+
+        # Otherwise build from components
+        address_parts = []
+
+        if 'street' in address_components and address_components['street']:
+            address_parts.append(address_components['street'])
+
+        if 'unit' in address_components and address_components['unit']:
+            address_parts.append(address_components['unit'])
+
+        city_state_zip = []
+
+        if 'city' in address_components and address_components['city']:
+            city_state_zip.append(address_components['city'])
+
+        if 'state' in address_components and address_components['state']:
+            if city_state_zip:
+                city_state_zip.append(f", {address_components['state']}")
+            else:
+                city_state_zip.append(address_components['state'])
+
+        if 'zip_code' in address_components and address_components['zip_code']:
+            city_state_zip.append(f" {address_components['zip_code']}")
+
+        if city_state_zip:
+            address_parts.append(''.join(city_state_zip))
+
+        return '\n'.join(address_parts) if address_parts else ''
+
+    def format_datetime(self, dt_value: Any) -> str:
+        """
+        Format datetime objects to Odoo-compatible datetime strings
+        
+        Args:
+            dt_value: Datetime object or string
+            
+        Returns:
+            Datetime string in format '%Y-%m-%d %H:%M:%S' or empty string if None
+        """
+        if not dt_value:
+            return ''
+
+        # If it's a datetime object, convert to Odoo format
+        if isinstance(dt_value, datetime):
+            formatted = dt_value.strftime('%Y-%m-%d %H:%M:%S')
+            logger.debug(f"Converted datetime object to Odoo format: {formatted}")
+            return formatted
+
+        # If it's a string, try to parse it and convert to Odoo format
+        if isinstance(dt_value, str):
+            try:
+                # Handle ISO format with timezone (e.g., '2025-07-16T01:04:52+00:00')
+                if 'T' in dt_value and ('+' in dt_value or 'Z' in dt_value):
+                    # Parse ISO format string to datetime object
+                    dt_obj = datetime.fromisoformat(dt_value.replace('Z', '+00:00'))
+                    # Convert to Odoo format
+                    formatted = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
+                    logger.debug(f"Converted ISO datetime '{dt_value}' to Odoo format: {formatted}")
+                    return formatted
+                logger.debug(f"Using datetime string as-is: {dt_value}")
+                return dt_value
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Failed to parse datetime string '{dt_value}': {e}")
+                return ''
+
+        # For any other type, try to convert to string
+        try:
+            result = str(dt_value)
+            logger.debug(f"Converted {type(dt_value)} to string: {result}")
+            return result
+        except Exception as e:
+            logger.warning(f"Failed to convert datetime value to string: {e}")
+            return ''
+
+    def map_status(self, status: Any) -> str:
+        """
+        Map HomeHarvest status to Odoo status
+        
+        Args:
+            status: HomeHarvest status (can be string or enum)
+            
+        Returns:
+            Odoo status
+        """
+        try:
+            # Handle case where status is an enum or object instead of string
+            if not isinstance(status, str) and hasattr(status, '__str__'):
+                try:
+                    status = str(status)
+                except Exception as e:
+                    logger.warning(f"Failed to convert status to string: {e}")
+                    return 'off_market'
+
+            if not isinstance(status, str):
+                return 'off_market'
+
+            status_map = {
+                'for_sale': 'active',
+                'for_rent': 'active',
+                'pending': 'contingent',
+                'contingent': 'contingent',
+                'sold': 'off_market',
+            }
+
+            return status_map.get(status.lower(), 'off_market')
+        except Exception as e:
+            logger.warning(f"Error in map_status: {e}")
+            return 'interested'  # Safe default
+
+    def map_property_type(self, style: Any) -> str:
+        """
+        Map HomeHarvest style to Odoo property_type
+        
+        Args:
+            style: HomeHarvest property style (can be string or PropertyType enum)
+            
+        Returns:
+            Odoo property_type as string
+        """
+        try:
+            if not style:
+                return 'single_family'  # Default value instead of False
+
+            # Handle case where style is an enum or object instead of string
+            if hasattr(style, '__str__'):
+                try:
+                    style = str(style)
+                except Exception as e:
+                    logger.warning(f"Failed to convert style to string: {e}")
+                    return 'single_family'
+
+            # Convert to lowercase for case-insensitive matching
+            style_lower = style.lower() if isinstance(style, str) else ""
+
+            # Map HomeHarvest style values to Odoo property_type values
+            property_type_map = {
+                'single_family': 'single_family',
+                'single family': 'single_family',
+                'singlefamily': 'single_family',
+                'single-family': 'single_family',
+                'multi_family': 'multi_family',
+                'multi family': 'multi_family',
+                'multifamily': 'multi_family',
+                'multi-family': 'multi_family',
+                'condo': 'condos',
+                'condos': 'condos',
+                'condominium': 'condos',
+                'condo/townhome': 'condo_townhome',
+                'condo_townhome': 'condo_townhome',
+                'condo/townhouse': 'condo_townhome',
+                'townhome': 'townhomes',
+                'townhouse': 'townhomes',
+                'townhomes': 'townhomes',
+                'townhouses': 'townhomes',
+                'duplex': 'duplex_triplex',
+                'triplex': 'duplex_triplex',
+                'duplex/triplex': 'duplex_triplex',
+                'duplex_triplex': 'duplex_triplex',
+                'farm': 'farm',
+                'ranch': 'farm',
+                'land': 'land',
+                'lot': 'land',
+                'mobile': 'mobile',
+                'mobile home': 'mobile',
+                'manufactured': 'mobile'
+            }
+
+            # Try direct match first
+            if style_lower in property_type_map:
+                return property_type_map[style_lower]
+
+            # Try partial matching for values not in the map
+            for key, value in property_type_map.items():
+                if key in style_lower:
+                    return value
+
+            # Default to single_family if no match found
+            return 'single_family'
+        except Exception as e:
+            logger.warning(f"Error in map_property_type: {e}")
+            return 'single_family'  # Safe default
+
+
+_mapping_pool = None
+_mapping_pool_lock = threading.Lock()
+
+
+def get_mapping_pool() -> ProcessPoolExecutor:
+    """Return the process pool used by map_properties, starting it on first use"""
+    global _mapping_pool
+
+    with _mapping_pool_lock:
+        if _mapping_pool is None:
+            _mapping_pool = ProcessPoolExecutor(max_workers=MAPPING_WORKERS)
+        return _mapping_pool
+
+
+def shutdown_mapping_pool():
+    """Stop the mapping processes, if they were started"""
+    global _mapping_pool
+
+    with _mapping_pool_lock:
+        if _mapping_pool is not None:
+            _mapping_pool.shutdown()
+            _mapping_pool = None
+
+
+def map_property_batch(properties: List[Any], record_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Map a batch of properties to upsert payloads; runs in a mapping process
+
+    Args:
+        properties: List of Property Pydantic models
+        record_id: Optional record ID for direct update
+
+    Returns:
+        List of plain payload dictionaries
+    """
+    mapper = PropertyMapper()
+    return [mapper.build_listing_payload(property_model, record_id) for property_model in properties]
 
-            for tag_data in tags_data:
-                if tag_data is None:
-                    continue
 
-                # Handle different tag data formats
-                if isinstance(tag_data, dict):
-                    tag_label = tag_data.get('label', '')
-                elif isinstance(tag_data, str):
-                    tag_label = tag_data
-                else:
-                    logger.warning(f"Unexpected tag data type: {type(tag_data)}, value: {tag_data}")
-                    continue
+class PropertyScraper(PropertyMapper):
+    def __init__(self, connect_rabbitmq: bool = True):
+        """
+        Args:
+            connect_rabbitmq: Connect to RabbitMQ; drivers calling process_message
+                              directly (such as the benchmarks) pass False
+        """
+        # Sync listings with one RPC each, until Odoo tells us it cannot
+        self.server_upsert = ODOO_SERVER_UPSERT
+        self.identity_cache = IdentityCache()
+
+        self.connection = None
+        self.channel = None
+        if connect_rabbitmq:
+            self.connect_rabbitmq()
+        self.connect_odoo()
+
+        # Messages touching the same listing are never handled at the same time
+        self.listing_locks = KeyedLock()
+        self.workers = None
+        self.coalescer = MessageCoalescer() if SCRAPER_COALESCE_WINDOW > 0 else None
+
+        self.fingerprints = FingerprintStore(FINGERPRINT_DB) if FINGERPRINT_SKIP else None
+        self.scrape_cache = (
+            ScrapeCache(SCRAPE_CACHE_DB, SCRAPE_CACHE_TTL, SCRAPE_CACHE_MAX_MB * 1024 * 1024)
+            if SCRAPE_CACHE_TTL > 0 else None
+        )
+        self.rate_limiter = (
+            RateLimiter(SCRAPE_RATE_DB, SCRAPE_RATE_PER_MINUTE, SCRAPE_RATE_BURST,
+                        SCRAPE_BACKOFF_MIN, SCRAPE_BACKOFF_MAX, SCRAPE_MAX_WAIT)
+            if SCRAPE_RATE_PER_MINUTE > 0 else None
+        )
+        self.checkpoints = (
+            CheckpointStore(SCRAPE_CHECKPOINT_DB, SCRAPE_CHECKPOINT_TTL) if SCRAPE_CHECKPOINT_TTL > 0 else None
+        )
+
+        # Field types used to compare scraped values with what Odoo returns from read
+        self._field_types = {}
+
+        # Name -> id caches used when listings are synced from the scraper
+        self.listing_tags = VocabularyCache(self, 'real_estate.tag', 'api_name', self.new_listing_tag_values)
+        self.photo_tags = VocabularyCache(self, 'real_estate.photo.tag', 'name', lambda label: {'name': label})
+        self.schools = VocabularyCache(self, 'real_estate.school', 'name', lambda name: {'name': name})
+
+        # Child collections synced from the scraper, photos in gallery order
+        self.child_reconcilers = {
+            section: ChildReconciler(self, model, relation_field, key_fields,
+                                     'sequence, id' if section == 'photos' else 'id')
+            for section, (model, relation_field, key_fields) in self.child_collections.items()
+        }
+
+        if not self.server_upsert:
+            self.preload_vocabularies()
+
+    def preload_vocabularies(self):
+        """Load listing tags, photo tags and schools so lookups cost no RPCs"""
+        for vocabulary in (self.listing_tags, self.photo_tags, self.schools):
+            vocabulary.load()
 
-                if not tag_label:
-                    continue
+    def connect_rabbitmq(self):
+        """Connect to RabbitMQ and set up channel"""
+        logger.info(f"Connecting to RabbitMQ at {RABBITMQ_HOST}:{RABBITMQ_PORT}")
+
+        # Retry connection to RabbitMQ with exponential backoff
+        retry_count = 0
+        max_retries = 10
+        connected = False
 
-                # Check if tag already exists
-                existing_response = self.odoo_request(
-                    'real_estate.photo.tag', 'search',
-                    domain=[['name', '=', tag_label]]
+        while not connected and retry_count < max_retries:
+            try:
+                credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+
+                parameters = pika.ConnectionParameters(
+                    host=RABBITMQ_HOST,
+                    port=RABBITMQ_PORT,
+                    credentials=credentials,
+                    heartbeat=600
                 )
-                existing_tags = existing_response if isinstance(existing_response, list) else existing_response.get(
-                    'result', []) if existing_response else []
 
-                if existing_tags:
-                    tag_id = existing_tags[0]
-                else:
-                    # Create new tag
-                    create_response = self.odoo_request(
-                        'real_estate.photo.tag', 'create',
-                        vals={'name': tag_label}
-                    )
-                    tag_id = create_response if isinstance(create_response, (int, str)) else create_response.get(
-                        'result') if create_response else None
+                self.connection = pika.BlockingConnection(parameters)
+                self.channel = self.connection.channel()
 
-                tag_ids.append(tag_id)
+                # Declare exchange
+                self.channel.exchange_declare(
+                    exchange=RABBITMQ_EXCHANGE,
+                    exchange_type='topic',
+                    durable=True
+                )
 
-            # Update photo with tags
-            if tag_ids:
-                # Filter out any None values that might have slipped in
-                filtered_tag_ids = [tag_id for tag_id in tag_ids if tag_id is not None]
-
-                if filtered_tag_ids:
-                    logger.info(f"Updating photo {photo_id} with {len(filtered_tag_ids)} tags")
-                    self.odoo_request(
-                        'real_estate.photo', 'write',
-                        ids=[photo_id],
-                        vals={'tag_ids': [(6, 0, filtered_tag_ids)]}
-                    )
-                else:
-                    logger.warning(f"No valid tag IDs found for photo {photo_id} after filtering")
+                # Declare queue
+                self.channel.queue_declare(
+                    queue=RABBITMQ_QUEUE,
+                    durable=True
+                )
 
-        except Exception as e:
-            logger.error(f"Error processing photo tags: {str(e)}")
-            # Continue with photo creation even if tag processing fails
+                # Bind queue to exchange
+                self.channel.queue_bind(
+                    exchange=RABBITMQ_EXCHANGE,
+                    queue=RABBITMQ_QUEUE,
+                    routing_key=RABBITMQ_ROUTING_KEY
+                )
+
+                connected = True
+                logger.info("Successfully connected to RabbitMQ")
+
+            except pika.exceptions.AMQPConnectionError as e:
+                retry_count += 1
+                wait_time = 2 ** retry_count
+                logger.warning(
+                    f"Failed to connect to RabbitMQ (attempt {retry_count}/{max_retries}). Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+
+        if not connected:
+            logger.error("Failed to connect to RabbitMQ after maximum retries")
+            raise ConnectionError("Could not connect to RabbitMQ")
+
+    def connect_odoo(self):
+        """Connect to Odoo using JSON-2 API"""
+        logger.info(f"Connecting to Odoo at {ODOO_URL}")
 
-    def process_property_tags(self, tags_data: List[str]) -> List[int]:
         try:
-            if not tags_data:
-                return []
+            if not ODOO_API_KEY:
+                logger.error("ODOO_API_KEY environment variable is required")
+                raise ConnectionError("ODOO_API_KEY is required")
 
-            logger.info(f"Processing {len(tags_data)} property tags")
-            tag_ids = []
+            # Prepare headers for JSON-2 API
+            self.headers = {
+                'Authorization': f"bearer {ODOO_API_KEY}",
+                'Content-Type': 'application/json'
+            }
 
-            for api_name in tags_data:
-                if not api_name or not isinstance(api_name, str):
-                    continue
+            # Add database header if needed (for multi-database setups)
+            if ODOO_DB:
+                self.headers['X-Odoo-Database'] = ODOO_DB
 
-                # First, try to look up tag by api_name
-                existing_response = self.odoo_request(
-                    'real_estate.tag', 'search',
-                    domain=[['api_name', '=', api_name]]
-                )
-                existing_tags = existing_response if isinstance(existing_response, list) else existing_response.get(
-                    'result', []) if existing_response else []
+            # Set up base URL for JSON-2 API
+            self.base_url = f"{ODOO_URL}/json/2"
 
-                if existing_tags:
-                    # Tag exists, use it
-                    tag_id = existing_tags[0]
-                    logger.debug(f"Found existing tag for api_name '{api_name}': {tag_id}")
-                else:
-                    # Tag doesn't exist, create new one
-                    # Convert api_name to display name (e.g., 'community_gym' -> 'Community Gym')
-                    display_name = ' '.join(word.capitalize() for word in api_name.split('_'))
-
-                    tag_data = {
-                        'name': display_name,
-                        'api_name': api_name,
-                        'tag_type': 'listing',  # mark scraper-generated tags
-                    }
-
-                    create_response = self.odoo_request(
-                        'real_estate.tag', 'create',
-                        vals=tag_data
-                    )
+            # Every RPC goes through one pooled keep-alive transport
+            self.transport = OdooTransport(self.base_url, self.headers)
 
-                    if len(create_response) > 0:
-                        tag_id = create_response[0]
+            # Test connection by getting current user context
+            test_response = self.transport.post('res.users/context_get', {})
 
-                    logger.info(f"Created new tag '{display_name}' (api_name: '{api_name}') with ID {tag_id}")
+            if test_response.status_code != 200:
+                logger.error(f"Authentication with Odoo failed: {test_response.status_code}")
+                raise ConnectionError("Authentication with Odoo failed")
 
-                if tag_id:
-                    tag_ids.append(tag_id)
+            logger.info(f"Connected to Odoo at {ODOO_URL} using JSON-2 API")
 
-            logger.info(f"Processed property tags, returning {len(tag_ids)} tag IDs")
-            return tag_ids
+        except Exception as e:
+            logger.error(f"Error connecting to Odoo: {str(e)}")
+            raise
+
+        # Identify listings the way the addon does; addons predating the spec answer 404
+        response = self.transport.post('real_estate.listing/scraper_sync_spec', {})
+        self.apply_sync_spec(response.json() if response.status_code == 200 else None)
+
+    def odoo_request(self, model, method, timeout=None, **kwargs):
+        """
+        Make a JSON-2 API request to Odoo
+        
+        Args:
+            model: Model name
+            method: Method name
+            timeout: Optional read timeout in seconds for this call
+            **kwargs: Method arguments
+        
+        Returns:
+            Response data or None if failed
+        """
+        try:
+            # For create method, convert 'vals' to 'vals_list' as expected by JSON-2 API
+            if method == 'create' and 'vals' in kwargs:
+                vals = kwargs.pop('vals')
+                kwargs['vals_list'] = [vals]  # Wrap single record in list
 
+            response = self.transport.post(f"{model}/{method}", kwargs, timeout=timeout)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Odoo API request failed: {response.status_code} - {response.text}")
+                return None
         except Exception as e:
-            logger.error(f"Error processing property tags: {str(e)}")
-            return []
+            logger.error(f"Error making Odoo API request: {e}")
+            return None
 
-    def map_property_to_odoo(self, property_model: Any) -> Dict[str, Any]:
+    def create_or_update_properties(self, payloads: List[Dict[str, Any]],
+                                    lookup: bool = True) -> Tuple[List[int], Dict[int, Set[str]]]:
         """
-        Map HomeHarvest Pydantic model to Odoo model fields
+        Create or update mapped properties in Odoo
 
+        Each listing tree is sent to Odoo's upsert_scraped_listing in a single RPC.
+        Odoo instances running an addon without that method are synced from the
+        scraper instead, one collection at a time for the whole batch.
+        
         Args:
-            property_model: Pydantic model from homeharvest
+            payloads: Mapped properties from build_listing_payload (see map_properties)
+            lookup: Search for an existing listing when a payload has no record_id. Pass
+                    False when identity was already resolved in bulk (see resolve_identities)
             
         Returns:
-            Dictionary with Odoo field mappings
+            Tuple of (Odoo record IDs in the order of payloads, position in payloads ->
+            sections that could not be written)
         """
-        # Convert Pydantic model to dict for easier access
-        # We use the model's model_dump() method which handles nested models
-        prop = property_model.model_dump()
+        property_ids = []
 
-        # Extract address components if available
-        address_components = {}
+        while self.server_upsert and len(property_ids) < len(payloads):
+            try:
+                property_ids.append(self.upsert_property(payloads[len(property_ids)]))
+            except UpsertUnavailableError as e:
+                logger.warning(f"{e}. Falling back to syncing listings from the scraper.")
+                self.server_upsert = False
+                self.preload_vocabularies()
+
+        # An upsert writes a whole listing tree or raises, so only synced listings fail part-way
+        offset = len(property_ids)
+        synced_ids, failed = self.sync_properties(payloads[offset:], lookup)
+        return property_ids + synced_ids, {offset + i: sections for i, sections in failed.items()}
+
+    def upsert_property(self, payload: Dict[str, Any]) -> int:
+        """
+        Create or update a property and all of its children with one upsert_scraped_listing call
 
-        if 'address' in prop:
-            address = prop.get('address', {})
+        Args:
+            payload: Mapped property from build_listing_payload
 
-            address_components = {
-                'street': address.get('street', ''),
-                'unit': address.get('unit', ''),
-                'city': address.get('city', ''),
-                'state': address.get('state', ''),
-                'zip_code': address.get('zip', ''),
-                'formatted_address': address.get('formatted_address', '')
-            }
+        Returns:
+            Odoo record ID
+        """
+        listing = payload['listing']
 
-        # Extract description components if available
-        description_components = {}
-
-        if 'description' in prop:
-            desc = prop.get('description', {})
-
-            description_components = {
-                'beds': desc.get('beds', 0),
-                'baths_full': desc.get('baths_full', 0),
-                'baths_half': desc.get('baths_half', 0),
-                'sqft': desc.get('sqft', 0),
-                'lot_sqft': desc.get('lot_sqft', 0),
-                'year_built': desc.get('year_built', 0),
-                'stories': desc.get('stories', 0),
-                'garage': desc.get('garage', 0),
-                'style': desc.get('style', ''),
-                'text': desc.get('text', '')
-            }
+        # A cached id lets Odoo skip its identity searches
+        if not payload['record_id']:
+            payload['record_id'] = self.lookup_cached_identity(listing)
 
-        # Extract advertiser information from nested structure
-        advertisers = prop.get('advertisers', {}) or {}
-        agent = advertisers.get('agent', {}) or {}
-        broker = advertisers.get('broker', {}) or {}
-        office = advertisers.get('office', {}) or {}
+        with stage_timer('upsert'):
+            response = self.transport.post('real_estate.listing/upsert_scraped_listing', {'payload': payload})
 
-        agent_phones = agent.get('phones') or []
-        office_phones = office.get('phones') or []
+        if response.status_code == 404:
+            raise UpsertUnavailableError("Odoo does not provide real_estate.listing/upsert_scraped_listing")
 
-        def first_phone(phones: list) -> str:
-            if not phones:
-                return ''
-            return (phones[0] or {}).get('number', '') or ''
+        if response.status_code != 200:
+            logger.error(f"Odoo API request failed: {response.status_code} - {response.text}")
+            self.forget_identity(listing)
+            raise Exception(f"Failed to upsert property {listing.get('property_id')}")
 
-        agent_phone = first_phone(agent_phones)
-        office_phone_json = json.dumps(office_phones) if office_phones else ''
+        property_id = response.json()
+        self.remember_identity(listing, property_id)
 
-        # Map HomeHarvest fields to Odoo fields
-        odoo_property = {
-            # Basic Information
-            'property_id': prop.get('property_id', ''),
-            'mls': prop.get('mls', ''),
-            'mls_id': prop.get('mls_id', ''),
-            'mls_status_raw': prop.get('mls_status', ''),
-
-            # Address Components
-            'address': self.format_address(address_components),
-            'street': address_components.get('street', ''),
-            'street_number': address_components.get('street_number', ''),
-            'street_direction': address_components.get('street_direction', ''),
-            'street_name': address_components.get('street_name', ''),
-            'street_suffix': address_components.get('street_suffix', ''),
-            'address_full_line': address_components.get('full_line', ''),
-            'unit': address_components.get('unit', ''),
-            'city': address_components.get('city', ''),
-            'state': address_components.get('state', ''),
-            'zip_code': address_components.get('zip_code', ''),
-            'county': prop.get('county', ''),
-            'neighborhoods': json.dumps(prop.get('neighborhoods', [])) if prop.get('neighborhoods') else '',
-
-            # Location Information
-            'latitude': float(prop.get('latitude', 0.0) or 0.0),
-            'longitude': float(prop.get('longitude', 0.0) or 0.0),
-            'fips_code': prop.get('fips_code', ''),
-            'parcel_number': prop.get('parcel_number', ''),
-
-            # Price Information
-            'price': float(prop.get('list_price', 0) or 0),
-            'list_price_min': float(prop.get('list_price_min', 0) or 0),
-            'list_price_max': float(prop.get('list_price_max', 0) or 0),
-            'sold_price': float(prop.get('sold_price', 0) or 0),
-            'last_sold_price': float(prop.get('last_sold_price', 0) or 0),
-            # price_per_sqft is computed in Odoo; estimated_value is related to best estimate
-            'estimated_monthly_rental': float(prop.get('estimated_monthly_rental', 0) or 0),
-
-            # Property Description
-            # Ensure property_type is a serializable value
-            'property_type': self.map_property_type(description_components.get('style', '')),
-            # property_type_raw removed in Odoo model
-            'listing_description': description_components.get('text', ''),
-            'description_title': description_components.get('name', ''),
-            'bedrooms': int(description_components.get('beds', 0) or 0),
-            'baths_full': int(description_components.get('baths_full', 0) or 0),
-            'baths_half': int(description_components.get('baths_half', 0) or 0),
-            'sqft': int(description_components.get('sqft', 0) or 0),
-            'lot_sqft': int(description_components.get('lot_sqft', 0) or 0),
-            'stories': float(description_components.get('stories', 0.0) or 0.0),
-            'garage': int(description_components.get('garage', 0) or 0),
-            'parking': json.dumps(prop.get('parking', {})) if prop.get('parking') else '',
-            'year_built': int(description_components.get('year_built', 0) or 0),
-            # new_construction removed; we set is_new_construction from flags below
-
-            # Status and Dates
-            'market_status': self.map_status(prop.get('status', '')),
-            'listing_date': self.format_datetime(prop.get('list_date', '')),
-            'pending_date': self.format_datetime(prop.get('pending_date', '')),
-            'sold_date': self.format_datetime(prop.get('last_sold_date', '')),
-            'days_on_mls': int(prop.get('days_on_mls', 0) or 0),
-
-            # Financial Information
-            # annual_tax/assessed_value are related from latest tax in Odoo
-            'hoa_fee': float(prop.get('hoa_fee', 0) or 0),
-
-            # URL and Media
-            'url': str(prop.get('property_url', '')),
-            # primary_photo is related to primary_image_id in Odoo
-
-            # Agent/Broker Information
-            'agent_name': agent.get('name', ''),
-            'agent_phone': agent_phone,
-            'agent_email': agent.get('email', ''),
-            'agent_uuid': agent.get('uuid', ''),
-            'agent_state_license': agent.get('state_license', ''),
-            'broker_name': broker.get('name', ''),
-            'broker_uuid': broker.get('uuid', ''),
-            'office_name': office.get('name', ''),
-            'office_uuid': office.get('uuid', ''),
-            'office_email': office.get('email', ''),
-            # office_phones removed in Odoo model
-
-            # Tax Record Information
-            'tax_record_apn': prop.get('tax_record', {}).get('apn', ''),
-            'tax_record_cl_id': prop.get('tax_record', {}).get('cl_id', ''),
-            'tax_record_last_update_date': self.format_datetime(prop.get('tax_record', {}).get('last_update_date', '')),
-            'tax_record_public_record_id': prop.get('tax_record', {}).get('public_record_id', ''),
-            'tax_record_tax_parcel_id': prop.get('tax_record', {}).get('tax_parcel_id', ''),
-
-            # Property Flags
-            'is_coming_soon': bool(prop.get('flags', {}).get('is_coming_soon', False)),
-            'is_contingent': bool(prop.get('flags', {}).get('is_contingent', False)),
-            'is_foreclosure': bool(prop.get('flags', {}).get('is_foreclosure', False)),
-            'is_new_construction': bool(prop.get('flags', {}).get('is_new_construction', False)),
-            'is_new_listing': bool(prop.get('flags', {}).get('is_new_listing', False)),
-            'is_pending': bool(prop.get('flags', {}).get('is_pending', False)),
-            'is_price_reduced': bool(prop.get('flags', {}).get('is_price_reduced', False)),
-
-            # Additional Information
-            'pet_policy': json.dumps(prop.get('pet_policy', {})) if prop.get('pet_policy') else '',
-            'terms': prop.get('terms', ''),
-            # nearby schools handled via M2M linking below
-            'open_houses': json.dumps(prop.get('open_houses', [])) if prop.get('open_houses') else '',
-            'units': json.dumps(prop.get('units', [])) if prop.get('units') else '',
-            'current_estimates': json.dumps(
-                self.convert_datetimes_for_json(prop.get('current_estimates', {}))) if prop.get(
-                'current_estimates') else '',
-            'estimates': json.dumps(self.convert_datetimes_for_json(prop.get('estimates', {}))) if prop.get(
-                'estimates') else '',
-        }
+        logger.info(f"Upserted property (ID: {property_id})")
+        return property_id
+
+    def resolve_identities(self, identities: List[Dict[str, str]]) -> Optional[List[Optional[int]]]:
+        """
+        Resolve the Odoo ids of a whole page of scraped properties before writing any of them
+
+        Instead of up to four searches per property, each group of identity_key_fields
+        is searched once for all still-unresolved properties with 'in' filters (chunked
+        by IDENTITY_BATCH_SIZE). Results also prime the identity cache.
+
+        Args:
+            identities: Identity fields per property (see payload_identity)
+
+        Returns:
+            Odoo id (or None for new listings) per property, or None if resolution failed
+        """
+        resolved = [self.lookup_cached_identity(identity) for identity in identities]
+
+        for field_names in self.identity_key_fields:
+            keys = list(dict.fromkeys(
+                tuple(identity[field_name] for field_name in field_names)
+                for identity, record_id in zip(identities, resolved)
+                if not record_id and all(identity.get(field_name) for field_name in field_names)
+            ))
+            if not keys:
+                continue
+
+            found = {}
+            for start in range(0, len(keys), IDENTITY_BATCH_SIZE):
+                response = self.odoo_request(
+                    'real_estate.listing', 'search_read',
+                    domain=self.identity_domain(field_names, keys[start:start + IDENTITY_BATCH_SIZE]),
+                    fields=['id', *field_names]
+                )
+                if response is None:
+                    logger.warning(f"Bulk identity resolution by {'/'.join(field_names)} failed")
+                    return None
+
+                # Keep the first match per key, like a search() would
+                for record in self._response_records(response):
+                    found.setdefault(tuple(record[field_name] for field_name in field_names), record['id'])
+
+            for i, identity in enumerate(identities):
+                key = tuple(identity.get(field_name) for field_name in field_names)
+                if not resolved[i] and key in found:
+                    resolved[i] = found[key]
+
+        for identity, record_id in zip(identities, resolved):
+            if record_id:
+                self.remember_identity(identity, record_id)
+
+        logger.info(
+            f"Resolved {sum(1 for record_id in resolved if record_id)} of {len(identities)} properties "
+            f"to existing listings")
+        return resolved
 
-        # Add property tags if they exist
-        property_tags = prop.get('tags', [])
+    def mark_scraped(self, record_ids: List[Optional[int]]) -> None:
+        """
+        Stamp the listings of a successful message as scraped in Odoo (see
+        real_estate.listing/mark_scraped), including the ones skipped as unchanged
 
-        if property_tags:
-            odoo_property['property_tags'] = json.dumps(property_tags)
+        Args:
+            record_ids: Odoo ids of the listings written or found unchanged
+        """
+        ids = sorted({record_id for record_id in record_ids if record_id})
+        for start in range(0, len(ids), IDENTITY_BATCH_SIZE):
+            response = self.odoo_request('real_estate.listing', 'mark_scraped', ids=ids[start:start + IDENTITY_BATCH_SIZE])
+            if response is None:
+                logger.warning(f"Could not mark {len(ids)} listings as scraped")
+                return
 
-            # Process property tags to create/lookup tag records
-            tag_ids = self.process_property_tags(property_tags)
+    def sync_listing(self, payload: Dict[str, Any], lookup: bool = True) -> int:
+        """
+        Create or update the listing values of a property from the scraper (children are
+        synced by sync_properties)
+        
+        Args:
+            payload: Mapped property from build_listing_payload
+            lookup: Search for an existing listing when the payload has no record_id
+            
+        Returns:
+            Odoo record ID
+        """
+        try:
+            odoo_property = dict(payload['listing'])
+            property_id = payload['record_id']
 
+            # Resolve tags and nearby schools to record links
+            tag_ids = self.process_property_tags(payload['tags'])
             if tag_ids:
                 odoo_property['listing_tag_ids'] = [(6, 0, tag_ids)]
 
-        # Nearby schools: create/lookup schools and link via M2M
-        nearby = prop.get('nearby_schools') or []
-
-        if nearby:
-            school_ids = []
-            for name in nearby:
-                if not name:
-                    continue
-                # find existing school by name
-                existing = self.odoo_request(
-                    'real_estate.school', 'search',
-                    domain=[["name", "=", name]],
-                    limit=1,
-                )
-                sid = existing[0] if existing else None
-                if not sid:
-                    created = self.odoo_request(
-                        'real_estate.school', 'create',
-                        vals={'name': name}
-                    )
-                    if created:
-                        sid = created[0]
-                if sid:
-                    school_ids.append(sid)
+            school_ids = self.process_nearby_schools(payload['schools'])
             if school_ids:
                 odoo_property['nearby_school_ids'] = [(6, 0, school_ids)]
 
-        # Filter out None values and ensure all values are serializable
-        filtered_property = {}
+            if property_id:
+                logger.info(f"Using provided record_id: {property_id} for direct update")
 
-        for k, v in odoo_property.items():
-            if v is None:
-                continue
+            # If no record_id provided, check the identity cache, then whether the property already
+            # exists in Odoo (by property_id, mls and mls_id, url, or address)
+            if not property_id:
+                property_id = self.lookup_cached_identity(odoo_property)
+
+            if not property_id and lookup:
+                for field_names in self.identity_key_fields:
+                    if not all(odoo_property.get(field_name) for field_name in field_names):
+                        continue
+
+                    existing_response = self.odoo_request(
+                        'real_estate.listing', 'search',
+                        domain=[[field_name, '=', odoo_property[field_name]] for field_name in field_names]
+                    )
+                    existing_ids = self._response_records(existing_response)
+                    if existing_ids:
+                        property_id = existing_ids[0]
+                        break
+
+            # Create or update the property
+            if property_id:
+                # Only send the fields that differ from what Odoo has
+                changes = self.changed_values('real_estate.listing', property_id, odoo_property)
 
-            # Check if value is a built-in function or method
-            if callable(v) or isinstance(v, type) or hasattr(v, '__call__'):
-                logger.warning(f"Skipping non-serializable value for key {k}: {type(v)}")
+                if changes:
+                    logger.info(f"Updating existing property (ID: {property_id}): {len(changes)} changed fields")
+
+                    update_response = self.odoo_request(
+                        'real_estate.listing', 'write',
+                        ids=[property_id],
+                        vals=changes
+                    )
+                    if not update_response:
+                        # The cached id may point at a deleted listing
+                        self.forget_identity(odoo_property)
+                        raise Exception(f"Failed to update property {property_id}")
+                else:
+                    logger.info(f"Property {property_id} is unchanged, skipping write")
+            else:
+                logger.info("Creating new property")
+
+                property_id = self.create_records('real_estate.listing', [odoo_property])[0]
+
+            self.remember_identity(odoo_property, property_id)
+            return property_id
+
+        except Exception as e:
+            logger.error(f"Error creating/updating property in Odoo: {str(e)}")
+            raise
+
+    def sync_properties(self, payloads: List[Dict[str, Any]],
+                        lookup: bool = True) -> Tuple[List[int], Dict[int, Set[str]]]:
+        """
+        Create or update properties in Odoo collection by collection from the scraper
+
+        Listing values are written per listing; each child collection is then
+        reconciled for all listings at once (see ChildReconciler). A collection that
+        fails is logged and the others are still synced.
+
+        Args:
+            payloads: Mapped properties from build_listing_payload
+            lookup: Search for an existing listing when a payload has no record_id
+
+        Returns:
+            Tuple of (Odoo record IDs in the order of payloads, position in payloads ->
+            sections that could not be written)
+        """
+        property_ids = []
+        for payload in payloads:
+            with stage_timer('listing_write'):
+                property_ids.append(self.sync_listing(payload, lookup))
+
+        failed = {}
+        for section, reconciler in self.child_reconcilers.items():
+            # A listing appearing twice in the batch keeps the rows of its last payload
+            rows_by_listing = {
+                property_id: payload[section]
+                for property_id, payload in zip(property_ids, payloads)
+                if payload[section]
+            }
+            if not rows_by_listing:
                 continue
 
-            # Try to convert complex objects to strings
             try:
-                # Convert datetime objects before testing JSON serialization
-                test_value = self.convert_datetimes_for_json(v) if isinstance(v, (datetime, dict, list)) else v
-                # Test if the value is JSON serializable
-                json.dumps(test_value)
-                filtered_property[k] = test_value
-            except (TypeError, OverflowError):
-                # If not serializable, try to convert to string
-                try:
-                    filtered_property[k] = str(v)
-                    logger.warning(f"Converted non-serializable value for key {k} to string: {filtered_property[k]}")
-                except Exception as e:
-                    logger.warning(f"Skipping non-serializable value for key {k}: {type(v)}, error: {str(e)}")
-                    continue
+                with stage_timer(f'sync_{section}'):
+                    if section == 'photos':
+                        self.prepare_photo_rows(rows_by_listing)
 
-        return filtered_property
+                    counts = reconciler.reconcile(rows_by_listing)
+                logger.info(
+                    f"{section} of {len(rows_by_listing)} properties: {counts['created']} created, "
+                    f"{counts['updated']} updated, {counts['deleted']} removed")
 
-    def format_address(self, address_components: Dict[str, str]) -> str:
+            except Exception as e:
+                logger.error(f"Error processing {section}: {str(e)}")
+                # Continue with the other collections even if one fails
+                for i, payload in enumerate(payloads):
+                    if payload[section]:
+                        failed.setdefault(i, set()).add(section)
+
+        return property_ids, failed
+
+    def _response_records(self, response: Any) -> List[Any]:
         """
-        Format the address from address components
-        
+        Normalize a JSON-2 response holding a list (ids or records)
+
         Args:
-            address_components: Dictionary with address components
-            
+            response: Raw response from odoo_request
+
         Returns:
-            Formatted address string
+            List of ids or record dictionaries
         """
-        # Try to get formatted address first
-        if 'formatted_address' in address_components and address_components['formatted_address']:
-            return address_components['formatted_address']
+        if isinstance(response, list):
+            return response
+        if isinstance(response, dict):
+            return response.get('result') or response.get('records') or []
+        if isinstance(response, int):
+            return [response]
+        return []
+
+    def create_records(self, model: str, vals_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Create many records of a model in a single multi-record create
 
-        # Otherwise build from components
-        address_parts = []
+        Args:
+            model: Model name
+            vals_list: List of field value dictionaries
 
-        if 'street' in address_components and address_components['street']:
-            address_parts.append(address_components['street'])
+        Returns:
+            List of created record IDs
+        """
+        if not vals_list:
+            return []
 
-        if 'unit' in address_components and address_components['unit']:
-            address_parts.append(address_components['unit'])
+        create_response = self.odoo_request(model, 'create', vals_list=vals_list)
+        if create_response is None:
+            raise Exception(f"Failed to create {len(vals_list)} {model} records")
 
-        city_state_zip = []
+        return self._response_records(create_response)
+
+    def field_types(self, model: str) -> Dict[str, str]:
+        """
+        Return the field types of a model, fetched once with fields_get
+
+        Args:
+            model: Model name
+
+        Returns:
+            Dictionary of field name -> field type (empty if fields_get failed)
+        """
+        field_types = self._field_types.get(model)
+        if field_types is None:
+            response = self.odoo_request(model, 'fields_get', attributes=['type'])
+            if response is None:
+                return {}
+
+            field_types = {name: attrs.get('type') for name, attrs in response.items()}
+            self._field_types[model] = field_types
+
+        return field_types
+
+    def row_fields(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """List every field set by child rows, plus 'id' and 'property_id', to search_read their current values"""
+        return list(dict.fromkeys(['id', 'property_id', *(name for row in rows for name in row)]))
+
+    def changed_values(self, model: str, record_id: int, vals: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Read the current values of a record and return only the values that would change it
+
+        Args:
+            model: Model name
+            record_id: Record ID
+            vals: Values about to be written
 
-        if 'city' in address_components and address_components['city']:
-            city_state_zip.append(address_components['city'])
+        Returns:
+            Changed values (all of vals if the current values could not be read)
+        """
+        response = self.odoo_request(model, 'read', ids=[record_id], fields=list(vals))
+        records = self._response_records(response)
+        if not records:
+            return vals
 
-        if 'state' in address_components and address_components['state']:
-            if city_state_zip:
-                city_state_zip.append(f", {address_components['state']}")
-            else:
-                city_state_zip.append(address_components['state'])
+        return self.diff_values(records[0], vals, self.field_types(model))
 
-        if 'zip_code' in address_components and address_components['zip_code']:
-            city_state_zip.append(f" {address_components['zip_code']}")
+    def delete_records(self, model: str, ids: List[int]) -> None:
+        """
+        Unlink many records in a single call
 
-        if city_state_zip:
-            address_parts.append(''.join(city_state_zip))
+        Args:
+            model: Model name
+            ids: Record IDs to unlink
+        """
+        if not ids:
+            return
 
-        return '\n'.join(address_parts) if address_parts else ''
+        if self.odoo_request(model, 'unlink', ids=ids) is None:
+            raise Exception(f"Failed to unlink {len(ids)} {model} records")
 
-    def format_datetime(self, dt_value: Any) -> str:
+    def update_child_records(self, property_id: int, model: str, relation_field: str,
+                             updates: Dict[int, Dict[str, Any]],
+                             current: Optional[Dict[int, Dict[str, Any]]] = None) -> int:
         """
-        Format datetime objects to Odoo-compatible datetime strings
-        
+        Update many child records of a listing in a single write
+
+        The updates are sent as one2many update commands on the parent listing, so
+        any number of rows with different values costs one round trip.
+
         Args:
-            dt_value: Datetime object or string
-            
+            property_id: Odoo property record ID
+            model: Child model name
+            relation_field: One2many field of real_estate.listing holding the children
+            updates: Mapping of child record ID -> values to write
+            current: Optional mapping of child record ID -> values read from Odoo; only
+                     changed fields (and rows) are written when given
+
         Returns:
-            Datetime string in format '%Y-%m-%d %H:%M:%S' or empty string if None
+            Number of child records written
         """
-        if not dt_value:
-            return ''
+        if current is not None:
+            field_types = self.field_types(model)
+            updates = {
+                record_id: changes for record_id, vals in updates.items()
+                if (changes := self.diff_values(current.get(record_id) or {}, vals, field_types))
+            }
 
-        # If it's a datetime object, convert to Odoo format
-        if isinstance(dt_value, datetime):
-            formatted = dt_value.strftime('%Y-%m-%d %H:%M:%S')
-            logger.info(f"Converted datetime object to Odoo format: {formatted}")
-            return formatted
+        if not updates:
+            return 0
 
-        # If it's a string, try to parse it and convert to Odoo format
-        if isinstance(dt_value, str):
-            try:
-                # Handle ISO format with timezone (e.g., '2025-07-16T01:04:52+00:00')
-                if 'T' in dt_value and ('+' in dt_value or 'Z' in dt_value):
-                    # Parse ISO format string to datetime object
-                    dt_obj = datetime.fromisoformat(dt_value.replace('Z', '+00:00'))
-                    # Convert to Odoo format
-                    formatted = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
-                    logger.info(f"Converted ISO datetime '{dt_value}' to Odoo format: {formatted}")
-                    return formatted
-                logger.info(f"Using datetime string as-is: {dt_value}")
-                return dt_value
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Failed to parse datetime string '{dt_value}': {e}")
-                return ''
+        commands = [(1, record_id, vals) for record_id, vals in updates.items()]
 
-        # For any other type, try to convert to string
-        try:
-            result = str(dt_value)
-            logger.info(f"Converted {type(dt_value)} to string: {result}")
-            return result
-        except Exception as e:
-            logger.warning(f"Failed to convert datetime value to string: {e}")
-            return ''
+        update_response = self.odoo_request(
+            'real_estate.listing', 'write',
+            ids=[property_id],
+            vals={relation_field: commands}
+        )
+        if update_response is None:
+            raise Exception(f"Failed to update {len(updates)} {model} records")
 
-    def convert_datetimes_for_json(self, obj: Any) -> Any:
+        return len(updates)
+
+    def prepare_photo_rows(self, rows_by_listing: Dict[int, List[Dict[str, Any]]]) -> None:
         """
-        Recursively convert datetime objects to strings for JSON serialization
-        
+        Replace the tag labels of photo rows with tag links, resolving the labels of every photo at once
+
         Args:
-            obj: Object that may contain datetime objects
-            
-        Returns:
-            Object with datetime objects converted to strings
-        """
-        if isinstance(obj, datetime):
-            return obj.strftime('%Y-%m-%d %H:%M:%S')
-        elif isinstance(obj, dict):
-            return {k: self.convert_datetimes_for_json(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self.convert_datetimes_for_json(item) for item in obj]
-        else:
-            return obj
+            rows_by_listing: Mapping of listing ID -> photo values (with tag labels) from map_photo_rows
+        """
+        rows = [row for photo_rows in rows_by_listing.values() for row in photo_rows]
+        tag_ids_by_label = self.photo_tags.resolve([label for row in rows for label in row.get('tags', [])])
 
-    def map_status(self, status: Any) -> str:
+        for row in rows:
+            # Always set, so photos that lost their tags are cleared
+            labels = row.pop('tags', [])
+            row['tag_ids'] = [(6, 0, list(dict.fromkeys(
+                tag_ids_by_label[label] for label in labels if label in tag_ids_by_label
+            )))]
+
+    def process_photo_tags(self, tag_labels: List[str]) -> List[int]:
         """
-        Map HomeHarvest status to Odoo status
+        Resolve photo tag labels to real_estate.photo.tag IDs, creating missing tags
         
         Args:
-            status: HomeHarvest status (can be string or enum)
-            
+            tag_labels: List of tag labels
+
         Returns:
-            Odoo status
+            List of photo tag IDs
         """
         try:
-            # Handle case where status is an enum or object instead of string
-            if not isinstance(status, str) and hasattr(status, '__str__'):
-                try:
-                    status = str(status)
-                except Exception as e:
-                    logger.warning(f"Failed to convert status to string: {e}")
-                    return 'off_market'
+            tag_ids_by_label = self.photo_tags.resolve(tag_labels or [])
+            return list(dict.fromkeys(tag_ids_by_label[label] for label in tag_labels if label in tag_ids_by_label))
 
-            if not isinstance(status, str):
-                return 'off_market'
+        except Exception as e:
+            logger.error(f"Error processing photo tags: {str(e)}")
+            # Continue with photo creation even if tag processing fails
+            return []
 
-            status_map = {
-                'for_sale': 'active',
-                'for_rent': 'active',
-                'pending': 'contingent',
-                'contingent': 'contingent',
-                'sold': 'off_market',
-            }
+    def process_property_tags(self, tags_data: List[str]) -> List[int]:
+        try:
+            api_names = [api_name for api_name in tags_data or [] if api_name and isinstance(api_name, str)]
+            if not api_names:
+                return []
+
+            logger.info(f"Processing {len(api_names)} property tags")
+
+            tag_ids_by_api_name = self.listing_tags.resolve(api_names)
+            tag_ids = list(dict.fromkeys(
+                tag_ids_by_api_name[api_name] for api_name in api_names if api_name in tag_ids_by_api_name
+            ))
+
+            logger.info(f"Processed property tags, returning {len(tag_ids)} tag IDs")
+            return tag_ids
 
-            return status_map.get(status.lower(), 'off_market')
         except Exception as e:
-            logger.warning(f"Error in map_status: {e}")
-            return 'interested'  # Safe default
+            logger.error(f"Error processing property tags: {str(e)}")
+            return []
 
-    def map_property_type(self, style: Any) -> str:
+    def process_nearby_schools(self, school_names: List[str]) -> List[int]:
         """
-        Map HomeHarvest style to Odoo property_type
-        
+        Resolve nearby school names to real_estate.school IDs, creating missing schools
+
         Args:
-            style: HomeHarvest property style (can be string or PropertyType enum)
-            
+            school_names: List of school names
+
         Returns:
-            Odoo property_type as string
+            List of school IDs
         """
-        try:
-            if not style:
-                return 'single_family'  # Default value instead of False
+        school_names = [name for name in school_names or [] if name]
+        school_ids_by_name = self.schools.resolve(school_names)
+        return list(dict.fromkeys(school_ids_by_name[name] for name in school_names if name in school_ids_by_name))
 
-            # Handle case where style is an enum or object instead of string
-            if hasattr(style, '__str__'):
-                try:
-                    style = str(style)
-                except Exception as e:
-                    logger.warning(f"Failed to convert style to string: {e}")
-                    return 'single_family'
+    def on_message(self, ch, method, properties, body):
+        """
+        Consumer callback: handle the message inline, or in a worker thread when
+        SCRAPER_WORKERS > 1
+        """
+        if self.workers is None:
+            self.process_message(ch, method, properties, body)
+        else:
+            self.workers.submit(self.process_message, ch, method, properties, body)
 
-            # Convert to lowercase for case-insensitive matching
-            style_lower = style.lower() if isinstance(style, str) else ""
+    def settle(self, ch, delivery_tag: int, ack: bool = True, requeue: bool = False, delay: float = 0.0):
+        """
+        Acknowledge or reject a message, dropping it unless requeue is set
 
-            # Map HomeHarvest style values to Odoo property_type values
-            property_type_map = {
-                'single_family': 'single_family',
-                'single family': 'single_family',
-                'singlefamily': 'single_family',
-                'single-family': 'single_family',
-                'multi_family': 'multi_family',
-                'multi family': 'multi_family',
-                'multifamily': 'multi_family',
-                'multi-family': 'multi_family',
-                'condo': 'condos',
-                'condos': 'condos',
-                'condominium': 'condos',
-                'condo/townhome': 'condo_townhome',
-                'condo_townhome': 'condo_townhome',
-                'condo/townhouse': 'condo_townhome',
-                'townhome': 'townhomes',
-                'townhouse': 'townhomes',
-                'townhomes': 'townhomes',
-                'townhouses': 'townhomes',
-                'duplex': 'duplex_triplex',
-                'triplex': 'duplex_triplex',
-                'duplex/triplex': 'duplex_triplex',
-                'duplex_triplex': 'duplex_triplex',
-                'farm': 'farm',
-                'ranch': 'farm',
-                'land': 'land',
-                'lot': 'land',
-                'mobile': 'mobile',
-                'mobile home': 'mobile',
-                'manufactured': 'mobile'
-            }
+        pika channels are not thread-safe, so worker threads hand the call to the
+        connection's thread. A delayed call is scheduled on the connection's timer,
+        which keeps the connection serving heartbeats while the message waits.
+        """
+        if ack:
+            callback = partial(ch.basic_ack, delivery_tag=delivery_tag)
+        else:
+            callback = partial(ch.basic_nack, delivery_tag=delivery_tag, requeue=requeue)
 
-            # Try direct match first
-            if style_lower in property_type_map:
-                return property_type_map[style_lower]
+        MESSAGES.labels('acked' if ack else 'requeued' if requeue else 'nacked').inc()
 
-            # Try partial matching for values not in the map
-            for key, value in property_type_map.items():
-                if key in style_lower:
-                    return value
+        if delay > 0 and self.connection is not None:
+            callback = partial(self.connection.call_later, delay, callback)
 
-            # Default to single_family if no match found
-            return 'single_family'
-        except Exception as e:
-            logger.warning(f"Error in map_property_type: {e}")
-            return 'single_family'  # Safe default
+        if self.workers is None:
+            callback()
+        else:
+            self.connection.add_callback_threadsafe(callback)
 
     def process_message(self, ch, method, properties, body):
         """
@@ -1439,83 +2575,297 @@ class PropertyScraper:
             properties: Properties
             body: Message body
         """
-        try:
-            logger.info(f"Received message: {body}")
+        MESSAGES.labels('consumed').inc()
+        observe_queue_lag(getattr(properties, 'timestamp', None))
 
-            message = json.loads(body)
+        coalesce_key = None
+        succeeded = False
+        requeue = False
+        delay = 0.0
 
-            # Extract scraping parameters from message
-            location = message.get('location')
-            listing_type = message.get('listing_type', 'for_sale')
-            record_id = message.get('record_id')  # Extract record_id if provided
+        try:
+            logger.info(f"Received message: {body}")
 
-            if record_id:
-                logger.info(f"Record ID provided: {record_id}. Will update this specific record.")
-                message['limit'] = 1
-            else:
-                logger.info("No record ID provided. Will search for existing record or create new one.")
+            location, listing_type, record_id, force_refresh, kwargs, refresh = self.parse_message(body)
 
             if not location:
                 logger.error("No location provided in message")
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+                self.settle(ch, method.delivery_tag)
                 return
 
-            # Extract additional parameters and filter out unsupported parameters like 'source_url'
-            kwargs = {
-                k: v for k, v in message.items()
-                if k not in [
-                    'location',
-                    'listing_type',
-                    'record_id',
-                    'source_url'
-                ]
-            }
-
-            # Log the parameters being passed to scrape_property
-            logger.info(
-                f"Calling scrape_property with: location={location}, listing_type={listing_type}, kwargs={kwargs}")
+            if self.coalescer is not None:
+                key = self.coalesce_key(location, listing_type, record_id, kwargs, refresh, force_refresh)
+                role = self.coalescer.join(key, method.delivery_tag)
 
-            # Scrape property data using Pydantic models
-            properties = self.scrape_property(
-                location,
-                listing_type,
-                **kwargs
-            )
+                if role == MessageCoalescer.FOLLOW:
+                    logger.info("The same request is already being processed, it will settle this message")
+                    return
 
-            # Process each property
-            property_ids = []
+                if role == MessageCoalescer.DONE:
+                    logger.info("The same request was processed moments ago, skipping")
+                    MESSAGES.labels('coalesced').inc()
+                    self.settle(ch, method.delivery_tag)
+                    return
 
-            if record_id and len(properties) > 1:
-                logger.error("There was more than one item at this address, so we will take only the top result")
-                property_ids = [properties[0]]
+                coalesce_key = key
 
-            for property_model in properties:
-                property_id = self.create_or_update_property(property_model, record_id)
-                property_ids.append(property_id)
+            with self.listing_locks.hold(self.message_lock_keys(location, record_id)):
+                if refresh:
+                    property_ids = self.refresh_area(location, listing_type, refresh, kwargs, force_refresh)
+                else:
+                    property_ids = self.ingest(location, listing_type, record_id, kwargs, force_refresh)
 
+            self.mark_scraped(property_ids)
             logger.info(f"Successfully processed {len(property_ids)} properties")
+            logger.info(f"Odoo transport stats: {self.transport.stats()}")
+            logger.info(f"Identity cache stats: {self.identity_cache.stats()}")
 
             # Acknowledge message
-            ch.basic_ack(delivery_tag=method.delivery_tag)
-
+            succeeded = True
+            self.settle(ch, method.delivery_tag)
+
+        except ScrapeThrottledError as e:
+            # Hold the message until searches resume, instead of sleeping in the consumer
+            logger.warning(f"{e}. Requeueing the message in {e.retry_after:.0f}s.")
+            requeue = True
+            delay = e.retry_after
+            self.settle(ch, method.delivery_tag, ack=False, requeue=True, delay=delay)
+        except IngestInterruptedError as e:
+            logger.warning(f"{e}. Requeueing the message to retry it later.")
+            requeue = True
+            self.settle(ch, method.delivery_tag, ack=False, requeue=True)
         except json.JSONDecodeError:
             logger.error("Invalid JSON in message")
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self.settle(ch, method.delivery_tag)
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             # Remove the message from the queue, something went wrong.
-            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            self.settle(ch, method.delivery_tag, ack=False)
+        finally:
+            if coalesce_key is not None:
+                # Duplicates that arrived meanwhile share this message's outcome
+                for delivery_tag in self.coalescer.finish(coalesce_key, succeeded):
+                    MESSAGES.labels('coalesced').inc()
+                    self.settle(ch, delivery_tag, ack=succeeded, requeue=requeue, delay=delay)
+
+    def ingest(self, location: str, listing_type: str, record_id: Optional[int], kwargs: Dict[str, Any],
+               force_refresh: bool = False) -> List[int]:
+        """
+        Scrape a location and write every property found to Odoo
+
+        Args:
+            location: Location to search for properties
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            record_id: Optional record ID for direct update
+            kwargs: Additional parameters for the search
+            force_refresh: Write listings even if their fingerprint is unchanged
+
+        Returns:
+            List of Odoo record IDs
+        """
+        # Log the parameters being passed to scrape_property
+        logger.info(
+            f"Calling scrape_property with: location={location}, listing_type={listing_type}, kwargs={kwargs}")
+
+        # Searches for many properties are written page by page while later pages are fetched.
+        # Searches that are not for a record are checkpointed, so a failed message can resume
+        checkpoint = None
+        if not record_id and self.checkpoints is not None:
+            checkpoint = self.checkpoints.open(query_key(location, listing_type, kwargs))
+            pages = self.checkpointed_pages(checkpoint, location, listing_type, kwargs)
+        else:
+            pages = self.search_pages(location, listing_type, record_id, kwargs)
+
+        property_ids = []
+        found = 0
+
+        try:
+            for index, properties in pages:
+                if record_id and len(properties) > 1:
+                    logger.error("There was more than one item at this address, so we will take only the top result")
+                    properties = properties[:1]
+
+                found += len(properties)
+                properties, written_ids = self.skip_written(checkpoint, properties)
+                property_ids.extend(written_ids)
+
+                keys = [p.property_id for p in properties]
+                page_ids = self.ingest_page(properties, record_id, force_refresh)
+                property_ids.extend(page_ids)
+
+                if checkpoint is not None:
+                    self.checkpoints.page_written(checkpoint, index, {
+                        key: property_id for key, property_id in zip(keys, page_ids) if key and property_id
+                    })
+        except Exception as e:
+            error = self.interrupted(checkpoint, location, e)
+            if error is e:
+                raise
+            raise error from e
+
+        if checkpoint is not None:
+            self.checkpoints.finish(checkpoint)
+            if checkpoint.resumed:
+                CHECKPOINTS.labels('completed').inc()
+
+        PROPERTIES_PER_MESSAGE.observe(found)
+        return property_ids
+
+    def ingest_page(self, properties: List[Any], record_id: Optional[int] = None,
+                    force_refresh: bool = False) -> List[int]:
+        """
+        Write a page of scraped properties to Odoo
+
+        The page is mapped first and then emptied: the payloads hold everything
+        written, so the Pydantic models are released before the Odoo round trips.
+
+        Args:
+            properties: List of Property Pydantic models (emptied once mapped)
+            record_id: Optional record ID for direct update
+            force_refresh: Write listings even if their fingerprint is unchanged
+
+        Returns:
+            List of Odoo record IDs
+        """
+        payloads = list(timed_iter(self.map_properties(properties, record_id), 'map'))
+        properties.clear()
+
+        # Resolve which properties already exist before writing anything
+        resolved_ids = None
+        if not record_id and payloads:
+            with stage_timer('identity'):
+                resolved_ids = self.resolve_identities([self.payload_identity(payload) for payload in payloads])
+
+            if resolved_ids is not None:
+                for payload, resolved_id in zip(payloads, resolved_ids):
+                    payload['record_id'] = resolved_id
+
+        # Listings synced from the scraper are written in batches so their children are reconciled together
+        batch_size = 1 if self.server_upsert else SYNC_BATCH_SIZE
+        property_ids = []
+        for start in range(0, len(payloads), batch_size):
+            property_ids.extend(self.write_batch(
+                payloads[start:start + batch_size], force_refresh, lookup=resolved_ids is None))
+
+        return property_ids
+
+    def refresh_area(self, location: str, listing_type: str, targets: List[Dict[str, Any]],
+                     kwargs: Dict[str, Any], force_refresh: bool = False) -> List[int]:
+        """
+        Refresh the tracked listings of one area with a single search
+
+        Properties matched to the listings of the message are written to those
+        listings; the other properties of the area are ignored. Listings the search
+        did not find (pending or sold ones, addresses the search missed) are scraped
+        by address, like a message for that listing alone.
+
+        Args:
+            location: Area to search (ZIP code, or city and state)
+            listing_type: Type of listing (for_sale, for_rent, sold, pending)
+            targets: Listings to refresh (record_id, property_id, mls, mls_id, address)
+            kwargs: Additional parameters for the search
+            force_refresh: Write listings even if their fingerprint is unchanged
+
+        Returns:
+            List of Odoo record IDs
+        """
+        logger.info(f"Refreshing {len(targets)} listings with one search of {location}")
+
+        properties = self.scrape_property(location, listing_type, **kwargs)
+        PROPERTIES_PER_MESSAGE.observe(len(properties))
+
+        matches, unmatched = self.match_refresh_targets(properties, targets)
+
+        property_ids = []
+        batch = []
+        payloads = (self.build_listing_payload(property_model, record_id) for property_model, record_id in matches)
+        for payload in timed_iter(payloads, 'map'):
+            batch.append(payload)
+            if len(batch) >= (1 if self.server_upsert else SYNC_BATCH_SIZE):
+                property_ids.extend(self.write_batch(batch, force_refresh, lookup=False))
+                batch = []
+
+        if batch:
+            property_ids.extend(self.write_batch(batch, force_refresh, lookup=False))
+
+        for target in unmatched:
+            address = target.get('address')
+            if not address:
+                logger.warning(f"Listing {target['record_id']} was not found and has no address, skipping")
+                continue
+
+            logger.info(f"Listing {target['record_id']} was not found in {location}, scraping its address")
+            try:
+                with self.listing_locks.hold(self.message_lock_keys(address, target['record_id'])):
+                    property_ids.extend(
+                        self.ingest(address, listing_type, target['record_id'], {'limit': 1}, force_refresh))
+            except ScrapeThrottledError:
+                raise
+            except Exception as e:
+                # One listing failing must not fail the rest of the area
+                logger.error(f"Error refreshing listing {target['record_id']} by address: {str(e)}")
+
+        return property_ids
+
+    def write_batch(self, payloads: List[Dict[str, Any]], force_refresh: bool = False,
+                    lookup: bool = True) -> List[int]:
+        """
+        Write a batch of mapped properties, skipping the ones that did not change
+
+        Args:
+            payloads: Mapped properties from map_properties
+            force_refresh: Write listings even if their fingerprint is unchanged
+            lookup: Search for an existing listing when a payload has no record_id
+
+        Returns:
+            List of Odoo record IDs, in the order of payloads
+        """
+        # Another worker may have created a listing since it was resolved, so the
+        # identity cache is checked again once the listings are locked
+        lock_keys = [key for payload in payloads for key in self.listing_lock_keys(payload)]
+
+        with self.listing_locks.hold(lock_keys):
+            fingerprints = []
+            for payload in payloads:
+                with stage_timer('dedup'):
+                    fingerprints.append(self.skip_unchanged_sections(payload, force_refresh))
+
+            written_ids, failed = self.create_or_update_properties(
+                [payload for payload, fingerprint in zip(payloads, fingerprints) if fingerprint is not None],
+                lookup
+            )
+            written = iter(enumerate(written_ids))
+
+            property_ids = []
+            for payload, fingerprint in zip(payloads, fingerprints):
+                if fingerprint is None:
+                    property_id = payload['record_id']
+                    logger.info(f"Property {property_id} is unchanged since its last scrape, skipping")
+                else:
+                    position, property_id = next(written)
+                    self.remember_fingerprint(payload, property_id, fingerprint, failed.get(position, ()))
+
+                property_ids.append(property_id)
+
+        return property_ids
 
     def start_consuming(self):
         """Start consuming messages from RabbitMQ"""
-        logger.info(f"Starting to consume messages from queue: {RABBITMQ_QUEUE}")
+        start_metrics_server(SCRAPER_METRICS_PORT)
+
+        logger.info(
+            f"Starting to consume messages from queue: {RABBITMQ_QUEUE} "
+            f"(workers: {SCRAPER_WORKERS}, prefetch: {SCRAPER_PREFETCH})")
 
         # Set up consumer
-        self.channel.basic_qos(prefetch_count=1)
+        self.channel.basic_qos(prefetch_count=SCRAPER_PREFETCH)
+
+        if SCRAPER_WORKERS > 1:
+            self.workers = ThreadPoolExecutor(max_workers=SCRAPER_WORKERS, thread_name_prefix='scraper')
 
         self.channel.basic_consume(
             queue=RABBITMQ_QUEUE,
-            on_message_callback=self.process_message
+            on_message_callback=self.on_message
         )
 
         # Start consuming
@@ -1525,6 +2875,30 @@ class PropertyScraper:
             logger.info("Stopping consumer")
             self.channel.stop_consuming()
         finally:
+            if self.workers is not None:
+                # Let running messages finish, then deliver their acks
+                self.workers.shutdown(wait=True, cancel_futures=True)
+                if self.connection.is_open:
+                    self.connection.process_data_events(time_limit=0)
+
+            logger.info(f"Odoo transport stats: {self.transport.stats()}")
+            self.transport.close()
+            shutdown_mapping_pool()
+
+            if self.fingerprints is not None:
+                self.fingerprints.close()
+
+            if self.scrape_cache is not None:
+                logger.info(f"HomeHarvest result cache stats: {self.scrape_cache.stats()}")
+                self.scrape_cache.close()
+
+            if self.rate_limiter is not None:
+                logger.info(f"HomeHarvest rate limiter stats: {self.rate_limiter.stats()}")
+                self.rate_limiter.close()
+
+            if self.checkpoints is not None:
+                self.checkpoints.close()
+
             if self.connection.is_open:
                 self.connection.close()
 
@@ -1573,6 +2947,11 @@ Read more: https://github.com/adomi-io/listing-lab
         # Exit gracefully without stack trace so users can follow instructions
         sys.exit(0)
 
-    # Create and start the scraper
-    scraper = PropertyScraper()
-    scraper.start_consuming()
+    if SCRAPER_RUNTIME == 'async':
+        from async_scraper import run
+
+        run()
+    else:
+        # Create and start the scraper
+        scraper = PropertyScraper()
+        scraper.start_consuming()
@@ -0,0 +1,159 @@
+"""
+Shared fixtures of the scraper tests
+
+The scraper reads its settings when it is imported, so the environment is set up
+here first: an API key for the stand-in Odoo and a throwaway state directory. Each
+test gets its own fake Odoo (benchmarks/fake_odoo.py) and its own SQLite stores.
+"""
+import os
+import sys
+import tempfile
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SCRAPER_DIR, os.path.join(SCRAPER_DIR, 'benchmarks')]
+
+os.environ.setdefault('ODOO_API_KEY', 'test')
+os.environ['SCRAPER_STATE_DIR'] = tempfile.mkdtemp(prefix='scraper_tests_')
+
+import pytest  # noqa: E402
+
+import scraper  # noqa: E402
+from fake_odoo import FakeOdoo, start_fake_odoo  # noqa: E402
+
+
+class Channel:
+    """Stand-in for the pika channel, recording how each message was settled"""
+
+    def __init__(self):
+        self.settled = []
+
+    def basic_ack(self, delivery_tag):
+        self.settled.append((delivery_tag, 'ack'))
+
+    def basic_nack(self, delivery_tag, requeue=False):
+        self.settled.append((delivery_tag, 'requeue' if requeue else 'nack'))
+
+
+@pytest.fixture
+def channel():
+    return Channel()
+
+
+class Clock:
+    """Stand-in for the time module of the SQLite stores; sleeping moves the clock on"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def odoo_server():
+    """Fake Odoo serving upsert_scraped_listing, on a free local port"""
+    server = start_fake_odoo(FakeOdoo())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def odoo_calls(odoo_server, monkeypatch):
+    """(model, method, arguments) of every call the fake Odoo receives, in order"""
+    calls = []
+    call = odoo_server.odoo.call
+
+    def recording_call(model, method, kwargs):
+        calls.append((model, method, kwargs))
+        return call(model, method, kwargs)
+
+    monkeypatch.setattr(odoo_server.odoo, 'call', recording_call)
+    return calls
+
+
+@pytest.fixture
+def make_scraper(odoo_server, tmp_path, monkeypatch):
+    """
+    Build PropertyScrapers talking to the fake Odoo, with their stores in tmp_path
+
+    The result cache, rate limit and coalescing are off unless a test turns them on
+    by passing the scraper settings, e.g. make(SCRAPE_CACHE_TTL=900). Calling it with
+    server_upsert=False makes the fake Odoo answer upsert_scraped_listing with 404,
+    so listings are synced from the scraper.
+    """
+    monkeypatch.setattr(scraper, 'ODOO_URL', f'http://127.0.0.1:{odoo_server.server_port}')
+    for name, filename in (('FINGERPRINT_DB', 'fingerprints.sqlite3'), ('SCRAPE_CACHE_DB', 'scrape_cache.sqlite3'),
+                           ('SCRAPE_RATE_DB', 'rate_limit.sqlite3'), ('SCRAPE_CHECKPOINT_DB', 'checkpoints.sqlite3')):
+        monkeypatch.setattr(scraper, name, str(tmp_path / filename))
+
+    scrapers = []
+
+    def make(server_upsert: bool = True, **settings) -> scraper.PropertyScraper:
+        odoo_server.odoo.server_upsert = server_upsert
+        settings = dict(SCRAPE_CACHE_TTL=0, SCRAPE_RATE_PER_MINUTE=0, SCRAPER_COALESCE_WINDOW=0,
+                        ODOO_SERVER_UPSERT=server_upsert) | settings
+        for name, value in settings.items():
+            monkeypatch.setattr(scraper, name, value)
+
+        property_scraper = scraper.PropertyScraper(connect_rabbitmq=False)
+        scrapers.append(property_scraper)
+        return property_scraper
+
+    yield make
+
+    for property_scraper in scrapers:
+        property_scraper.transport.close()
+        for store in (property_scraper.fingerprints, property_scraper.scrape_cache,
+                      property_scraper.rate_limiter, property_scraper.checkpoints):
+            if store is not None:
+                store.close()
+
+
+class Searches:
+    """
+    Stand-in for HomeHarvest answering each location with preset properties
+
+    Streamed searches are served in pages of page_size. failures maps a page index
+    to the exception raised instead of fetching that page; failures[None] is raised
+    by the next search that is not streamed.
+    """
+
+    def __init__(self, page_size: int = 2):
+        self.page_size = page_size
+        self.results = {}
+        self.failures = {}
+        self.calls = []
+
+    def scrape_property(self, location, listing_type='for_sale', **kwargs):
+        self.calls.append(('search', location))
+        if None in self.failures:
+            raise self.failures.pop(None)
+        return list(self.results.get(location, []))
+
+    def iter_property_pages(self, location, listing_type='for_sale', prefetch=2, start_page=0, **kwargs):
+        self.calls.append(('pages', location, start_page))
+        properties = self.results.get(location, [])
+        for index, start in enumerate(range(start_page * self.page_size, len(properties), self.page_size), start_page):
+            if index in self.failures:
+                raise self.failures.pop(index)
+            yield properties[start:start + self.page_size]
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """HomeHarvest stand-in patched into the scraper"""
+    searches = Searches()
+    monkeypatch.setattr(scraper, 'scrape_property', searches.scrape_property)
+    monkeypatch.setattr(scraper, 'iter_property_pages', searches.iter_property_pages)
+    return searches
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import time
+
+import pytest
+import requests
+
+import async_scraper
+import scraper
+from async_scraper import AsyncKeyedLock, AsyncOdooClient, AsyncPropertyScraper
+from fixtures import make_property
+from scraper import MessageCoalescer
+
+
+def throttled_response():
+    response = requests.Response()
+    response.status_code = 429
+    return response
+
+
+def odoo_client(odoo_server, **options):
+    return AsyncOdooClient(f'http://127.0.0.1:{odoo_server.server_port}/json/2', {}, **options)
+
+
+class Message:
+    """Stand-in for an aio-pika incoming message, recording how it was settled"""
+
+    def __init__(self, **body):
+        self.body = json.dumps(body).encode()
+        self.timestamp = None
+        self.settled = []
+
+    async def ack(self):
+        self.settled.append('ack')
+
+    async def nack(self, requeue=False):
+        self.settled.append('requeue' if requeue else 'nack')
+
+
+@pytest.fixture
+def run_scraper(odoo_server, tmp_path, monkeypatch):
+    """
+    Run a coroutine against an AsyncPropertyScraper connected to the fake Odoo
+
+    The asyncio runtime imports its settings from scraper, so they are patched on
+    async_scraper; the result cache, rate limit and coalescing are off unless a test
+    passes them, e.g. run(scenario, SCRAPE_RATE_PER_MINUTE=60).
+    """
+    monkeypatch.setattr(async_scraper, 'ODOO_URL', f'http://127.0.0.1:{odoo_server.server_port}')
+    for name, filename in (('FINGERPRINT_DB', 'fingerprints.sqlite3'), ('SCRAPE_CACHE_DB', 'scrape_cache.sqlite3'),
+                           ('SCRAPE_RATE_DB', 'rate_limit.sqlite3'), ('SCRAPE_CHECKPOINT_DB', 'checkpoints.sqlite3')):
+        monkeypatch.setattr(async_scraper, name, str(tmp_path / filename))
+
+    def run(scenario, **settings):
+        settings = dict(SCRAPE_CACHE_TTL=0, SCRAPE_RATE_PER_MINUTE=0, SCRAPER_COALESCE_WINDOW=0) | settings
+        for name, value in settings.items():
+            monkeypatch.setattr(async_scraper, name, value)
+
+        async def main():
+            property_scraper = AsyncPropertyScraper()
+            await property_scraper.connect_odoo()
+            try:
+                return await scenario(property_scraper)
+            finally:
+                await property_scraper.odoo.close()
+                for store in (property_scraper.fingerprints, property_scraper.scrape_cache,
+                              property_scraper.rate_limiter, property_scraper.checkpoints):
+                    if store is not None:
+                        store.close()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_calls_keep_the_session_timeout(odoo_server):
+    odoo_server.odoo.latency = 1
+
+    async def call():
+        client = odoo_client(odoo_server, timeout=0.2)
+        await client.open()
+        try:
+            start = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await client.post('res.users/context_get', {})
+            return time.monotonic() - start
+        finally:
+            await client.close()
+
+    assert asyncio.run(call()) < 0.9
+
+
+def test_call_timeout_overrides_the_session_timeout(odoo_server):
+    odoo_server.odoo.latency = 0.5
+
+    async def call():
+        client = odoo_client(odoo_server, timeout=0.2)
+        await client.open()
+        try:
+            return await client.post('res.users/context_get', {}, timeout=5)
+        finally:
+            await client.close()
+
+    status, _ = asyncio.run(call())
+    assert status == 200
+
+def test_message_upserts_its_listings(run_scraper, odoo_server, searches):
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+    first, second = Message(location='Austin, TX'), Message(location='Austin, TX')
+
+    async def scenario(property_scraper):
+        await property_scraper.handle_message(first)
+        odoo_server.odoo.reset_calls()
+        await property_scraper.handle_message(second)
+
+    run_scraper(scenario)
+
+    assert len(odoo_server.odoo.tables['real_estate.listing']) == 5
+    assert first.settled == second.settled == ['ack']
+    # Unchanged listings are not written again, but they were scraped
+    assert ('real_estate.listing', 'upsert_scraped_listing') not in odoo_server.odoo.calls
+    assert odoo_server.odoo.calls[('real_estate.listing', 'mark_scraped')] == 1
+
+
+def test_throttled_message_is_requeued_after_the_backoff(run_scraper, searches):
+    searches.failures[None] = requests.exceptions.HTTPError('429 Client Error', response=throttled_response())
+    message = Message(location='1 Main St', record_id=7)
+
+    async def scenario(property_scraper):
+        await property_scraper.handle_message(message)
+        # The message waits in a task of its own, not in a message slot
+        assert message.settled == [] and len(property_scraper._delayed) == 1
+        assert not property_scraper._messages.locked()
+
+        await asyncio.sleep(0.5)
+        assert not property_scraper._delayed
+
+    run_scraper(scenario, SCRAPE_RATE_PER_MINUTE=60, SCRAPE_BACKOFF_MIN=0.2, SCRAPE_BACKOFF_MAX=0.2)
+
+    assert message.settled == ['requeue']
+
+
+def test_duplicate_messages_are_coalesced(run_scraper, searches):
+    searches.results['Austin, TX'] = [make_property(i) for i in range(3)]
+    messages = [Message(location='Austin, TX'), Message(location='Austin, TX')]
+
+    async def scenario(property_scraper):
+        property_scraper.coalescer = MessageCoalescer(window=60)
+        await asyncio.gather(*(property_scraper.handle_message(message) for message in messages))
+
+    run_scraper(scenario)
+
+    assert searches.calls == [('pages', 'Austin, TX', 0)]
+    assert [message.settled for message in messages] == [['ack'], ['ack']]
+
+
+def test_interrupted_search_resumes_from_its_checkpoint(run_scraper, odoo_server, searches, monkeypatch):
+    monkeypatch.setattr(scraper, 'SCRAPE_STREAM_PAGES', True)
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+    searches.failures[2] = ValueError('connection reset')
+    first, second = Message(location='Austin, TX'), Message(location='Austin, TX')
+
+    async def scenario(property_scraper):
+        await property_scraper.handle_message(first)
+        odoo_server.odoo.reset_calls()
+        await property_scraper.handle_message(second)
+
+    run_scraper(scenario, FINGERPRINT_SKIP=False)
+
+    assert first.settled == ['requeue'] and second.settled == ['ack']
+    assert searches.calls == [('pages', 'Austin, TX', 0), ('pages', 'Austin, TX', 2)]
+    assert len(odoo_server.odoo.tables['real_estate.listing']) == 5
+    assert odoo_server.odoo.calls[('real_estate.listing', 'upsert_scraped_listing')] == 1
+
+
+def test_keyed_lock_serializes_owners_of_the_same_key():
+    events = []
+
+    async def hold(locks, key, owner):
+        async with locks.hold([key], owner=owner):
+            # The same owner may take its keys again
+            async with locks.hold([key], owner=owner):
+                events.append(('in', owner))
+                await asyncio.sleep(0.05)
+                events.append(('out', owner))
+
+    async def scenario():
+        locks = AsyncKeyedLock()
+        await asyncio.gather(
+            hold(locks, ('property_id', '1'), 'a'),
+            hold(locks, ('property_id', '1'), 'b'),
+            hold(locks, ('property_id', '2'), 'c'),
+        )
+
+    asyncio.run(scenario())
+
+    # b waits for a, c runs alongside a
+    assert events.index(('out', 'a')) < events.index(('in', 'b'))
+    assert events.index(('in', 'c')) < events.index(('out', 'a'))
@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import checkpoints
+from checkpoints import CheckpointStore
+from fake_odoo import FakeOdooError
+from fixtures import make_property
+from scrape_cache import query_key
+
+AUSTIN = query_key('Austin, TX', 'for_sale', {})
+
+
+def send(property_scraper, channel, delivery_tag, **message):
+    property_scraper.process_message(channel, SimpleNamespace(delivery_tag=delivery_tag), None, json.dumps(message))
+
+
+def test_interrupted_search_resumes_from_its_checkpoint(make_scraper, odoo_server, searches, channel):
+    property_scraper = make_scraper(SCRAPE_STREAM_PAGES=True, FINGERPRINT_SKIP=False)
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+    searches.failures[2] = ValueError('connection reset')
+
+    send(property_scraper, channel, 1, location='Austin, TX')
+
+    assert channel.settled == [(1, 'requeue')]
+    checkpoint = property_scraper.checkpoints.open(AUSTIN)
+    assert checkpoint.resumed and checkpoint.next_page == 2
+    assert sorted(checkpoint.written) == sorted(p.property_id for p in searches.results['Austin, TX'][:4])
+
+    # The redelivered message fetches from the failed page on, and writes only its listing
+    odoo_server.odoo.reset_calls()
+    send(property_scraper, channel, 2, location='Austin, TX')
+
+    assert searches.calls == [('pages', 'Austin, TX', 0), ('pages', 'Austin, TX', 2)]
+    assert channel.settled == [(1, 'requeue'), (2, 'ack')]
+    assert len(odoo_server.odoo.tables['real_estate.listing']) == 5
+    assert odoo_server.odoo.calls[('real_estate.listing', 'upsert_scraped_listing')] == 1
+
+    # A completely written search leaves no checkpoint behind
+    assert not property_scraper.checkpoints.open(AUSTIN).resumed
+
+
+def test_page_failing_to_write_resumes_from_its_stored_copy(make_scraper, odoo_server, searches, channel,
+                                                           monkeypatch):
+    property_scraper = make_scraper(SCRAPE_STREAM_PAGES=True, FINGERPRINT_SKIP=False)
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+
+    upsert = odoo_server.odoo.upsert_scraped_listing
+    failures = ['9000003']
+
+    def failing_upsert(payload):
+        if payload['listing']['property_id'] in failures:
+            failures.remove(payload['listing']['property_id'])
+            raise FakeOdooError('could not serialize access')
+        return upsert(payload)
+
+    monkeypatch.setattr(odoo_server.odoo, 'upsert_scraped_listing', failing_upsert)
+
+    send(property_scraper, channel, 1, location='Austin, TX')
+    assert channel.settled == [(1, 'requeue')]
+
+    # Page 0 is done; page 1 is written again from the checkpoint, not fetched again
+    odoo_server.odoo.reset_calls()
+    send(property_scraper, channel, 2, location='Austin, TX')
+
+    assert searches.calls == [('pages', 'Austin, TX', 0), ('pages', 'Austin, TX', 2)]
+    assert channel.settled == [(1, 'requeue'), (2, 'ack')]
+    assert len(odoo_server.odoo.tables['real_estate.listing']) == 5
+    assert odoo_server.odoo.calls[('real_estate.listing', 'upsert_scraped_listing')] == 3
+
+def test_stored_pages_are_written_first(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.sqlite3'), ttl=60)
+    checkpoint = store.open(AUSTIN)
+    store.save_page(checkpoint, 0, [make_property(1), make_property(2)])
+    store.save_page(checkpoint, 1, [make_property(3)])
+    store.page_written(checkpoint, 0, {'9000001': 11, '9000002': 12})
+
+    resumed = store.open(AUSTIN)
+    assert resumed.resumed and resumed.next_page == 2 and not resumed.fetched_all
+    assert resumed.written == {'9000001': 11, '9000002': 12}
+    assert [(index, [p.property_id for p in page]) for index, page in store.pages(resumed)] == [(1, ['9000003'])]
+    store.close()
+
+
+def test_checkpoint_expires_after_its_ttl(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(checkpoints, 'time', clock)
+    store = CheckpointStore(str(tmp_path / 'checkpoints.sqlite3'), ttl=60)
+    checkpoint = store.open(AUSTIN)
+    store.save_page(checkpoint, 0, [make_property(1)])
+
+    clock.now += 59
+    assert store.open(AUSTIN).resumed
+
+    # A checkpoint nothing was saved to for longer than the TTL is dropped
+    clock.now += 60
+    expired = store.open(AUSTIN)
+    assert not expired.resumed and expired.next_page == 0 and not expired.written
+    assert list(store.pages(expired)) == []
+    store.close()
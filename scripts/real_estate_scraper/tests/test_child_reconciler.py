@@ -0,0 +1,88 @@
+import pytest
+
+from scraper import ChildReconciler
+
+
+def children(odoo, model):
+    """Listing ID -> values of its children, in creation order"""
+    result = {}
+    for record in odoo.tables[model].values():
+        values = {name: value for name, value in record.items() if name not in ('id', 'property_id')}
+        result.setdefault(record['property_id'], []).append(values)
+    return result
+
+
+@pytest.fixture
+def listings(odoo_server):
+    odoo = odoo_server.odoo
+    return [odoo.create('real_estate.listing', {'property_id': str(9000000 + i)}) for i in range(3)]
+
+
+def test_children_of_many_listings_are_reconciled_at_once(make_scraper, odoo_server, odoo_calls, listings):
+    odoo = odoo_server.odoo
+    first, second, untouched = listings
+
+    def popularity(listing_id, days, views):
+        return odoo.create('real_estate.popularity',
+                           {'property_id': listing_id, 'last_n_days': days, 'views_total': views})
+
+    ids = {
+        'first 7': popularity(first, 7, 10),
+        'first 30': popularity(first, 30, 40),
+        'first 7 again': popularity(first, 7, 10),
+        'second 90': popularity(second, 90, 5),
+        'untouched 7': popularity(untouched, 7, 1),
+    }
+
+    reconciler = ChildReconciler(make_scraper(server_upsert=False), 'real_estate.popularity', 'popularity_ids',
+                                 ('last_n_days',))
+    odoo_calls.clear()
+    counts = reconciler.reconcile({
+        first: [{'last_n_days': 7, 'views_total': 10}, {'last_n_days': 30, 'views_total': 45},
+                {'last_n_days': 365, 'views_total': 400}],
+        second: [{'last_n_days': 7, 'views_total': 2}],
+        # An empty section is missing data, not an empty collection
+        untouched: [],
+    })
+
+    assert counts == {'created': 2, 'updated': 1, 'deleted': 2}
+    assert children(odoo, 'real_estate.popularity') == {
+        first: [{'last_n_days': 7, 'views_total': 10}, {'last_n_days': 30, 'views_total': 45},
+                {'last_n_days': 365, 'views_total': 400}],
+        second: [{'last_n_days': 7, 'views_total': 2}],
+        untouched: [{'last_n_days': 7, 'views_total': 1}],
+    }
+    assert odoo.tables['real_estate.popularity'][ids['first 30']]['views_total'] == 45
+
+    # One read for every listing, one unlink, one create and a write of the changed field only
+    assert [(method, kwargs) for model, method, kwargs in odoo_calls if method != 'fields_get'] == [
+        ('search_read', {'domain': [['property_id', 'in', [first, second]]],
+                         'fields': ['id', 'property_id', 'last_n_days', 'views_total'], 'order': 'id'}),
+        ('unlink', {'ids': [ids['first 7 again'], ids['second 90']]}),
+        ('write', {'ids': [first], 'vals': {'popularity_ids': [[1, ids['first 30'], {'views_total': 45}]]}}),
+        ('create', {'vals_list': [{'last_n_days': 365, 'views_total': 400, 'property_id': first},
+                                  {'last_n_days': 7, 'views_total': 2, 'property_id': second}]}),
+    ]
+
+
+def test_rows_are_matched_on_every_key_field(make_scraper, odoo_server, listings):
+    odoo = odoo_server.odoo
+    listing_id = listings[0]
+    garage = odoo.create('real_estate.feature', {'property_id': listing_id, 'parent_category': 'Exterior',
+                                                 'category': 'Garage', 'text': '2 cars'})
+
+    reconciler = ChildReconciler(make_scraper(server_upsert=False), 'real_estate.feature', 'feature_ids',
+                                 ('parent_category', 'category'))
+    counts = reconciler.reconcile({listing_id: [
+        {'parent_category': 'Exterior', 'category': 'Garage', 'text': '2 cars'},
+        {'parent_category': 'Interior', 'category': 'Garage', 'text': 'Workshop'},
+        # Repeated keys collapse to the last row
+        {'parent_category': 'Interior', 'category': 'Garage', 'text': 'Workshop, storage'},
+    ]})
+
+    assert counts == {'created': 1, 'updated': 0, 'deleted': 0}
+    assert garage in odoo.tables['real_estate.feature']
+    assert children(odoo, 'real_estate.feature')[listing_id] == [
+        {'parent_category': 'Exterior', 'category': 'Garage', 'text': '2 cars'},
+        {'parent_category': 'Interior', 'category': 'Garage', 'text': 'Workshop, storage'},
+    ]
@@ -0,0 +1,30 @@
+import json
+from types import SimpleNamespace
+
+import scraper
+
+
+def send(property_scraper, channel, delivery_tag, **message):
+    property_scraper.process_message(channel, SimpleNamespace(delivery_tag=delivery_tag), None, json.dumps(message))
+
+
+def test_forced_refresh_is_not_coalesced_into_normal_run(make_scraper, channel, monkeypatch):
+    property_scraper = make_scraper()
+    property_scraper.coalescer = scraper.MessageCoalescer(window=60)
+
+    ingested = []
+
+    def ingest(location, listing_type, record_id, kwargs, force_refresh):
+        ingested.append(force_refresh)
+        return [record_id]
+
+    monkeypatch.setattr(property_scraper, 'ingest', ingest)
+
+    send(property_scraper, channel, 1, location='1 Main St', record_id=7)
+    send(property_scraper, channel, 2, location='1 Main St', record_id=7)
+    send(property_scraper, channel, 3, location='1 Main St', record_id=7, force_refresh=True)
+    send(property_scraper, channel, 4, location='1 Main St', record_id=7, force_refresh=True)
+
+    # The normal duplicate and the forced duplicate are folded, the first forced message is not
+    assert ingested == [False, True]
+    assert channel.settled == [(1, 'ack'), (2, 'ack'), (3, 'ack'), (4, 'ack')]
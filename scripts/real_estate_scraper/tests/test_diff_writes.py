@@ -0,0 +1,48 @@
+from fixtures import make_property
+
+
+def writes(calls):
+    return [(model, method, kwargs) for model, method, kwargs in calls if method in ('create', 'write', 'unlink')]
+
+
+def sync(property_scraper, prop, **changes):
+    payload = property_scraper.build_listing_payload(prop)
+    for section, value in changes.items():
+        payload[section] = value
+    property_ids, failed = property_scraper.create_or_update_properties([payload])
+    assert not failed
+    return property_ids[0]
+
+
+def test_unchanged_listing_is_not_written(make_scraper, odoo_calls):
+    property_scraper = make_scraper(server_upsert=False)
+    listing_id = sync(property_scraper, make_property(1))
+
+    odoo_calls.clear()
+    assert sync(property_scraper, make_property(1)) == listing_id
+
+    assert writes(odoo_calls) == []
+
+
+def test_only_changed_fields_are_written(make_scraper, odoo_server, odoo_calls):
+    property_scraper = make_scraper(server_upsert=False)
+    listing_id = sync(property_scraper, make_property(1))
+    listing = odoo_server.odoo.tables['real_estate.listing'][listing_id]
+    tag_ids = listing['listing_tag_ids']
+
+    odoo_calls.clear()
+    sync(property_scraper, make_property(1, price_offset=5000))
+
+    assert writes(odoo_calls) == [
+        ('real_estate.listing', 'write', {'ids': [listing_id], 'vals': {'price': listing['price']}}),
+    ]
+
+    # Relations are only sent when their members change, and then replaced as a whole
+    odoo_calls.clear()
+    sync(property_scraper, make_property(1, price_offset=5000),
+         tags=list(reversed(make_property(1).tags)), schools=['Lincoln Elementary', 'Central High', 'School 1'])
+    assert writes(odoo_calls) == []
+
+    sync(property_scraper, make_property(1, price_offset=5000), tags=['central_air'])
+    [(_, _, write)] = writes(odoo_calls)
+    assert write == {'ids': [listing_id], 'vals': {'listing_tag_ids': [[6, 0, tag_ids[:1]]]}}
@@ -0,0 +1,82 @@
+from fixtures import make_property
+from fingerprints import payload_fingerprint
+
+
+def odoo_calls(odoo_server):
+    """Calls made to the fake Odoo since the last reset, as 'model/method' -> count"""
+    return {f'{model}/{method}': count for (model, method), count in odoo_server.odoo.calls.items()}
+
+
+def test_payload_fingerprint_ignores_tag_order(make_scraper):
+    property_scraper = make_scraper()
+    payload = property_scraper.build_listing_payload(make_property(1))
+    reordered = dict(payload, tags=list(reversed(payload['tags'])))
+
+    assert payload_fingerprint(payload) == payload_fingerprint(reordered)
+
+
+def test_unchanged_listing_is_skipped(make_scraper, odoo_server):
+    property_scraper = make_scraper()
+    record_id, = property_scraper.ingest_page([make_property(1)])
+
+    odoo_server.odoo.reset_calls()
+    assert property_scraper.ingest_page([make_property(1)]) == [record_id]
+
+    assert 'real_estate.listing/upsert_scraped_listing' not in odoo_calls(odoo_server)
+
+
+def test_force_refresh_writes_unchanged_listing(make_scraper, odoo_server):
+    property_scraper = make_scraper()
+    property_scraper.ingest_page([make_property(1)])
+
+    odoo_server.odoo.reset_calls()
+    property_scraper.ingest_page([make_property(1)], force_refresh=True)
+
+    assert odoo_calls(odoo_server)['real_estate.listing/upsert_scraped_listing'] == 1
+
+
+def test_only_changed_sections_are_sent(make_scraper, odoo_server, monkeypatch):
+    property_scraper = make_scraper()
+    property_scraper.ingest_page([make_property(1)])
+
+    sent = []
+    upsert_property = property_scraper.upsert_property
+    monkeypatch.setattr(property_scraper, 'upsert_property',
+                        lambda payload: sent.append(payload) or upsert_property(payload))
+
+    property_scraper.ingest_page([make_property(1, price_offset=5000)])
+
+    payload, = sent
+    assert payload['listing']['price'] == make_property(1, price_offset=5000).list_price
+    assert payload['photos'] == []
+    assert payload['tax_history'] == []
+
+
+def test_failed_section_is_sent_again(make_scraper, odoo_server, monkeypatch):
+    property_scraper = make_scraper(server_upsert=False)
+    reconciler = property_scraper.child_reconcilers['photos']
+    reconcile = reconciler.reconcile
+    reconciled = []
+    failing = [True]
+
+    def reconcile_photos(rows_by_listing):
+        reconciled.append(list(rows_by_listing))
+        if failing[0]:
+            raise Exception("Odoo rejected the photos")
+        return reconcile(rows_by_listing)
+
+    monkeypatch.setattr(reconciler, 'reconcile', reconcile_photos)
+    record_id, = property_scraper.ingest_page([make_property(1, photos=3)])
+    assert not odoo_server.odoo.tables['real_estate.photo']
+
+    # The photos were not written, so the next scrape of the unchanged listing sends them again
+    failing[0] = False
+    reconciled.clear()
+    assert property_scraper.ingest_page([make_property(1, photos=3)]) == [record_id]
+    assert reconciled == [[record_id]]
+    assert len(odoo_server.odoo.tables['real_estate.photo']) == 3
+
+    # Once written, the listing is skipped as usual
+    reconciled.clear()
+    property_scraper.ingest_page([make_property(1, photos=3)])
+    assert not reconciled
@@ -0,0 +1,42 @@
+import pytest
+
+import scraper
+from fixtures import make_property
+
+
+def test_sync_spec_is_read_from_odoo(make_scraper, odoo_server, monkeypatch):
+    spec = odoo_server.odoo.scraper_sync_spec()
+    spec['identity_keys'] = [['property_id'], ['url']]
+    monkeypatch.setattr(odoo_server.odoo, 'scraper_sync_spec', lambda: spec)
+
+    property_scraper = make_scraper()
+
+    assert property_scraper.identity_key_fields == (('property_id',), ('url',))
+    assert property_scraper.child_collections == scraper.CHILD_COLLECTIONS
+
+
+def test_addons_without_a_sync_spec_use_the_built_in_one(make_scraper):
+    property_scraper = make_scraper(server_upsert=False)
+
+    assert property_scraper.identity_key_fields == scraper.IDENTITY_KEY_FIELDS
+    assert property_scraper.child_reconcilers['features'].relation_field == 'feature_ids'
+
+
+@pytest.mark.parametrize('server_upsert', [True, False])
+def test_mls_numbers_of_other_mls_stay_apart(make_scraper, odoo_server, server_upsert):
+    odoo = odoo_server.odoo
+    crmls = odoo.create('real_estate.listing', {'mls': 'CRMLS', 'mls_id': 'A100', 'address': '1 Other St'})
+    other = odoo.create('real_estate.listing', {'mls': 'TXAUS', 'mls_id': 'A200', 'address': '2 Other St'})
+    property_scraper = make_scraper(server_upsert=server_upsert)
+
+    # Each value of the pair matches a listing, but no listing matches both
+    payload = property_scraper.build_listing_payload(make_property(1))
+    payload['listing'].update(property_id=False, mls='TXAUS', mls_id='A100')
+    assert property_scraper.resolve_identities([property_scraper.payload_identity(payload)]) == [None]
+
+    [listing_id], _ = property_scraper.create_or_update_properties([payload])
+
+    assert listing_id not in (crmls, other)
+    assert odoo.tables['real_estate.listing'][crmls]['mls'] == 'CRMLS'
+    assert odoo.tables['real_estate.listing'][other]['mls_id'] == 'A200'
+    assert property_scraper.resolve_identities([{'mls': 'CRMLS', 'mls_id': 'A100'}]) == [crmls]
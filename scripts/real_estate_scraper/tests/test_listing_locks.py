@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from scraper import KeyedLock
+
+
+class Intervals:
+    """Records when each owner entered and left its critical section"""
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def run(self, owner, seconds=0.1):
+        start = time.monotonic()
+        time.sleep(seconds)
+        with self._lock:
+            self.spans[owner] = (start, time.monotonic())
+
+    def overlap(self, first, second):
+        (start1, end1), (start2, end2) = self.spans[first], self.spans[second]
+        return start1 < end2 and start2 < end1
+
+
+def test_keyed_lock_serializes_holders_of_the_same_key():
+    locks = KeyedLock()
+    intervals = Intervals()
+
+    def hold(keys, owner):
+        with locks.hold(keys):
+            # Holds are re-entrant for the same thread
+            with locks.hold(keys[:1]):
+                intervals.run(owner)
+
+    threads = [
+        threading.Thread(target=hold, args=([('property_id', '1'), ('url', 'a')], 'a')),
+        threading.Thread(target=hold, args=([('url', 'a')], 'b')),
+        threading.Thread(target=hold, args=([('property_id', '2')], 'c')),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not intervals.overlap('a', 'b')
+    assert intervals.overlap('a', 'c') or intervals.overlap('b', 'c')
+
+
+class Connection:
+    """Stand-in for the pika connection; callbacks handed over by workers run right away"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def add_callback_threadsafe(self, callback):
+        with self._lock:
+            callback()
+
+
+def test_workers_never_handle_messages_for_the_same_listing_at_once(make_scraper, channel, monkeypatch):
+    property_scraper = make_scraper()
+    property_scraper.connection = Connection()
+    property_scraper.workers = ThreadPoolExecutor(max_workers=4)
+    intervals = Intervals()
+
+    def ingest(location, listing_type, record_id, kwargs, force_refresh):
+        intervals.run(location)
+        return [record_id]
+
+    monkeypatch.setattr(property_scraper, 'ingest', ingest)
+
+    messages = [
+        {'location': '1 Main St', 'record_id': 7},
+        {'location': '1  main st', 'record_id': 7},
+        {'location': '2 Main St', 'record_id': 8},
+    ]
+    for delivery_tag, message in enumerate(messages, 1):
+        property_scraper.on_message(channel, SimpleNamespace(delivery_tag=delivery_tag), None, json.dumps(message))
+    property_scraper.workers.shutdown(wait=True)
+
+    assert not intervals.overlap('1 Main St', '1  main st')
+    assert intervals.overlap('1 Main St', '2 Main St') or intervals.overlap('1  main st', '2 Main St')
+    assert sorted(channel.settled) == [(1, 'ack'), (2, 'ack'), (3, 'ack')]
@@ -0,0 +1,80 @@
+import json
+import time
+from types import SimpleNamespace
+
+import requests
+
+from fixtures import make_property
+
+
+class Connection:
+    """Stand-in for the pika connection, holding the calls scheduled with call_later"""
+
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        self.timers.append((delay, callback))
+
+    def run_timers(self):
+        timers, self.timers = self.timers, []
+        for _, callback in timers:
+            callback()
+
+
+def throttled_response_error():
+    response = requests.Response()
+    response.status_code = 429
+    return requests.exceptions.HTTPError('429 Client Error: Too Many Requests', response=response)
+
+
+def send(property_scraper, channel, delivery_tag, **message):
+    property_scraper.process_message(channel, SimpleNamespace(delivery_tag=delivery_tag), None, json.dumps(message))
+
+
+def test_successful_message_marks_listings_scraped(make_scraper, odoo_server, searches, channel):
+    property_scraper = make_scraper()
+    searches.results['Austin, TX'] = [make_property(1), make_property(2), make_property(3)]
+
+    send(property_scraper, channel, 1, location='Austin, TX')
+    listings = odoo_server.odoo.tables['real_estate.listing']
+    assert len(listings) == 3
+    first_marks = {record_id: listing['last_scraped_at'] for record_id, listing in listings.items()}
+
+    # Unchanged listings are not written, but they were scraped
+    odoo_server.odoo.reset_calls()
+    send(property_scraper, channel, 2, location='Austin, TX')
+
+    assert ('real_estate.listing', 'upsert_scraped_listing') not in odoo_server.odoo.calls
+    assert odoo_server.odoo.calls[('real_estate.listing', 'mark_scraped')] == 1
+    assert all(listing['last_scraped_at'] >= first_marks[record_id] for record_id, listing in listings.items())
+    assert channel.settled == [(1, 'ack'), (2, 'ack')]
+
+
+def test_failed_message_does_not_mark_listings(make_scraper, odoo_server, searches, channel):
+    property_scraper = make_scraper()
+    searches.failures[None] = ValueError('no such address')
+
+    send(property_scraper, channel, 1, location='1 Main St', record_id=7)
+
+    assert ('real_estate.listing', 'mark_scraped') not in odoo_server.odoo.calls
+    assert channel.settled == [(1, 'nack')]
+
+
+def test_throttled_message_is_requeued_after_the_backoff(make_scraper, searches, channel):
+    property_scraper = make_scraper(SCRAPE_RATE_PER_MINUTE=60, SCRAPE_BACKOFF_MIN=30, SCRAPE_MAX_WAIT=1)
+    property_scraper.connection = Connection()
+    searches.failures[None] = throttled_response_error()
+
+    start = time.monotonic()
+    send(property_scraper, channel, 1, location='1 Main St', record_id=7)
+    # The next message finds searches paused and does not wait for them either
+    send(property_scraper, channel, 2, location='2 Main St', record_id=8)
+    assert time.monotonic() - start < 5
+
+    assert searches.calls == [('search', '1 Main St')]
+    assert channel.settled == []
+    assert [round(delay) for delay, _ in property_scraper.connection.timers] == [30, 30]
+
+    property_scraper.connection.run_timers()
+    assert channel.settled == [(1, 'requeue'), (2, 'requeue')]
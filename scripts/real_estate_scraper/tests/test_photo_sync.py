@@ -0,0 +1,66 @@
+from fixtures import make_property
+
+
+def photo(name, label='kitchen'):
+    return {'href': f'https://ap.rdcpix.com/1/{name}-w1024.jpg', 'tags': [{'label': label}]}
+
+
+def sync_photos(property_scraper, photos):
+    payload = property_scraper.build_listing_payload(make_property(1, photos=0))
+    payload['photos'] = property_scraper.map_photo_rows(photos)
+    property_ids, failed = property_scraper.create_or_update_properties([payload])
+    assert not failed
+    return property_ids[0]
+
+
+def gallery(odoo, listing_id):
+    """Photos of a listing in gallery order: (name, id, is_primary)"""
+    photos = sorted((record for record in odoo.tables['real_estate.photo'].values()
+                     if record['property_id'] == listing_id), key=lambda record: record['sequence'])
+    return [(record['preview_href'].split('/')[-1].split('-')[0], record['id'], record['is_primary'])
+            for record in photos]
+
+
+def tag_id(odoo, label):
+    return next(tag_id for tag_id, tag in odoo.tables['real_estate.photo.tag'].items() if tag['name'] == label)
+
+
+def test_photos_are_reconciled_by_href(make_scraper, odoo_server, odoo_calls):
+    property_scraper = make_scraper(server_upsert=False)
+    listing_id = sync_photos(property_scraper, [photo('a'), photo('b', 'bedroom'), photo('c', 'garage'), photo('d')])
+
+    before = {name: photo_id for name, photo_id, _ in gallery(odoo_server.odoo, listing_id)}
+    assert list(before) == ['a', 'b', 'c', 'd']
+    # The tags of every photo are created at once
+    assert [call for call in odoo_calls if call[:2] == ('real_estate.photo.tag', 'create')] == [
+        ('real_estate.photo.tag', 'create',
+         {'vals_list': [{'name': 'kitchen'}, {'name': 'bedroom'}, {'name': 'garage'}]}),
+    ]
+
+    # a and d left the listing, c moved to the front and e is new
+    odoo_calls.clear()
+    sync_photos(property_scraper, [photo('c', 'garage'), photo('b', 'bedroom'), photo('e')])
+
+    after = gallery(odoo_server.odoo, listing_id)
+    assert [name for name, _, _ in after] == ['c', 'b', 'e']
+    assert [is_primary for _, _, is_primary in after] == [True, False, False]
+    # Kept photos are updated in place
+    assert after[0][1] == before['c'] and after[1][1] == before['b']
+
+    photo_calls = [
+        (method, kwargs) for model, method, kwargs in odoo_calls
+        if (model, method) in (('real_estate.photo', 'create'), ('real_estate.photo', 'unlink'))
+        or 'photo_ids' in kwargs.get('vals', {})
+    ]
+    assert photo_calls == [
+        ('unlink', {'ids': [before['a'], before['d']]}),
+        # b keeps its place, so only c is resequenced
+        ('write', {'ids': [listing_id], 'vals': {'photo_ids': [
+            [1, before['c'], {'sequence': 1, 'is_primary': True}],
+        ]}}),
+        ('create', {'vals_list': [{
+            'preview_href': 'https://ap.rdcpix.com/1/e-w1024.jpg', 'href': '', 'title': '', 'sequence': 3,
+            'is_primary': False, 'tag_ids': [[6, 0, [tag_id(odoo_server.odoo, 'kitchen')]]],
+            'property_id': listing_id,
+        }]}),
+    ]
@@ -0,0 +1,126 @@
+import pytest
+import requests
+from homeharvest.exceptions import AuthenticationError
+from urllib3.exceptions import MaxRetryError, ResponseError
+
+import rate_limiter
+from rate_limiter import RateLimiter, ScrapeThrottledError, is_throttling_error
+
+
+@pytest.fixture
+def limiter(tmp_path, clock, monkeypatch):
+    """60 searches per minute, bursts of 2, backoffs of 30s to 120s and waits of up to 10s"""
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    limiter = RateLimiter(str(tmp_path / 'rate_limit.sqlite3'), tokens_per_minute=60, burst=2,
+                          min_backoff=30, max_backoff=120, max_wait=10)
+    yield limiter
+    limiter.close()
+
+
+def response(status_code):
+    answer = requests.Response()
+    answer.status_code = status_code
+    return answer
+
+
+def retry_error(status_code):
+    reason = ResponseError(ResponseError.SPECIFIC_ERROR.format(status_code=status_code))
+    return requests.exceptions.RetryError(MaxRetryError(None, '/api/v1/hulk', reason))
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.HTTPError('429 Client Error', response=response(429)),
+    requests.exceptions.HTTPError('403 Client Error', response=response(403)),
+    AuthenticationError('Failed to get access token', response=response(403)),
+    retry_error(429),
+    retry_error(403),
+    Exception('Rate limit exceeded'),
+])
+def test_throttling_errors(error):
+    assert is_throttling_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.HTTPError('500 Server Error', response=response(500)),
+    AuthenticationError('Failed to get access token', response=response(200)),
+    retry_error(502),
+    requests.exceptions.JSONDecodeError('Expecting value', '<html>', 0),
+    ValueError('no such address'),
+])
+def test_other_errors_are_not_throttling(error):
+    assert not is_throttling_error(error)
+
+
+def test_bucket_refills_at_the_rate(limiter, clock):
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+
+    # One token per second once the burst is spent
+    assert limiter.acquire() == pytest.approx(1)
+    clock.now += 0.5
+    assert limiter.acquire() == pytest.approx(0.5)
+
+    # An idle bucket refills up to the burst only
+    clock.now += 60
+    assert [limiter.acquire() for _ in range(3)] == [0, 0, pytest.approx(1)]
+    assert limiter.stats()['waited_seconds'] == 2.5
+
+
+def test_throttles_double_the_backoff_up_to_the_max(limiter, clock):
+    backoffs = []
+    for _ in range(4):
+        backoffs.append(limiter.throttled())
+        clock.now += backoffs[-1]
+
+    assert backoffs == [30, 60, 120, 120]
+
+
+def test_throttles_during_a_backoff_do_not_extend_it(limiter, clock):
+    assert limiter.throttled() == 30
+    clock.now += 10
+    assert limiter.throttled() == 20
+
+    clock.now += 20
+    assert limiter.throttled() == 60
+
+
+def test_successes_halve_the_backoff(limiter, clock):
+    limiter.throttled()
+    clock.now += 30
+    limiter.throttled()
+    clock.now += 60
+
+    # A success halves the 60s backoff, which the next throttle doubles again; halving
+    # it below the minimum clears it, and the next throttle starts over
+    limiter.succeeded()
+    assert limiter.throttled() == 60
+    clock.now += 60
+    limiter.succeeded()
+    limiter.succeeded()
+    assert limiter.throttled() == 30
+
+
+def test_acquire_does_not_wait_out_a_backoff(limiter, clock):
+    limiter.throttled()
+    clock.now += 25
+
+    # 5s left: waited for
+    assert limiter.acquire() == pytest.approx(5)
+
+    limiter.throttled()
+    with pytest.raises(ScrapeThrottledError) as raised:
+        limiter.acquire()
+
+    assert raised.value.retry_after == pytest.approx(60)
+    assert clock.slept == [pytest.approx(5)]
+
+
+def test_limiters_sharing_a_file_share_the_bucket(limiter, tmp_path):
+    other = RateLimiter(limiter.path, tokens_per_minute=60, burst=2, max_wait=0)
+    try:
+        assert limiter.acquire() == 0
+        assert other.acquire() == 0
+        with pytest.raises(ScrapeThrottledError):
+            other.acquire()
+    finally:
+        other.close()
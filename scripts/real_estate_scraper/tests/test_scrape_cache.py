@@ -0,0 +1,104 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import scrape_cache
+from fixtures import make_property
+from scrape_cache import ScrapeCache, query_key
+
+AUSTIN = query_key('Austin, TX', 'for_sale', {})
+
+
+@pytest.fixture
+def cache(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(scrape_cache, 'time', clock)
+    cache = ScrapeCache(str(tmp_path / 'scrape_cache.sqlite3'), ttl=900, max_bytes=1024 * 1024)
+    yield cache
+    cache.close()
+
+
+def send(property_scraper, channel, delivery_tag, **message):
+    property_scraper.process_message(channel, SimpleNamespace(delivery_tag=delivery_tag), None, json.dumps(message))
+
+
+def test_completed_stream_is_cached(make_scraper, searches, channel):
+    property_scraper = make_scraper(SCRAPE_CACHE_TTL=900, SCRAPE_STREAM_PAGES=True)
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+
+    send(property_scraper, channel, 1, location='Austin, TX')
+    send(property_scraper, channel, 2, location='Austin, TX', force_refresh=True)
+
+    assert searches.calls == [('pages', 'Austin, TX', 0)]
+    assert channel.settled == [(1, 'ack'), (2, 'ack')]
+
+    cached = property_scraper.scrape_cache.get(AUSTIN)
+    assert [p.property_id for p in cached] == [p.property_id for p in searches.results['Austin, TX']]
+
+
+def test_interrupted_stream_is_not_cached(make_scraper, searches, channel):
+    property_scraper = make_scraper(SCRAPE_CACHE_TTL=900, SCRAPE_STREAM_PAGES=True, SCRAPE_CHECKPOINT_TTL=0)
+    searches.results['Austin, TX'] = [make_property(i) for i in range(5)]
+    searches.failures[1] = ValueError('connection reset')
+
+    send(property_scraper, channel, 1, location='Austin, TX')
+
+    assert property_scraper.scrape_cache.get(AUSTIN) is None
+    assert channel.settled == [(1, 'nack')]
+
+
+def test_query_key_normalizes_the_search():
+    assert query_key(' austin,  TX ', 'FOR_SALE', {'radius': 1, 'limit': 5}) == \
+        query_key('Austin, TX', 'for_sale', {'limit': 5, 'radius': 1, 'return_type': 'pydantic'})
+    assert query_key('Austin, TX', 'for_sale', {}) != query_key('Austin, TX', 'for_rent', {})
+
+
+def test_cached_search_expires_after_its_ttl(cache, clock):
+    cache.set(AUSTIN, [make_property(1), make_property(2)])
+
+    clock.now += 899
+    assert [p.property_id for p in cache.get(AUSTIN)] == ['9000001', '9000002']
+
+    # Reading a search does not extend its TTL
+    clock.now += 1
+    assert cache.get(AUSTIN) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_searches_are_evicted(cache, clock):
+    keys = [query_key(f'{zip_code}', 'for_sale', {}) for zip_code in (78701, 78702, 78703)]
+    cache.set(keys[0], [make_property(i) for i in range(20)])
+    clock.now += 1
+    cache.set(keys[1], [make_property(i) for i in range(20, 40)])
+    clock.now += 1
+    cache.get(keys[0])
+
+    # Room for two of these searches: the one read least recently goes
+    size = cache._db.execute('SELECT MAX(size) FROM results').fetchone()[0]
+    cache.max_bytes = size * 2 + size // 2
+    clock.now += 1
+    cache.set(keys[2], [make_property(i) for i in range(40, 60)])
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_writer_caches_pages_once_committed(cache):
+    writer = cache.writer(AUSTIN)
+    writer.add([make_property(1), make_property(2)])
+    writer.add([])
+    writer.add([make_property(3)])
+    assert cache.get(AUSTIN) is None
+
+    writer.commit()
+    assert [p.property_id for p in cache.get(AUSTIN)] == ['9000001', '9000002', '9000003']
+
+
+def test_writer_drops_searches_outgrowing_the_cache(cache):
+    cache.max_bytes = 1024
+    writer = cache.writer(AUSTIN)
+    for i in range(0, 200, 20):
+        writer.add([make_property(j) for j in range(i, i + 20)])
+    writer.commit()
+
+    assert cache.get(AUSTIN) is None
@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from scraper import OdooTransport
+
+
+def transport(odoo_server, **options):
+    return OdooTransport(f'http://127.0.0.1:{odoo_server.server_port}/json/2', {}, **options)
+
+
+def test_calls_reuse_one_connection(make_scraper):
+    property_scraper = make_scraper()
+    before = property_scraper.transport.stats()
+
+    for _ in range(5):
+        assert property_scraper.odoo_request('res.users', 'context_get') is not None
+
+    stats = property_scraper.transport.stats()
+    assert stats['requests'] == before['requests'] + 5
+    assert stats['new_connections'] == 1
+    assert stats['reused_connections'] == stats['requests'] - 1
+
+
+def test_concurrent_calls_stay_within_the_pool(odoo_server):
+    odoo_server.odoo.latency = 0.05
+    pooled = transport(odoo_server, pool_size=2)
+
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            responses = list(executor.map(lambda _: pooled.post('res.users/context_get', {}), range(12)))
+    finally:
+        pooled.close()
+
+    assert [response.status_code for response in responses] == [200] * 12
+    # Callers beyond the pool size wait for a connection instead of opening more
+    assert pooled.stats() == {'requests': 12, 'new_connections': 2, 'reused_connections': 10}
+
+
+def test_calls_time_out(odoo_server):
+    odoo_server.odoo.latency = 1
+    slow = transport(odoo_server, timeout=0.2)
+
+    try:
+        start = time.monotonic()
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            slow.post('res.users/context_get', {})
+        assert time.monotonic() - start < 0.9
+
+        # A call's own timeout overrides the transport's
+        assert slow.post('res.users/context_get', {}, timeout=5).status_code == 200
+    finally:
+        slow.close()